@@ -0,0 +1,64 @@
+"""valid refresh token index
+
+Revision ID: 3dee7c30c725
+Revises: 73aa47240b91
+Create Date: 2026-10-19 14:05:22.816304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3dee7c30c725'
+down_revision: Union[str, Sequence[str], None] = '73aa47240b91'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def is_partitioned() -> bool:
+    stmt = sa.text(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+        "WHERE partrelid = 'refresh_tokens'::regclass)"
+    )
+    return op.get_bind().execute(stmt).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # indexes on a partitioned table can not be built concurrently
+    if is_partitioned():
+        op.create_index(
+            'idx_auth_valid_user_id',
+            'refresh_tokens',
+            ['user_id'],
+            unique=False,
+            postgresql_where=sa.text("status = 'VALID'"),
+        )
+        return
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_auth_valid_user_id',
+            'refresh_tokens',
+            ['user_id'],
+            unique=False,
+            postgresql_where=sa.text("status = 'VALID'"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if is_partitioned():
+        op.drop_index('idx_auth_valid_user_id', table_name='refresh_tokens')
+        return
+
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_auth_valid_user_id',
+            table_name='refresh_tokens',
+            postgresql_concurrently=True,
+        )
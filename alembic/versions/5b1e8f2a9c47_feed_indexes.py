@@ -0,0 +1,76 @@
+"""feed indexes
+
+Revision ID: 5b1e8f2a9c47
+Revises: 3dee7c30c725
+Create Date: 2026-10-19 16:42:08.194220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b1e8f2a9c47'
+down_revision: Union[str, Sequence[str], None] = '3dee7c30c725'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_post_user_created_at',
+            'posts',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_post_public_created_at',
+            'posts',
+            [sa.text('created_at DESC')],
+            unique=False,
+            postgresql_where=sa.text("visibility = 'PUBLIC'"),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_follow_follower_id',
+            'follows',
+            ['follower_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # idx_post_user_created_at covers lookups by user_id
+        op.drop_index(
+            'idx_post_user_id', table_name='posts', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_post_user_id',
+            'posts',
+            ['user_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_follow_follower_id',
+            table_name='follows',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_post_public_created_at',
+            table_name='posts',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_post_user_created_at',
+            table_name='posts',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,132 @@
+"""partition refresh tokens
+
+Revision ID: 73aa47240b91
+Revises: 795aa03efff8
+Create Date: 2026-10-19 11:47:03.518930
+
+"""
+from typing import Sequence, Union
+from datetime import datetime, timedelta, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '73aa47240b91'
+down_revision: Union[str, Sequence[str], None] = '795aa03efff8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# refresh_tokens is only partitioned when REFRESH_TOKEN_PARTITIONING is set
+# the primary key has to include the partition key, ids stay unique since
+# they are generated with uuid4
+
+
+def create_indexes() -> None:
+    op.create_index('idx_auth_token', 'refresh_tokens', ['token'], unique=False)
+    op.create_index('idx_auth_user_id', 'refresh_tokens', ['user_id'], unique=False)
+    op.create_index(
+        'idx_auth_expires_at', 'refresh_tokens', ['expires_at'], unique=False
+    )
+    op.create_index(
+        'idx_auth_inactive_id',
+        'refresh_tokens',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('REVOKED', 'USED')"),
+    )
+
+
+def drop_indexes() -> None:
+    op.drop_index('idx_auth_inactive_id', table_name='refresh_tokens')
+    op.drop_index('idx_auth_expires_at', table_name='refresh_tokens')
+    op.drop_index('idx_auth_user_id', table_name='refresh_tokens')
+    op.drop_index('idx_auth_token', table_name='refresh_tokens')
+
+
+def is_partitioned() -> bool:
+    stmt = sa.text(
+        'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+        "WHERE partrelid = 'refresh_tokens'::regclass)"
+    )
+    return op.get_bind().execute(stmt).scalar()
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not settings.REFRESH_TOKEN_PARTITIONING or is_partitioned():
+        return
+
+    drop_indexes()
+    op.rename_table('refresh_tokens', 'refresh_tokens_unpartitioned')
+    op.execute(
+        'ALTER TABLE refresh_tokens_unpartitioned '
+        'RENAME CONSTRAINT refresh_tokens_pk TO refresh_tokens_unpartitioned_pk'
+    )
+
+    op.execute(
+        'CREATE TABLE refresh_tokens '
+        '(LIKE refresh_tokens_unpartitioned INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (expires_at)'
+    )
+    op.create_primary_key('refresh_tokens_pk', 'refresh_tokens', ['id', 'expires_at'])
+    op.create_foreign_key(
+        'user_id_fk', 'refresh_tokens', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    create_indexes()
+
+    # rows outside the pre-created days land in the default partition
+    op.execute('CREATE TABLE refresh_tokens_default PARTITION OF refresh_tokens DEFAULT')
+
+    today = datetime.now(timezone.utc).date()
+    days_ahead: int = (
+        settings.REFRESH_TOKEN_EXPIRE_TIME + settings.REFRESH_TOKEN_PARTITIONS_AHEAD
+    )
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        op.execute(
+            f'CREATE TABLE refresh_tokens_p{day:%Y%m%d} PARTITION OF refresh_tokens '
+            f"FOR VALUES FROM ('{day} 00:00:00+00') "
+            f"TO ('{day + timedelta(days=1)} 00:00:00+00')"
+        )
+
+    # expired tokens are not carried over
+    op.execute(
+        'INSERT INTO refresh_tokens SELECT * FROM refresh_tokens_unpartitioned '
+        'WHERE expires_at > now()'
+    )
+    op.drop_table('refresh_tokens_unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not is_partitioned():
+        return
+
+    drop_indexes()
+    op.rename_table('refresh_tokens', 'refresh_tokens_partitioned')
+    op.execute(
+        'ALTER TABLE refresh_tokens_partitioned '
+        'RENAME CONSTRAINT refresh_tokens_pk TO refresh_tokens_partitioned_pk'
+    )
+
+    op.execute(
+        'CREATE TABLE refresh_tokens '
+        '(LIKE refresh_tokens_partitioned INCLUDING DEFAULTS)'
+    )
+    op.create_primary_key('refresh_tokens_pk', 'refresh_tokens', ['id'])
+    op.create_foreign_key(
+        'user_id_fk', 'refresh_tokens', 'users', ['user_id'], ['id'], ondelete='CASCADE'
+    )
+    create_indexes()
+
+    op.execute(
+        'INSERT INTO refresh_tokens SELECT * FROM refresh_tokens_partitioned '
+        'WHERE expires_at > now()'
+    )
+    # dropping the parent drops every partition
+    op.drop_table('refresh_tokens_partitioned')
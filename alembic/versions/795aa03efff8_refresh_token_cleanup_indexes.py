@@ -0,0 +1,54 @@
+"""refresh token cleanup indexes
+
+Revision ID: 795aa03efff8
+Revises: f0ed73a30185
+Create Date: 2026-10-19 10:12:41.204517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '795aa03efff8'
+down_revision: Union[str, Sequence[str], None] = 'f0ed73a30185'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # built concurrently so sign in and refresh are not blocked on a large table
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_auth_expires_at',
+            'refresh_tokens',
+            ['expires_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_auth_inactive_id',
+            'refresh_tokens',
+            ['id'],
+            unique=False,
+            postgresql_where=sa.text("status IN ('REVOKED', 'USED')"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_auth_inactive_id',
+            table_name='refresh_tokens',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_auth_expires_at',
+            table_name='refresh_tokens',
+            postgresql_concurrently=True,
+        )
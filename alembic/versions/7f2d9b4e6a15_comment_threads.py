@@ -0,0 +1,109 @@
+"""comment threads
+
+Revision ID: 7f2d9b4e6a15
+Revises: e3a7c5d91f08
+Create Date: 2026-10-19 23:05:51.318466
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f2d9b4e6a15'
+down_revision: Union[str, Sequence[str], None] = 'e3a7c5d91f08'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('comments', sa.Column('parent_id', sa.UUID(), nullable=True))
+    op.add_column(
+        'comments',
+        sa.Column('reply_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.create_foreign_key(
+        'parent_id_fk',
+        'comments',
+        'comments',
+        ['parent_id'],
+        ['id'],
+        ondelete='CASCADE',
+    )
+
+    # existing comments are all top level
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_comment_post_id',
+            'comments',
+            ['post_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_comment_top_created_at',
+            'comments',
+            ['post_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_where=sa.text('parent_id IS NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_comment_top_likes',
+            'comments',
+            ['post_id', sa.text('like_count DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_where=sa.text('parent_id IS NULL'),
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_comment_parent_created_at',
+            'comments',
+            ['parent_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_comment_post_likes',
+            table_name='comments',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_comment_post_created_at',
+            table_name='comments',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_comment_post_created_at',
+            'comments',
+            ['post_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_comment_post_likes',
+            'comments',
+            ['post_id', sa.text('like_count DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        for name in (
+            'idx_comment_parent_created_at',
+            'idx_comment_top_likes',
+            'idx_comment_top_created_at',
+            'idx_comment_post_id',
+        ):
+            op.drop_index(name, table_name='comments', postgresql_concurrently=True)
+
+    # replies are kept as top level comments so the post counters hold
+    op.drop_constraint('parent_id_fk', 'comments', type_='foreignkey')
+    op.drop_column('comments', 'reply_count')
+    op.drop_column('comments', 'parent_id')
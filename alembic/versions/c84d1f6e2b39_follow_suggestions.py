@@ -0,0 +1,40 @@
+"""follow suggestions
+
+Revision ID: c84d1f6e2b39
+Revises: 5b1e8f2a9c47
+Create Date: 2026-10-19 18:21:47.503918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c84d1f6e2b39'
+down_revision: Union[str, Sequence[str], None] = '5b1e8f2a9c47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('follow_suggestions',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('suggested_id', sa.UUID(), nullable=False),
+    sa.Column('mutuals', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], name='suggestion_user_id_fk', ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['suggested_id'], ['users.id'], name='suggestion_suggested_id_fk', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'suggested_id', name='follow_suggestions_pk')
+    )
+    op.create_index('idx_suggestion_user_mutuals', 'follow_suggestions', ['user_id', sa.text('mutuals DESC'), 'suggested_id'], unique=False)
+    op.create_index('idx_suggestion_suggested_id', 'follow_suggestions', ['suggested_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_suggestion_suggested_id', table_name='follow_suggestions')
+    op.drop_index('idx_suggestion_user_mutuals', table_name='follow_suggestions')
+    op.drop_table('follow_suggestions')
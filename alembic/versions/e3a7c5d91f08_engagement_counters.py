@@ -0,0 +1,127 @@
+"""engagement counters
+
+Revision ID: e3a7c5d91f08
+Revises: c84d1f6e2b39
+Create Date: 2026-10-19 21:14:37.502913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c5d91f08'
+down_revision: Union[str, Sequence[str], None] = 'c84d1f6e2b39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# HOT_SCORE_PERIOD in app.models.posts
+HOT_SCORE_PERIOD: int = 45000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'posts',
+        sa.Column('like_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column(
+        'posts',
+        sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False),
+    )
+    op.add_column(
+        'posts',
+        sa.Column(
+            'hot_score',
+            sa.Float(),
+            server_default=sa.text(f'extract(epoch from now()) / {HOT_SCORE_PERIOD}'),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        'comments',
+        sa.Column('like_count', sa.Integer(), server_default='0', nullable=False),
+    )
+
+    op.execute(
+        'UPDATE posts SET like_count = likes.count '
+        'FROM (SELECT post_id, count(*) FROM likes GROUP BY post_id) AS likes '
+        'WHERE posts.id = likes.post_id'
+    )
+    op.execute(
+        'UPDATE posts SET comment_count = comments.count '
+        'FROM (SELECT post_id, count(*) FROM comments GROUP BY post_id) AS comments '
+        'WHERE posts.id = comments.post_id'
+    )
+    op.execute(
+        'UPDATE posts SET hot_score = '
+        'log(greatest(like_count + 2 * comment_count, 1)) '
+        f'+ extract(epoch from created_at) / {HOT_SCORE_PERIOD}'
+    )
+    op.execute(
+        'UPDATE comments SET like_count = likes.count '
+        'FROM (SELECT comment_id, count(*) FROM comment_likes GROUP BY comment_id) '
+        'AS likes WHERE comments.id = likes.comment_id'
+    )
+
+    with op.get_context().autocommit_block():
+        for name, column in (
+            ('idx_post_user_likes', 'like_count'),
+            ('idx_post_user_comments', 'comment_count'),
+            ('idx_post_user_hot', 'hot_score'),
+        ):
+            op.create_index(
+                name,
+                'posts',
+                ['user_id', sa.text(f'{column} DESC'), sa.text('id DESC')],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+        op.create_index(
+            'idx_comment_post_created_at',
+            'comments',
+            ['post_id', 'created_at', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'idx_comment_post_likes',
+            'comments',
+            ['post_id', sa.text('like_count DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        # idx_comment_post_created_at covers lookups by post_id
+        op.drop_index(
+            'idx_comment_post_id',
+            table_name='comments',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_comment_post_id',
+            'comments',
+            ['post_id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        for name, table in (
+            ('idx_comment_post_likes', 'comments'),
+            ('idx_comment_post_created_at', 'comments'),
+            ('idx_post_user_hot', 'posts'),
+            ('idx_post_user_comments', 'posts'),
+            ('idx_post_user_likes', 'posts'),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    op.drop_column('comments', 'like_count')
+    op.drop_column('posts', 'hot_score')
+    op.drop_column('posts', 'comment_count')
+    op.drop_column('posts', 'like_count')
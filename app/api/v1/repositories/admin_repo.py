@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import select, func, and_
 
 from app.models.users import User
+from app.api.v1.repositories.records import UserRecord, fetch_records
 
 
 class AdminRepoV1:
@@ -20,8 +21,17 @@ class AdminRepoV1:
         return users
 
     @staticmethod
-    def get_suspended_users(role_id: UUID, db: Session) -> list[User]:
-        stmt = select(User).where(
+    def get_suspended_users(role_id: UUID, db: Session) -> list[UserRecord]:
+        stmt = select(
+            User.id,
+            User.display_name,
+            User.username,
+            User.email,
+            User.dob,
+            User.nationality,
+            User.bio,
+            User.created_at,
+        ).where(
             and_(
                 User.is_delete.is_(False),
                 User.is_suspended.is_(True),
@@ -29,7 +39,7 @@ class AdminRepoV1:
             )
         )
 
-        users: list[User] = db.execute(stmt).scalars().all()
+        users: list[UserRecord] = fetch_records(stmt, UserRecord, db)
         return users
 
     @staticmethod
@@ -1,16 +1,22 @@
 from uuid import UUID
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
-from sqlalchemy import select, delete, or_
+from sqlalchemy import Row, select, update, delete, and_, or_, func, text
 
+from app.models.users import User
 from app.models.auth import RefreshToken
 from app.api.v1.schemas.auth import TokenStatus
 
 
 class AuthRepoV1:
     @staticmethod
-    def get_refresh_token(token_id: UUID, db: Session) -> RefreshToken:
-        stmt = select(RefreshToken).where(RefreshToken.id == str(token_id))
+    def get_refresh_token(
+        token_id: UUID, token_hash: str, db: Session
+    ) -> RefreshToken | None:
+        '''the presented token has to match the stored hash of its jti'''
+        stmt = select(RefreshToken).where(
+            and_(RefreshToken.id == str(token_id), RefreshToken.token == token_hash)
+        )
         token: RefreshToken | None = db.execute(stmt).scalar()
         return token
 
@@ -19,22 +25,157 @@ class AuthRepoV1:
         '''create and update refresh token'''
         db.add(token)
         db.flush()
-        db.refresh(token)
 
     @staticmethod
-    def delete_tokens(db: Session):
+    def use_refresh_token(
+        token_id: UUID, token_hash: str, now: datetime, db: Session
+    ) -> Row | None:
+        '''mark a valid token used and return the (id, username) of its user,
+        None if the token is unknown, expired or already spent
+
+        a concurrent rotation of the same token waits on the row lock and
+        then fails the status check, so a token can only be spent once'''
         stmt = (
-            delete(RefreshToken)
+            update(RefreshToken)
+            .where(
+                and_(
+                    RefreshToken.id == str(token_id),
+                    RefreshToken.token == token_hash,
+                    RefreshToken.status == TokenStatus.VALID,
+                    RefreshToken.expires_at > now,
+                    User.id == RefreshToken.user_id,
+                )
+            )
+            .values(status=TokenStatus.USED, used_at=now)
+            .returning(User.id, User.username)
+        )
+        return db.execute(stmt).one_or_none()
+
+    @staticmethod
+    def get_revoked_token_ids(since: datetime, db: Session) -> list[UUID]:
+        '''tokens revoked or used after since, only rows waiting for the
+        cleanup are read through the partial index on inactive tokens'''
+        stmt = select(RefreshToken.id).where(
+            and_(
+                RefreshToken.status.in_((TokenStatus.REVOKED, TokenStatus.USED)),
+                func.coalesce(RefreshToken.revoked_at, RefreshToken.used_at) > since,
+            )
+        )
+        return db.execute(stmt).scalars().all()
+
+    @staticmethod
+    def revoke_user_tokens(user_id: UUID, now: datetime, db: Session) -> list[UUID]:
+        '''revoke every valid token of the user in one update, served by the
+        partial index on valid tokens, returns the revoked ids'''
+        stmt = (
+            update(RefreshToken)
+            .where(
+                and_(
+                    RefreshToken.user_id == user_id,
+                    RefreshToken.status == TokenStatus.VALID,
+                )
+            )
+            .values(status=TokenStatus.REVOKED, revoked_at=now)
+            .returning(RefreshToken.id)
+        )
+        return db.execute(stmt).scalars().all()
+
+    @staticmethod
+    def delete_tokens(
+        before: datetime, db: Session, after_id: UUID | None = None, limit: int = 1000
+    ) -> list[UUID]:
+        '''delete one batch of tokens that expired, were revoked or were used
+        before before, in primary key order after after_id, and return the
+        deleted ids
+
+        the revocation list is rebuilt from revoked and used rows, they are
+        kept until every access token of their session has expired, so the
+        caller passes now minus the access token lifetime
+
+        rows locked by a concurrent sign in/refresh are skipped instead of
+        waited on, they are picked up by the next run'''
+        batch = (
+            select(RefreshToken.id)
             .where(
                 or_(
-                    datetime.now(timezone.utc) >= RefreshToken.expires_at,
-                    RefreshToken.status == TokenStatus.REVOKED,
-                    RefreshToken.status == TokenStatus.USED,
+                    RefreshToken.expires_at <= before,
+                    and_(
+                        RefreshToken.status.in_(
+                            (TokenStatus.REVOKED, TokenStatus.USED)
+                        ),
+                        func.coalesce(RefreshToken.revoked_at, RefreshToken.used_at)
+                        <= before,
+                    ),
                 )
             )
+            .order_by(RefreshToken.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+
+        if after_id:
+            batch = batch.where(RefreshToken.id > after_id)
+
+        stmt = (
+            delete(RefreshToken)
+            .where(RefreshToken.id.in_(batch))
+            .returning(RefreshToken.id)
             .execution_options(synchronize_session=False)
         )
-        db.execute(stmt)
+        token_ids: list[UUID] = db.execute(stmt).scalars().all()
+        return token_ids
+
+    # Partition maintenance, only used when refresh_tokens is partitioned
+    # by day on expires_at (see REFRESH_TOKEN_PARTITIONING)
+
+    @staticmethod
+    def token_partition_name(day: date) -> str:
+        return f'refresh_tokens_p{day:%Y%m%d}'
+
+    @staticmethod
+    def is_token_table_partitioned(db: Session) -> bool:
+        stmt = text(
+            'SELECT EXISTS (SELECT 1 FROM pg_partitioned_table '
+            "WHERE partrelid = 'refresh_tokens'::regclass)"
+        )
+        return db.execute(stmt).scalar()
+
+    @staticmethod
+    def get_token_partitions(db: Session) -> list[str]:
+        stmt = text(
+            'SELECT c.relname FROM pg_inherits i '
+            'JOIN pg_class c ON c.oid = i.inhrelid '
+            "WHERE i.inhparent = 'refresh_tokens'::regclass"
+        )
+        partitions: list[str] = db.execute(stmt).scalars().all()
+        return partitions
+
+    @staticmethod
+    def create_token_partition(day: date, db: Session):
+        # ddl does not take bind parameters, the name and bounds are built
+        # from a date so nothing user provided reaches the statement
+        name: str = AuthRepoV1.token_partition_name(day)
+        db.execute(
+            text(
+                f'CREATE TABLE IF NOT EXISTS {name} PARTITION OF refresh_tokens '
+                f"FOR VALUES FROM ('{day} 00:00:00+00') "
+                f"TO ('{day + timedelta(days=1)} 00:00:00+00')"
+            )
+        )
+
+    @staticmethod
+    def drop_token_partition(name: str, db: Session):
+        db.execute(text(f'ALTER TABLE refresh_tokens DETACH PARTITION {name}'))
+        db.execute(text(f'DROP TABLE {name}'))
+
+    @staticmethod
+    def delete_default_partition_tokens(before: datetime, db: Session) -> int:
+        '''the default partition only holds rows inserted while maintenance
+        was behind, it is kept small with a plain delete'''
+        stmt = text(
+            'DELETE FROM refresh_tokens_default WHERE expires_at <= :before'
+        ).bindparams(before=before)
+        return db.execute(stmt).rowcount
 
 
 auth_repo_v1 = AuthRepoV1()
@@ -0,0 +1,55 @@
+from sqlalchemy import Update, func, select, update
+from sqlalchemy.sql import ColumnElement, FromClause
+
+from app.models.posts import Post, HOT_SCORE_PERIOD
+
+
+# posts.like_count, posts.comment_count and comments.like_count are kept in
+# step with the likes, comments and comment_likes rows by the statements
+# that write those rows, a write returns the ids of the parents it changed
+# from a CTE and the counters are moved by the update built here, in the
+# same statement
+
+
+def hot_score(
+    like_count: ColumnElement, comment_count: ColumnElement
+) -> ColumnElement:
+    '''Post.hot_score for the given counters, see HOT_SCORE_PERIOD'''
+    engagement = func.greatest(like_count + 2 * comment_count, 1)
+    return (
+        func.log(engagement)
+        + func.extract('epoch', Post.created_at) / HOT_SCORE_PERIOD
+    )
+
+
+def count_changes(
+    changed: FromClause, key: str, model, counter: str, sign: int = 1
+) -> Update:
+    '''add (sign 1) or remove (sign -1) the rows of changed to the counter
+    of their parent in model, changed has one row per written row and its
+    key column is the parent id, the update returns the change of every
+    parent so their sum is the number of rows written'''
+    changes = (
+        select(changed.c[key].label('id'), func.count().label('rows'))
+        .group_by(changed.c[key])
+        .subquery('changes')
+    )
+    column = getattr(model, counter)
+    values: dict = {column: column + sign * changes.c.rows}
+
+    if model is Post:
+        like_count = Post.like_count
+        comment_count = Post.comment_count
+        if counter == 'like_count':
+            like_count = values[column]
+        else:
+            comment_count = values[column]
+        values[Post.hot_score] = hot_score(like_count, comment_count)
+
+    return (
+        update(model)
+        .where(model.id == changes.c.id)
+        .values(values)
+        .returning(changes.c.rows)
+        .execution_options(synchronize_session=False)
+    )
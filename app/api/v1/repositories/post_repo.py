@@ -1,24 +1,215 @@
 from uuid import UUID
+from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import select, and_, desc, func, or_
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy import (
+    Uuid,
+    Row,
+    Select,
+    select,
+    update,
+    delete,
+    and_,
+    desc,
+    func,
+    or_,
+    literal,
+    column,
+    values,
+    tuple_,
+    union_all,
+    true,
+)
+from sqlalchemy.dialects.postgresql import insert
 
 from app.models.users import User
 from app.models.users import follows
 from app.models.images import Image, PostImage
 from app.api.v1.schemas.posts import VisibilityEnum
 from app.models.posts import Post, Comment, Like, CommentLike
+from app.api.v1.repositories.records import (
+    PostRecord,
+    PostDetailRecord,
+    PostCommentRecord,
+    FeedCandidateRecord,
+    fetch_records,
+)
+from app.api.v1.repositories.sorting import (
+    sort_page,
+    post_sort_columns,
+    comment_sort_columns,
+)
+from app.api.v1.repositories.counters import count_changes
 
 
 class PostRepoV1:
+    # PostDetailRecord columns, the counters are read with the page instead
+    # of loading each post
+    post_columns: tuple = (
+        Post.id,
+        Post.title,
+        Post.content,
+        Post.visibility,
+        Post.created_at,
+        User.display_name,
+        User.username,
+        Post.like_count.label('likes'),
+        Post.comment_count.label('comments'),
+    )
+
+    # PostCommentRecord columns
+    comment_columns: tuple = (
+        Comment.id,
+        Comment.parent_id,
+        Comment.content,
+        Comment.created_at,
+        Comment.like_count.label('likes'),
+        Comment.reply_count,
+        User.display_name,
+        User.username,
+    )
+
+    @staticmethod
+    def visible_to(user_id: UUID) -> ColumnElement:
+        '''posts the user can read, their own posts, public posts and
+        followers only posts of followed users
+
+        a semi join on the followed users instead of an outer join, the
+        caller's filter stays the driving index scan'''
+        return or_(
+            Post.user_id == user_id,
+            Post.visibility == VisibilityEnum.PUBLIC,
+            and_(
+                Post.visibility == VisibilityEnum.FOLLOWERS,
+                Post.user_id.in_(
+                    select(follows.c.following_id).where(
+                        follows.c.follower_id == user_id
+                    )
+                ),
+            ),
+        )
+
+    @staticmethod
+    def feed_posts(user_id: UUID, top: int, since: datetime | None = None):
+        '''ids and creation times of the newest top posts in the user's feed,
+        the user's posts, followers only posts of followed users and public
+        posts of other users
+
+        each branch reads its newest top posts from an index in created_at
+        order (idx_post_user_created_at for the user and the followed users,
+        idx_post_public_created_at for public posts)'''
+        own = select(Post.id, Post.created_at).where(Post.user_id == user_id)
+
+        following = (
+            select(Post.id, Post.created_at)
+            .join(follows, Post.user_id == follows.c.following_id)
+            .where(
+                and_(
+                    follows.c.follower_id == user_id,
+                    Post.visibility == VisibilityEnum.FOLLOWERS,
+                )
+            )
+        )
+
+        # public posts of followed users are read here, the user's own
+        # public posts in the first branch
+        public = select(Post.id, Post.created_at).where(
+            and_(
+                Post.visibility == VisibilityEnum.PUBLIC,
+                Post.user_id != user_id,
+            )
+        )
+
+        branches: list = []
+        for branch in (own, following, public):
+            if since is not None:
+                branch = branch.where(Post.created_at >= since)
+            branch = branch.order_by(desc(Post.created_at)).limit(top)
+            branches.append(branch.subquery().select())
+        return union_all(*branches).subquery('feed')
+
+    @staticmethod
+    def feed_stmt(user_id: UUID, offset: int = 0, limit: int = 10) -> Select:
+        '''feed page newest first, only the merged page is joined to the
+        authors'''
+        feed = PostRepoV1.feed_posts(user_id, offset + limit)
+
+        stmt = (
+            select(*PostRepoV1.post_columns)
+            .select_from(feed)
+            .join(Post, Post.id == feed.c.id)
+            .join(User, Post.user_id == User.id)
+            .order_by(desc(feed.c.created_at))
+            .offset(offset)
+            .limit(limit)
+        )
+        return stmt
+
     @staticmethod
     def get_feed_posts(
         user_id: UUID,
         db: Session,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
-        '''select all user's posts and post made by other users
-        with public or followers'''
+    ) -> list[PostDetailRecord]:
+        stmt = PostRepoV1.feed_stmt(user_id, offset, limit)
+        feed_posts: list[PostDetailRecord] = fetch_records(stmt, PostDetailRecord, db)
+        return feed_posts
+
+    @staticmethod
+    def get_feed_candidates(
+        user_id: UUID, since: datetime, limit: int, db: Session
+    ) -> list[FeedCandidateRecord]:
+        '''the newest feed posts created since, with their like and comment
+        counters'''
+        feed = PostRepoV1.feed_posts(user_id, limit, since)
+
+        stmt = (
+            select(
+                feed.c.id,
+                Post.user_id,
+                feed.c.created_at,
+                Post.like_count,
+                Post.comment_count,
+            )
+            .select_from(feed)
+            .join(Post, Post.id == feed.c.id)
+            .order_by(desc(feed.c.created_at))
+            .limit(limit)
+        )
+        candidates: list[FeedCandidateRecord] = fetch_records(
+            stmt, FeedCandidateRecord, db
+        )
+        return candidates
+
+    @staticmethod
+    def get_author_affinity(
+        user_id: UUID, since: datetime, db: Session
+    ) -> dict[UUID, int]:
+        '''author id -> number of the user's likes and comments on the
+        author's posts since'''
+        liked = (
+            select(Post.user_id)
+            .join(Like, Like.post_id == Post.id)
+            .where(and_(Like.user_id == user_id, Like.liked_at >= since))
+        )
+        commented = (
+            select(Post.user_id)
+            .join(Comment, Comment.post_id == Post.id)
+            .where(and_(Comment.user_id == user_id, Comment.created_at >= since))
+        )
+        interactions = union_all(liked, commented).subquery('interactions')
+
+        stmt = select(interactions.c.user_id, func.count()).group_by(
+            interactions.c.user_id
+        )
+        affinity: dict[UUID, int] = dict(db.execute(stmt).tuples().all())
+        return affinity
+
+    @staticmethod
+    def get_post_records(
+        post_ids: list[UUID], db: Session, public: bool = False
+    ) -> list[PostRecord]:
         stmt = (
             select(
                 Post.id,
@@ -29,30 +220,54 @@ class PostRepoV1:
                 User.display_name,
                 User.username,
             )
-            .select_from(Post)
             .join(User, Post.user_id == User.id)
-            .outerjoin(
-                follows,
-                and_(
-                    Post.user_id == follows.c.following_id,
-                    user_id == follows.c.follower_id,
-                ),
-            )
-            .where(
-                or_(
-                    Post.user_id == user_id,
-                    Post.visibility == VisibilityEnum.PUBLIC,
-                    and_(
-                        Post.visibility == VisibilityEnum.FOLLOWERS,
-                        follows.c.follower_id.is_not(None),
-                    ),
-                )
-            )
+            .where(Post.id.in_(post_ids))
         )
+        if public:
+            stmt = stmt.where(Post.visibility == VisibilityEnum.PUBLIC)
+        posts: list[PostRecord] = fetch_records(stmt, PostRecord, db)
+        return posts
 
-        stmt = stmt.offset(offset).limit(limit)
-        feed_posts: list = db.execute(stmt).all()
-        return feed_posts
+    @staticmethod
+    def get_visible_posts(
+        user_id: UUID, post_ids: list[UUID], db: Session
+    ) -> list[PostDetailRecord]:
+        '''the posts of post_ids the user can read with their authors and
+        counters, in no particular order'''
+        stmt = (
+            select(*PostRepoV1.post_columns)
+            .join(User, Post.user_id == User.id)
+            .where(and_(Post.id.in_(post_ids), PostRepoV1.visible_to(user_id)))
+        )
+        posts: list[PostDetailRecord] = fetch_records(stmt, PostDetailRecord, db)
+        return posts
+
+    @staticmethod
+    def get_liked_post_ids(
+        user_id: UUID, post_ids: list[UUID], db: Session
+    ) -> set[UUID]:
+        '''the posts of post_ids the user likes, read from the likes
+        primary key'''
+        stmt = select(Like.post_id).where(
+            and_(Like.user_id == user_id, Like.post_id.in_(post_ids))
+        )
+        liked: set[UUID] = set(db.execute(stmt).scalars())
+        return liked
+
+    @staticmethod
+    def get_liked_comment_ids(
+        user_id: UUID, comment_ids: list[UUID], db: Session
+    ) -> set[UUID]:
+        '''the comments of comment_ids the user likes, read from the
+        comment_likes primary key'''
+        stmt = select(CommentLike.comment_id).where(
+            and_(
+                CommentLike.user_id == user_id,
+                CommentLike.comment_id.in_(comment_ids),
+            )
+        )
+        liked: set[UUID] = set(db.execute(stmt).scalars())
+        return liked
 
     @staticmethod
     def get_search_posts(
@@ -63,63 +278,36 @@ class PostRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
-        sortable_fields: dict = {'created_at': Post.created_at}
+        after: UUID | None = None,
+    ) -> list[PostDetailRecord]:
         query_vector = func.websearch_to_tsquery('english', q)
-        vector_rank = func.ts_rank(Post.content_search, query_vector).label(
-            'vector_rank'
-        )
+        vector_rank = func.ts_rank(Post.content_search, query_vector)
 
         # a combination of both pg_trgms and FTS is used to search for posts
         stmt = (
-            select(
-                Post.id,
-                Post.title,
-                Post.content,
-                Post.visibility,
-                Post.created_at,
-                User.display_name,
-                User.username,
-                vector_rank,
-            )
+            select(*PostRepoV1.post_columns)
             .join(User, Post.user_id == User.id)
-            .outerjoin(
-                follows,
-                and_(
-                    Post.user_id == follows.c.following_id,
-                    user_id == follows.c.follower_id,
-                ),
-            )
             .where(
                 and_(
                     or_(
                         Post.title.ilike(q),
                         Post.content_search.op('@@')(query_vector)
                     ),
-
-                    or_(
-                        Post.user_id == user_id,
-                        Post.visibility == VisibilityEnum.PUBLIC,
-
-                        and_(
-                            Post.visibility == VisibilityEnum.FOLLOWERS,
-                            follows.c.follower_id.is_not(None),
-                        ),
-                    ),
+                    PostRepoV1.visible_to(user_id),
                 )
-            ).order_by('vector_rank')
+            )
         )
 
-        if sort:
-            if order == 'desc':
-                stmt = stmt.order_by(
-                    desc(sortable_fields.get('created_at', Post.created_at))
-                )
-            else:
-                stmt = stmt.order_by(sortable_fields.get('created_at', Post.created_at))
-
-        stmt = stmt.offset(offset).limit(limit)
-        search_posts: list = db.execute(stmt).all()
+        sort_column = post_sort_columns.get(sort)
+        if sort_column is not None:
+            stmt = sort_page(
+                stmt, sort_column, Post.id, order == 'desc', after, offset, limit
+            )
+        else:
+            stmt = stmt.order_by(vector_rank).offset(offset).limit(limit)
+        search_posts: list[PostDetailRecord] = fetch_records(
+            stmt, PostDetailRecord, db
+        )
         return search_posts
 
     @staticmethod
@@ -128,17 +316,9 @@ class PostRepoV1:
         db: Session,
         offset: int = 0,
         limit: int = 10,
-    ) -> list[Post]:
+    ) -> list[PostDetailRecord]:
         stmt = (
-            select(
-                Post.id,
-                Post.title,
-                Post.content,
-                Post.visibility,
-                Post.created_at,
-                User.display_name,
-                User.username,
-            )
+            select(*PostRepoV1.post_columns)
             .select_from(Post)
             .join(User, Post.user_id == User.id)
             .join(
@@ -152,7 +332,9 @@ class PostRepoV1:
         )
 
         stmt = stmt.offset(offset).limit(limit)
-        following_posts: list[Post] = db.execute(stmt).all()
+        following_posts: list[PostDetailRecord] = fetch_records(
+            stmt, PostDetailRecord, db
+        )
         return following_posts
 
     @staticmethod
@@ -199,36 +381,54 @@ class PostRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
-        sortable_fields: list = ['created_at', 'likes']
+        after: UUID | None = None,
+    ) -> list[PostCommentRecord]:
+        '''top level comments of the post with their authors, read from
+        idx_comment_top_created_at or idx_comment_top_likes'''
         stmt = (
-            select(
-                Comment.id,
-                Comment.content,
-                Comment.created_at,
-                func.count(CommentLike.user_id).label('likes'),
-            )
-            .join(Post, Post.id == Comment.post_id)
-            .outerjoin(CommentLike, Comment.id == CommentLike.comment_id)
-            .where(Post.id == post_id)
-            .group_by(Comment.id)
-        )
-
-        if sort not in sortable_fields or sort == 'created_at':
-            if order == 'desc':
-                stmt = stmt.order_by(desc(Comment.created_at))
-            else:
-                stmt = stmt.order_by(Comment.created_at)
-        elif sort == 'likes':
-            if order == 'desc':
-                stmt = stmt.order_by(desc('likes'))
-            else:
-                stmt = stmt.order_by('likes')
+            select(*PostRepoV1.comment_columns)
+            .join(User, Comment.user_id == User.id)
+            .where(and_(Comment.post_id == post_id, Comment.parent_id.is_(None)))
+        )
 
-        stmt = stmt.offset(offset).limit(limit)
-        post_comments: list = db.execute(stmt).all()
+        sort_column = comment_sort_columns.get(sort, Comment.created_at)
+        stmt = sort_page(
+            stmt, sort_column, Comment.id, order == 'desc', after, offset, limit
+        )
+        post_comments: list[PostCommentRecord] = fetch_records(
+            stmt, PostCommentRecord, db
+        )
         return post_comments
 
+    @staticmethod
+    def get_comment_replies(
+        parent_ids: list[UUID], limit: int, db: Session
+    ) -> list[PostCommentRecord]:
+        '''the first limit replies of every parent oldest first, a lateral
+        join reads each parent's replies from idx_comment_parent_created_at
+        so a comment with many replies costs limit rows'''
+        parents = values(column('id', Uuid), name='parents').data(
+            [(parent_id,) for parent_id in parent_ids]
+        )
+        replies = (
+            select(*PostRepoV1.comment_columns)
+            .join(User, Comment.user_id == User.id)
+            .where(Comment.parent_id == parents.c.id)
+            .order_by(Comment.created_at, Comment.id)
+            .limit(limit)
+            .lateral('replies')
+        )
+        stmt = (
+            select(replies)
+            .select_from(parents)
+            .join(replies, true())
+            .order_by(replies.c.created_at, replies.c.id)
+        )
+        comment_replies: list[PostCommentRecord] = fetch_records(
+            stmt, PostCommentRecord, db
+        )
+        return comment_replies
+
     @staticmethod
     def get_post_image(image_url: UUID, post_id: UUID, db: Session) -> PostImage | None:
         stmt = (
@@ -239,52 +439,186 @@ class PostRepoV1:
         post_image: PostImage | None = db.execute(stmt).scalar()
         return post_image
 
+    # post and comment writes return the columns of the read models with
+    # RETURNING so the response is built without reading the row back
+
     @staticmethod
-    def add_post(post: Post, db: Session):
-        '''create and update post'''
-        db.add(post)
-        db.flush()
-        db.refresh(post)
+    def create_post(values: dict, db: Session) -> Row:
+        stmt = (
+            insert(Post)
+            .values(**values)
+            .returning(
+                Post.id, Post.title, Post.content, Post.visibility, Post.created_at
+            )
+        )
+        return db.execute(stmt).one()
+
+    @staticmethod
+    def update_post(
+        post_id: UUID, user_id: UUID, values: dict, db: Session
+    ) -> Row | None:
+        '''None if the post does not exist or is not the user's'''
+        stmt = (
+            update(Post)
+            .where(and_(Post.id == post_id, Post.user_id == user_id))
+            # an empty patch still returns the post
+            .values(**values or {'title': Post.title})
+            .returning(
+                Post.id,
+                Post.title,
+                Post.content,
+                Post.visibility,
+                Post.created_at,
+                Post.like_count.label('likes'),
+            )
+        )
+        return db.execute(stmt).one_or_none()
 
     @staticmethod
     def create_image(post: Post, image: Image, db: Session):
         post.images.append(image)
         db.flush()
-        db.refresh(image)
 
     @staticmethod
     def create_post_image(post_image: PostImage, db: Session):
         db.add(post_image)
         db.flush()
-        db.refresh(post_image)
+
+    # like writes are single statements, the primary key makes them
+    # idempotent and each returns whether a row changed, the rows written
+    # are counted into the parent's counter by the same statement
 
     @staticmethod
-    def like_post(like: Like, db: Session):
-        db.add(like)
-        db.flush()
-        db.refresh(like)
+    def like_post(user_id: UUID, post_id: UUID, db: Session) -> bool:
+        '''a missing post fails the post_id foreign key'''
+        inserted = (
+            insert(Like)
+            .values(user_id=user_id, post_id=post_id)
+            .on_conflict_do_nothing(index_elements=[Like.post_id, Like.user_id])
+            .returning(Like.post_id)
+            .cte('inserted')
+        )
+        stmt = count_changes(inserted, 'post_id', Post, 'like_count')
+        return db.execute(stmt).scalar() is not None
 
     @staticmethod
-    def like_comment(comment_like: CommentLike, db: Session):
-        db.add(comment_like)
-        db.flush()
-        db.refresh(comment_like)
+    def like_comment(
+        user_id: UUID, post_id: UUID, comment_id: UUID, db: Session
+    ) -> bool:
+        '''the comment is selected in the insert so it has to exist and
+        belong to the post'''
+        comment = select(literal(user_id), Comment.id).where(
+            and_(Comment.id == comment_id, Comment.post_id == post_id)
+        )
+        inserted = (
+            insert(CommentLike)
+            .from_select([CommentLike.user_id, CommentLike.comment_id], comment)
+            .on_conflict_do_nothing(
+                index_elements=[CommentLike.user_id, CommentLike.comment_id]
+            )
+            .returning(CommentLike.comment_id)
+            .cte('inserted')
+        )
+        stmt = count_changes(inserted, 'comment_id', Comment, 'like_count')
+        return db.execute(stmt).scalar() is not None
 
     @staticmethod
-    def create_comment(comment: Comment, db: Session):
-        db.add(comment)
-        db.flush()
-        db.refresh(comment)
+    def unlike_post(user_id: UUID, post_id: UUID, db: Session) -> bool:
+        deleted = (
+            delete(Like)
+            .where(and_(Like.user_id == user_id, Like.post_id == post_id))
+            .returning(Like.post_id)
+            .cte('deleted')
+        )
+        stmt = count_changes(deleted, 'post_id', Post, 'like_count', -1)
+        return db.execute(stmt).scalar() is not None
 
     @staticmethod
-    def unlike_post(post: Post, like: Like, db: Session):
-        post.likes.remove(like)
-        db.flush()
+    def unlike_comment(
+        user_id: UUID, post_id: UUID, comment_id: UUID, db: Session
+    ) -> bool:
+        post_comments = select(Comment.id).where(
+            and_(Comment.id == comment_id, Comment.post_id == post_id)
+        )
+        deleted = (
+            delete(CommentLike)
+            .where(
+                and_(
+                    CommentLike.user_id == user_id,
+                    CommentLike.comment_id.in_(post_comments),
+                )
+            )
+            .returning(CommentLike.comment_id)
+            .cte('deleted')
+        )
+        stmt = count_changes(deleted, 'comment_id', Comment, 'like_count', -1)
+        return db.execute(stmt).scalar() is not None
+
+    # bulk writes used by the like buffer flush
 
     @staticmethod
-    def unlike_comment(comment: Comment, comment_like: CommentLike, db: Session):
-        comment.comment_likes.remove(comment_like)
-        db.flush()
+    def insert_likes(keys: list[tuple[UUID, UUID]], db: Session) -> int:
+        '''insert (user_id, post_id) pairs, pairs whose post or user no
+        longer exists are skipped instead of failing the batch'''
+        likes = values(
+            column('user_id', Uuid), column('post_id', Uuid), name='buffered_likes'
+        ).data(keys)
+        rows = (
+            select(likes.c.user_id, likes.c.post_id)
+            .join(Post, Post.id == likes.c.post_id)
+            .join(User, User.id == likes.c.user_id)
+        )
+        inserted = (
+            insert(Like)
+            .from_select([Like.user_id, Like.post_id], rows)
+            .on_conflict_do_nothing(index_elements=[Like.post_id, Like.user_id])
+            .returning(Like.post_id)
+            .cte('inserted')
+        )
+        stmt = count_changes(inserted, 'post_id', Post, 'like_count')
+        return sum(db.execute(stmt).scalars())
+
+    @staticmethod
+    def delete_likes(keys: list[tuple[UUID, UUID]], db: Session) -> int:
+        deleted = (
+            delete(Like)
+            .where(tuple_(Like.user_id, Like.post_id).in_(keys))
+            .returning(Like.post_id)
+            .cte('deleted')
+        )
+        stmt = count_changes(deleted, 'post_id', Post, 'like_count', -1)
+        return sum(db.execute(stmt).scalars())
+
+    @staticmethod
+    def post_exists(post_id: UUID, db: Session) -> bool:
+        stmt = select(select(Post.id).where(Post.id == post_id).exists())
+        return db.execute(stmt).scalar()
+
+    @staticmethod
+    def create_comment(values: dict, db: Session) -> Row:
+        '''a missing post or parent fails their foreign keys, a reply is
+        counted in the post's comments and in the parent's replies'''
+        inserted = (
+            insert(Comment)
+            .values(**values)
+            .returning(
+                Comment.id,
+                Comment.post_id,
+                Comment.parent_id,
+                Comment.content,
+                Comment.created_at,
+            )
+            .cte('inserted')
+        )
+        comments = count_changes(inserted, 'post_id', Post, 'comment_count')
+        replies = count_changes(inserted, 'parent_id', Comment, 'reply_count')
+        stmt = select(
+            inserted.c.id,
+            inserted.c.parent_id,
+            inserted.c.content,
+            inserted.c.created_at,
+        ).add_cte(comments.cte('post_counts'), replies.cte('reply_counts'))
+        return db.execute(stmt).one()
 
     @staticmethod
     def delete_post(post: Post, db: Session):
@@ -298,8 +632,39 @@ class PostRepoV1:
 
     @staticmethod
     def delete_comment(comment: Comment, db: Session):
-        db.delete(comment)
-        db.flush()
+        PostRepoV1.delete_comments(Comment.id == comment.id, db)
+
+    @staticmethod
+    def delete_comments(
+        condition: ColumnElement, db: Session, limit: int | None = None
+    ) -> int:
+        '''delete the comments matching condition (at most limit) with their
+        replies, the replies are deleted by this statement rather than the
+        parent_id foreign key so every deleted comment is counted, likes
+        are deleted by the comment_id foreign key'''
+        roots = select(Comment.id).where(condition).limit(limit)
+        thread = roots.cte('thread', recursive=True)
+        thread = thread.union_all(
+            select(Comment.id).where(Comment.parent_id == thread.c.id)
+        )
+
+        deleted = (
+            delete(Comment)
+            .where(Comment.id.in_(select(thread.c.id)))
+            .returning(Comment.id, Comment.post_id, Comment.parent_id)
+            .cte('deleted')
+        )
+        # only the parents that are not deleted lose a reply
+        detached = (
+            select(deleted.c.parent_id)
+            .where(deleted.c.parent_id.not_in(select(deleted.c.id)))
+            .subquery('detached')
+        )
+        replies = count_changes(detached, 'parent_id', Comment, 'reply_count', -1)
+        stmt = count_changes(deleted, 'post_id', Post, 'comment_count', -1).add_cte(
+            replies.cte('reply_counts')
+        )
+        return sum(db.execute(stmt).scalars())
 
 
 post_repo_v1 = PostRepoV1()
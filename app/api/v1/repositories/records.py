@@ -0,0 +1,94 @@
+from uuid import UUID
+from datetime import date, datetime
+from typing import NamedTuple, TypeVar
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.api.v1.schemas.posts import VisibilityEnum
+
+
+# Listing queries select only the columns a page needs and return them as
+# named tuples, no ORM entities are loaded so nothing is added to the
+# session identity map and each row is a single tuple allocation
+
+
+class PostRecord(NamedTuple):
+    id: UUID
+    title: str
+    content: str
+    visibility: VisibilityEnum
+    created_at: datetime
+    display_name: str
+    username: str
+
+
+class PostDetailRecord(NamedTuple):
+    id: UUID
+    title: str
+    content: str
+    visibility: VisibilityEnum
+    created_at: datetime
+    display_name: str
+    username: str
+    likes: int
+    comments: int
+
+
+class FeedCandidateRecord(NamedTuple):
+    id: UUID
+    user_id: UUID
+    created_at: datetime
+    likes: int
+    comments: int
+
+
+class CommentRecord(NamedTuple):
+    id: UUID
+    content: str
+    created_at: datetime
+    likes: int
+    display_name: str
+    username: str
+
+
+class PostCommentRecord(NamedTuple):
+    id: UUID
+    parent_id: UUID | None
+    content: str
+    created_at: datetime
+    likes: int
+    reply_count: int
+    display_name: str
+    username: str
+
+
+class UserRecord(NamedTuple):
+    id: UUID
+    display_name: str
+    username: str
+    email: str
+    dob: date
+    nationality: str
+    bio: str
+    created_at: datetime
+
+
+class UserSuggestionRecord(NamedTuple):
+    id: UUID
+    display_name: str
+    username: str
+    email: str
+    dob: date
+    nationality: str
+    bio: str
+    created_at: datetime
+    mutuals: int
+
+
+R = TypeVar('R', bound=tuple)
+
+
+def fetch_records(stmt: Select, record: type[R], db: Session) -> list[R]:
+    '''execute a column select whose columns are in the record field order'''
+    make = record._make
+    return [make(row) for row in db.execute(stmt)]
@@ -0,0 +1,53 @@
+from uuid import UUID
+from sqlalchemy import select, tuple_
+from sqlalchemy.sql import ColumnElement, Select
+
+from app.models.posts import Post, Comment
+
+
+# sorted listings order by the sort column and then the row id in the same
+# direction, (column, id) is unique so a page can continue after the last
+# row of the previous one, the engagement sorts are read from the counter
+# columns and their (parent, counter desc, id desc) indexes so a page is an
+# index scan of limit rows instead of a count of every like
+
+
+# sort parameter -> column
+post_sort_columns: dict = {
+    'created_at': Post.created_at,
+    'likes': Post.like_count,
+    'comments': Post.comment_count,
+    'hot': Post.hot_score,
+}
+comment_sort_columns: dict = {
+    'created_at': Comment.created_at,
+    'likes': Comment.like_count,
+}
+
+
+def sort_page(
+    stmt: Select,
+    sort_column: ColumnElement,
+    id_column: ColumnElement,
+    descending: bool = False,
+    after: UUID | None = None,
+    offset: int = 0,
+    limit: int = 10,
+) -> Select:
+    '''the page of stmt sorted by sort_column, after is the id of the last
+    row of the previous page, rows are compared with its current values'''
+    if after is not None:
+        cursor = (
+            select(sort_column, id_column)
+            .where(id_column == after)
+            .correlate(None)
+            .scalar_subquery()
+        )
+        key = tuple_(sort_column, id_column)
+        stmt = stmt.where(key < cursor if descending else key > cursor)
+
+    if descending:
+        stmt = stmt.order_by(sort_column.desc(), id_column.desc())
+    else:
+        stmt = stmt.order_by(sort_column, id_column)
+    return stmt.offset(offset).limit(limit)
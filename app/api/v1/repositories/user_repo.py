@@ -1,13 +1,53 @@
 from uuid import UUID
-from typing import Any
+from typing import Any, Iterator
 from sqlalchemy.orm import Session
-from datetime import datetime, timezone
-from sqlalchemy import select, delete, and_, func, desc, or_
-
-from app.models.users import User, Role
-from app.models.images import Image, ProfileImage
+from datetime import datetime
+from sqlalchemy.sql import ColumnElement
+from sqlalchemy import (
+    Table,
+    Row,
+    select,
+    update,
+    delete,
+    and_,
+    func,
+    desc,
+    or_,
+    literal,
+    bindparam,
+    tuple_,
+    Uuid,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from app.models.auth import RefreshToken
+from app.models.users import User, Role, FollowSuggestion, follows
 from app.api.v1.schemas.posts import VisibilityEnum
-from app.models.posts import Post, Like, Comment
+from app.models.images import Image, ProfileImage, PostImage
+from app.models.posts import Post, Like, Comment, CommentLike
+from app.api.v1.repositories.records import (
+    PostDetailRecord,
+    UserRecord,
+    CommentRecord,
+    UserSuggestionRecord,
+    fetch_records,
+)
+from app.api.v1.repositories.sorting import sort_page, post_sort_columns
+from app.api.v1.repositories.counters import count_changes
+from app.api.v1.repositories.post_repo import post_repo_v1
+
+
+# UserReadV1 columns in UserRecord order
+user_read_columns: tuple = (
+    User.id,
+    User.display_name,
+    User.username,
+    User.email,
+    User.dob,
+    User.nationality,
+    User.bio,
+    User.created_at,
+)
 
 
 class UserRepoV1:
@@ -20,7 +60,7 @@ class UserRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list[User]:
+    ) -> list[UserRecord]:
         '''get users with filtering, sorting and pagination'''
 
         # the possible fields to sort by
@@ -31,7 +71,7 @@ class UserRepoV1:
             'nationality': User.nationality,
             'display_name': User.display_name,
         }
-        stmt = select(User)
+        stmt = select(*user_read_columns)
 
         stmt = stmt.where(
             and_(
@@ -51,7 +91,7 @@ class UserRepoV1:
                 stmt = stmt.order_by(sortable_fields.get(sort, User.created_at))
 
         stmt = stmt.offset(offset).limit(limit)
-        users = db.execute(stmt).scalars().all()
+        users: list[UserRecord] = fetch_records(stmt, UserRecord, db)
 
         return users
 
@@ -64,7 +104,7 @@ class UserRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list[User]:
+    ) -> list[UserRecord]:
         '''get users with filtering, sorting and pagination'''
 
         # the possible fields to sort by
@@ -75,7 +115,7 @@ class UserRepoV1:
             'nationality': User.nationality,
             'display_name': User.display_name,
         }
-        stmt = select(User)
+        stmt = select(*user_read_columns)
 
         # pg_trgms is used to search for users
         stmt = stmt.where(
@@ -96,10 +136,100 @@ class UserRepoV1:
                 stmt = stmt.order_by(sortable_fields.get(sort, User.created_at))
 
         stmt = stmt.offset(offset).limit(limit)
-        users = db.execute(stmt).scalars().all()
+        users: list[UserRecord] = fetch_records(stmt, UserRecord, db)
 
         return users
 
+    @staticmethod
+    def get_follow_suggestions(
+        user_id: UUID,
+        db: Session,
+        offset: int = 0,
+        limit: int = 10,
+    ) -> list[UserSuggestionRecord]:
+        '''precomputed suggestions, most mutuals first, users followed or
+        deactivated since the suggestions were computed are skipped'''
+        followed = (
+            select(follows.c.following_id)
+            .where(
+                and_(
+                    follows.c.follower_id == user_id,
+                    follows.c.following_id == FollowSuggestion.suggested_id,
+                )
+            )
+            .exists()
+        )
+        stmt = (
+            select(*user_read_columns, FollowSuggestion.mutuals)
+            .join(User, FollowSuggestion.suggested_id == User.id)
+            .where(
+                and_(
+                    FollowSuggestion.user_id == user_id,
+                    User.is_delete.is_(False),
+                    User.is_suspended.is_(False),
+                    ~followed,
+                )
+            )
+            .order_by(desc(FollowSuggestion.mutuals), FollowSuggestion.suggested_id)
+            .offset(offset)
+            .limit(limit)
+        )
+        suggestions: list[UserSuggestionRecord] = fetch_records(
+            stmt, UserSuggestionRecord, db
+        )
+        return suggestions
+
+    @staticmethod
+    def get_graph_user_ids(db: Session) -> list[UUID]:
+        '''active users, the position of a user is their number in the
+        follow graph'''
+        stmt = (
+            select(User.id)
+            .where(and_(User.is_delete.is_(False), User.is_suspended.is_(False)))
+            .order_by(User.id)
+        )
+        user_ids: list[UUID] = db.execute(stmt).scalars().all()
+        return user_ids
+
+    @staticmethod
+    def stream_follow_edges(
+        user_ids: list[UUID], db: Session, chunk_size: int
+    ) -> Iterator[list[Row]]:
+        '''(follower, following) positions in user_ids of the follows between
+        those users ordered by follower, in chunks of chunk_size rows
+
+        the ids are sent as one array so the numbering matches user_ids
+        even if users change while the edges are read'''
+        numbered = (
+            func.unnest(bindparam('user_ids', user_ids, type_=ARRAY(Uuid)))
+            .table_valued('id', with_ordinality='number')
+            .render_derived()
+        )
+        graph_users = select(
+            numbered.c.id, (numbered.c.number - 1).label('number')
+        ).cte('graph_users')
+        follower = graph_users.alias('follower')
+        following = graph_users.alias('following')
+
+        stmt = (
+            select(follower.c.number, following.c.number)
+            .select_from(follows)
+            .join(follower, follower.c.id == follows.c.follower_id)
+            .join(following, following.c.id == follows.c.following_id)
+            .order_by(follower.c.number)
+        )
+        result = db.execute(stmt, execution_options={'yield_per': chunk_size})
+        yield from result.partitions()
+
+    @staticmethod
+    def replace_follow_suggestions(
+        user_ids: list[UUID], suggestions: list[dict], db: Session
+    ):
+        stmt = delete(FollowSuggestion).where(FollowSuggestion.user_id.in_(user_ids))
+        db.execute(stmt)
+        if suggestions:
+            db.execute(insert(FollowSuggestion), suggestions)
+
     @staticmethod
     def get_followers(user: User) -> list[User] | None:
         return user.followers
@@ -164,34 +294,22 @@ class UserRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
-        '''select current user's posts and handle sorting by likes and comments'''
+        after: UUID | None = None,
+    ) -> list[PostDetailRecord]:
+        '''select current user's posts sorted by creation time, likes,
+        comments or hot score, each sort reads its idx_post_user_* index'''
 
-        sortable_fields: dict = {'created_at': Post.created_at}
         stmt = (
-            select(
-                Post.id,
-                Post.title,
-                Post.content,
-                Post.visibility,
-                Post.created_at,
-                User.display_name,
-                User.username,
-            )
+            select(*post_repo_v1.post_columns)
             .join(User, Post.user_id == User.id)
             .where(User.id == user_id)
         )
 
-        if sort:
-            if order == 'desc':
-                stmt = stmt.order_by(
-                    desc(sortable_fields.get('created_at', Post.created_at))
-                )
-            else:
-                stmt = stmt.order_by(sortable_fields.get('created_at', Post.created_at))
-
-        stmt = stmt.offset(offset).limit(limit)
-        user_posts: list = db.execute(stmt).all()
+        sort_column = post_sort_columns.get(sort, Post.created_at)
+        stmt = sort_page(
+            stmt, sort_column, Post.id, order == 'desc', after, offset, limit
+        )
+        user_posts: list[PostDetailRecord] = fetch_records(stmt, PostDetailRecord, db)
         return user_posts
 
     @staticmethod
@@ -204,24 +322,16 @@ class UserRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
+        after: UUID | None = None,
+    ) -> list[PostDetailRecord]:
         '''since the request is to get another user's posts
         an additional check is required to only get posts
         whose visibility is set to followers if the current
         user is follwer in addition to public posts'''
 
-        sortable_fields: dict = {'created_at': Post.created_at}
         if current_user in user.followers:
             stmt = (
-                select(
-                    Post.id,
-                    Post.title,
-                    Post.content,
-                    Post.visibility,
-                    Post.created_at,
-                    User.display_name,
-                    User.username,
-                )
+                select(*post_repo_v1.post_columns)
                 .join(User, Post.user_id == User.id)
                 .where(
                     and_(
@@ -235,15 +345,7 @@ class UserRepoV1:
             )
         else:
             stmt = (
-                select(
-                    Post.id,
-                    Post.title,
-                    Post.content,
-                    Post.visibility,
-                    Post.created_at,
-                    User.display_name,
-                    User.username,
-                )
+                select(*post_repo_v1.post_columns)
                 .join(User, Post.user_id == User.id)
                 .where(
                     and_(
@@ -256,16 +358,11 @@ class UserRepoV1:
                 )
             )
 
-        if sort:
-            if order == 'desc':
-                stmt = stmt.order_by(
-                    desc(sortable_fields.get('created_at', Post.created_at))
-                )
-            else:
-                stmt = stmt.order_by(sortable_fields.get('created_at', Post.created_at))
-
-        stmt = stmt.offset(offset).limit(limit)
-        user_posts: list = db.execute(stmt).all()
+        sort_column = post_sort_columns.get(sort, Post.created_at)
+        stmt = sort_page(
+            stmt, sort_column, Post.id, order == 'desc', after, offset, limit
+        )
+        user_posts: list[PostDetailRecord] = fetch_records(stmt, PostDetailRecord, db)
         return user_posts
 
     @staticmethod
@@ -276,14 +373,15 @@ class UserRepoV1:
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
+    ) -> list[CommentRecord]:
         sortable_fields: dict = {'created_at': Comment.created_at}
         stmt = select(
             Comment.id,
             Comment.content,
+            Comment.created_at,
+            Comment.like_count.label('likes'),
             User.display_name,
             User.username,
-            Comment.created_at,
         ).join(User, Comment.user_id == User.id).where(User.id == user_id)
 
         if sort:
@@ -298,7 +396,7 @@ class UserRepoV1:
 
         stmt = stmt.offset(offset).limit(limit)
 
-        comments: list = db.execute(stmt).all()
+        comments: list[CommentRecord] = fetch_records(stmt, CommentRecord, db)
         return comments
 
     @staticmethod
@@ -307,17 +405,9 @@ class UserRepoV1:
         db: Session,
         offset: int = 0,
         limit: int = 10,
-    ) -> list:
+    ) -> list[PostDetailRecord]:
         stmt = (
-            select(
-                User.display_name,
-                User.username,
-                Post.id,
-                Post.title,
-                Post.content,
-                Post.visibility,
-                Post.created_at,
-            )
+            select(*post_repo_v1.post_columns)
             .select_from(User)
             .join(Like, Like.user_id == User.id)
             .join(Post, Post.id == Like.post_id)
@@ -326,7 +416,7 @@ class UserRepoV1:
             .limit(limit)
         )
 
-        liked_posts: list = db.execute(stmt).all()
+        liked_posts: list[PostDetailRecord] = fetch_records(stmt, PostDetailRecord, db)
         return liked_posts
 
     @staticmethod
@@ -364,37 +454,85 @@ class UserRepoV1:
     def add_user(user: User, db: Session):
         db.add(user)
         db.flush()
-        db.refresh(user)
+
+    # sign up and profile updates return the UserReadV1 columns with
+    # RETURNING so the response is built without reading the row back
 
     @staticmethod
-    def follow_user(current_user: User, user: User, db: Session):
-        current_user.following.append(user)
-        db.flush()
-        db.refresh(user)
+    def create_user(values: dict, db: Session) -> Row:
+        stmt = insert(User).values(**values).returning(*user_read_columns)
+        return db.execute(stmt).one()
+
+    @staticmethod
+    def update_user(user_id: UUID, values: dict, db: Session) -> Row:
+        '''the loaded user is synchronized with the new values'''
+        stmt = (
+            update(User)
+            .where(User.id == user_id)
+            .values(**values or {'bio': User.bio})
+            .returning(*user_read_columns)
+        )
+        return db.execute(stmt).one()
 
     @staticmethod
     def create_image(user: User, image: Image, db: Session):
         user.images.append(image)
         db.flush()
-        db.refresh(user)
 
     @staticmethod
     def create_profile_image(image: ProfileImage, db: Session):
         db.add(image)
         db.flush()
-        db.refresh(image)
 
     @staticmethod
     def create_role(role: Role, db: Session):
         db.add(role)
         db.flush()
-        db.refresh(role)
+
+    # follow writes are single statements keyed on the follows primary key,
+    # each returns whether a row changed
 
     @staticmethod
-    def unfollow_user(current_user: User, user: User, db: Session):
-        current_user.following.remove(user)
-        db.flush()
-        db.refresh(user)
+    def follow_user(current_user_id: UUID, username: str, db: Session) -> bool:
+        '''False if already following or no active user has the username'''
+        user = select(literal(current_user_id), User.id).where(
+            and_(
+                User.username == username,
+                User.is_delete.is_(False),
+                User.is_suspended.is_(False),
+            )
+        )
+        stmt = (
+            insert(follows)
+            .from_select([follows.c.follower_id, follows.c.following_id], user)
+            .on_conflict_do_nothing(
+                index_elements=[follows.c.following_id, follows.c.follower_id]
+            )
+            .returning(follows.c.following_id)
+        )
+        return db.execute(stmt).scalar() is not None
+
+    @staticmethod
+    def unfollow_user(current_user_id: UUID, username: str, db: Session) -> bool:
+        '''False if not following or no active user has the username'''
+        user = select(User.id).where(
+            and_(
+                User.username == username,
+                User.is_delete.is_(False),
+                User.is_suspended.is_(False),
+            )
+        )
+        stmt = (
+            delete(follows)
+            .where(
+                and_(
+                    follows.c.follower_id == current_user_id,
+                    follows.c.following_id.in_(user),
+                )
+            )
+            .returning(follows.c.following_id)
+        )
+        return db.execute(stmt).scalar() is not None
 
     @staticmethod
     def delete_user_account(user: User, db: Session):
@@ -407,14 +545,139 @@ class UserRepoV1:
         db.flush()
 
     @staticmethod
-    def delete_user(db: Session):
-        '''delete user accounts from database after 30 days of deactivating'''
+    def get_purgeable_user_ids(
+        now: datetime, db: Session, limit: int = 100
+    ) -> list[UUID]:
+        '''users whose 30 days after deactivating have passed'''
         stmt = (
-            delete(User)
-            .where(datetime.now(timezone.utc) >= User.delete_at)
-            .execution_options(synchronize_session='fetch')
+            select(User.id)
+            .where(User.delete_at <= now)
+            .order_by(User.id)
+            .limit(limit)
         )
-        db.execute(stmt)
+        user_ids: list[UUID] = db.execute(stmt).scalars().all()
+        return user_ids
+
+    @staticmethod
+    def get_purge_images(user_ids: list[UUID], db: Session) -> tuple[list, list]:
+        '''(image id, image url) of the users' profile and post images'''
+        profile_stmt = (
+            select(Image.id, Image.image_url)
+            .join(ProfileImage, ProfileImage.image_id == Image.id)
+            .where(ProfileImage.user_id.in_(user_ids))
+        )
+        post_stmt = (
+            select(Image.id, Image.image_url)
+            .join(PostImage, PostImage.image_id == Image.id)
+            .join(Post, Post.id == PostImage.post_id)
+            .where(Post.user_id.in_(user_ids))
+        )
+        return db.execute(profile_stmt).all(), db.execute(post_stmt).all()
+
+    @staticmethod
+    def get_purge_conditions(
+        user_ids: list[UUID],
+    ) -> list[tuple[Table, ColumnElement, tuple | None]]:
+        '''rows owned by the users in the order they are deleted, children
+        first so deleting a parent never cascades into a large delete, with
+        the (key, model, counter) the deleted rows are counted in'''
+        posts = select(Post.id).where(Post.user_id.in_(user_ids))
+        comments = select(Comment.id).where(
+            or_(Comment.user_id.in_(user_ids), Comment.post_id.in_(posts))
+        )
+        return [
+            (
+                CommentLike.__table__,
+                or_(
+                    CommentLike.user_id.in_(user_ids),
+                    CommentLike.comment_id.in_(comments),
+                ),
+                ('comment_id', Comment, 'like_count'),
+            ),
+            (
+                Like.__table__,
+                or_(Like.user_id.in_(user_ids), Like.post_id.in_(posts)),
+                ('post_id', Post, 'like_count'),
+            ),
+            (
+                Comment.__table__,
+                or_(Comment.user_id.in_(user_ids), Comment.post_id.in_(posts)),
+                None,
+            ),
+            (PostImage.__table__, PostImage.post_id.in_(posts), None),
+            (Post.__table__, Post.user_id.in_(user_ids), None),
+            (
+                follows,
+                or_(
+                    follows.c.follower_id.in_(user_ids),
+                    follows.c.following_id.in_(user_ids),
+                ),
+                None,
+            ),
+            (
+                FollowSuggestion.__table__,
+                or_(
+                    FollowSuggestion.user_id.in_(user_ids),
+                    FollowSuggestion.suggested_id.in_(user_ids),
+                ),
+                None,
+            ),
+            (ProfileImage.__table__, ProfileImage.user_id.in_(user_ids), None),
+            (RefreshToken.__table__, RefreshToken.user_id.in_(user_ids), None),
+            (User.__table__, User.id.in_(user_ids), None),
+        ]
+
+    @staticmethod
+    def delete_orphan_images(image_ids: list[UUID], db: Session) -> list[str]:
+        '''images are shared by filename between uploads, only the ones no
+        profile or post references anymore are deleted, returns their urls'''
+        stmt = (
+            delete(Image)
+            .where(
+                and_(
+                    Image.id.in_(image_ids),
+                    ~select(ProfileImage.id)
+                    .where(ProfileImage.image_id == Image.id)
+                    .exists(),
+                    ~select(PostImage.id).where(PostImage.image_id == Image.id).exists(),
+                )
+            )
+            .returning(Image.image_url)
+            .execution_options(synchronize_session=False)
+        )
+        image_urls: list[str] = db.execute(stmt).scalars().all()
+        return image_urls
 
+    @staticmethod
+    def delete_rows(
+        table: Table,
+        condition: ColumnElement,
+        db: Session,
+        limit: int = 5000,
+        counter: tuple | None = None,
+    ) -> int:
+        '''delete at most limit rows matching condition, rows are picked by
+        primary key, counter is the (key, model, counter) the rows are
+        removed from
+
+        a ctid is only unique within one partition, so on the partitioned
+        refresh_tokens it would match rows of other users in the other
+        partitions, the condition is also kept in the outer delete'''
+        if table is Comment.__table__:
+            # comments are deleted with their replies and counted
+            return post_repo_v1.delete_comments(condition, db, limit)
+
+        key_columns: list = list(table.primary_key.columns)
+        chunk = select(*key_columns).where(condition).limit(limit)
+        stmt = delete(table).where(condition, tuple_(*key_columns).in_(chunk))
+        if counter is None:
+            return db.execute(stmt).rowcount
+
+        key, model, column = counter
+        # children are deleted before their parents so every parent is
+        # still there to be counted
+        deleted = stmt.returning(table.c[key]).cte('deleted')
+        stmt = count_changes(deleted, key, model, column, -1)
+        return sum(db.execute(stmt).scalars())
 
 user_repo_v1 = UserRepoV1()
@@ -1,9 +1,9 @@
 from sqlalchemy.orm import Session
-from fastapi.requests import Request
 from fastapi import APIRouter, Depends
 
 
 from app.models.users import User
+from app.core.responses import ModelJSONResponse
 from app.dependencies import get_db, required_roles
 from app.api.v1.services.admin_service import admin_service_v1
 from app.api.v1.schemas.admin import UserCountV1, UserCountResponse
@@ -20,16 +20,16 @@ admin_router_v1 = APIRouter()
     description='Get suspended users'
 )
 async def get_suspended_users(
-    request: Request,
     admin_user: User = Depends(required_roles([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     users: list[UserReadV1] = admin_service_v1.get_suspended_users(
-        admin_user, refresh_token, db
+        admin_user, db
     )
-    return UserResponseV1(
-        message='Total suspended users retrieved successfully', data=users
+    return ModelJSONResponse(
+        UserResponseV1(
+            message='Total suspended users retrieved successfully', data=users
+        ),
     )
 
 
@@ -40,16 +40,16 @@ async def get_suspended_users(
     description='Get total active users'
 )
 async def get_total_active_users(
-    request: Request,
     admin_user: User = Depends(required_roles([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     users: UserCountV1 = admin_service_v1.get_all_active_users(
-        admin_user, refresh_token, db
+        admin_user, db
     )
-    return UserCountResponse(
-        message='Total active users retrieved successfully', data=users
+    return ModelJSONResponse(
+        UserCountResponse(
+            message='Total active users retrieved successfully', data=users
+        ),
     )
 
 
@@ -60,17 +60,17 @@ async def get_total_active_users(
     description='Assign admin role to users'
 )
 async def assign_admin(
-    request: Request,
     username: str,
     admin_user: User = Depends(required_roles([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     user: UserReadV1 = admin_service_v1.assign_admin_role(
-        admin_user, username, refresh_token, db
+        admin_user, username, db
     )
-    return UserResponseV1(
-        message='User role updated successfully', data=user
+    return ModelJSONResponse(
+        UserResponseV1(
+            message='User role updated successfully', data=user
+        ),
     )
 
 
@@ -81,17 +81,17 @@ async def assign_admin(
     description='Suspend users'
 )
 async def suspend_user(
-    request: Request,
     username: str,
     admin_user: User = Depends(required_roles([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     user: UserReadV1 = admin_service_v1.suspend_user(
-        admin_user, username, refresh_token, db
+        admin_user, username, db
     )
-    return UserResponseV1(
-        message='User suspended successfully', data=user
+    return ModelJSONResponse(
+        UserResponseV1(
+            message='User suspended successfully', data=user
+        ),
     )
 
 
@@ -102,15 +102,15 @@ async def suspend_user(
     description='Unsuspend users'
 )
 async def unsuspend_user(
-    request: Request,
     username: str,
     admin_user: User = Depends(required_roles([UserRole.ADMIN])),
     db: Session = Depends(get_db)
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     user: UserReadV1 = admin_service_v1.unsuspend_user(
-        admin_user, username, refresh_token, db
+        admin_user, username, db
     )
-    return UserResponseV1(
-        message='User unsuspended successfully', data=user
+    return ModelJSONResponse(
+        UserResponseV1(
+            message='User unsuspended successfully', data=user
+        ),
     )
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, Form
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app.models.users import User
+from app.core.responses import ModelJSONResponse
 from app.core.config import settings
 from app.dependencies import get_db, get_current_user
 from app.api.v1.schemas.auth import TokenV1, BaseResponseV1
@@ -23,7 +24,10 @@ auth_router_v1 = APIRouter()
 )
 async def sign_up(user_create: UserCreateV1, db: Session = Depends(get_db)):
     user = auth_service_v1.sign_up(user_create, db)
-    return UserResponseV1(message='User created successfully', data=user)
+    return ModelJSONResponse(
+        UserResponseV1(message='User created successfully', data=user),
+        status_code=201,
+    )
 
 
 @auth_router_v1.post(
@@ -88,7 +92,7 @@ async def sign_out(
 ):
     refresh_token = request.cookies.get('refresh_token')
     auth_service_v1.sign_out(refresh_token, db)
-    return BaseResponseV1(message='Sign out succesful')
+    return ModelJSONResponse(BaseResponseV1(message='Sign out succesful'))
 
 
 @auth_router_v1.patch(
@@ -108,7 +112,9 @@ async def update_password(
     user = auth_service_v1.update_password(
         refresh_token, curr_password, new_password, user, db
     )
-    return UserResponseV1(message='Password updated successfully', data=user)
+    return ModelJSONResponse(
+        UserResponseV1(message='Password updated successfully', data=user),
+    )
 
 
 @auth_router_v1.patch(
@@ -123,7 +129,9 @@ async def reset_password(
     db: Session = Depends(get_db),
 ):
     user = auth_service_v1.reset_password(email, new_password, db)
-    return UserResponseV1(message='Password reset successful', data=user)
+    return ModelJSONResponse(
+        UserResponseV1(message='Password reset successful', data=user),
+    )
 
 
 @auth_router_v1.patch(
@@ -138,7 +146,9 @@ async def reactivate_account(
     db: Session = Depends(get_db),
 ):
     user = auth_service_v1.reactivate_account(email, account_password, db)
-    return UserResponseV1(message='User account reactivated successfully', data=user)
+    return ModelJSONResponse(
+        UserResponseV1(message='User account reactivated successfully', data=user),
+    )
 
 
 @auth_router_v1.patch(
@@ -152,7 +162,9 @@ async def deactivate_account(
 ):
     refresh_token = request.cookies.get('refresh_token')
     auth_service_v1.deactivate_account(refresh_token, password, user, db)
-    return UserResponseV1(message='User account deactivated successfully')
+    return ModelJSONResponse(
+        UserResponseV1(message='User account deactivated successfully'),
+    )
 
 
 @auth_router_v1.delete('/auth/account/delete/', status_code=204, description='Delete account permanently')
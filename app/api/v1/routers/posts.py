@@ -1,22 +1,28 @@
 from uuid import UUID
 from sqlalchemy.orm import Session
-from fastapi.requests import Request
 from fastapi.responses import FileResponse
 from fastapi import APIRouter, Depends, Query, File, UploadFile
 
 from app.models.users import User
+from app.core.config import settings
+from app.core.responses import ModelJSONResponse
 from app.api.v1.schemas.users import UserRole
 from app.api.v1.schemas.images import ImageResponseV1
 from app.api.v1.services.post_service import post_service_v1
 from app.dependencies import get_current_user, get_db, required_roles
 from app.api.v1.schemas.posts import (
     PostReadV1,
+    PostBatchV1,
     PostCreateV1,
     PostUpdateV1,
+    HashtagReadV1,
     CommentReadV1,
     PostResponseV1,
     CommentCreateV1,
     CommentResponseV1,
+    HashtagResponseV1,
+    TrendingPostReadV1,
+    TrendingPostResponseV1,
 )
 
 
@@ -30,17 +36,22 @@ post_router_v1 = APIRouter()
     description='Get feed posts',
 )
 async def get_feed_posts(
-    request: Request,
+    mode: str = Query(
+        default='latest',
+        pattern='^(latest|ranked)$',
+        description='latest for newest first or ranked for relevance',
+    ),
     offset: int = Query(default=0),
     limit: int = Query(default=10),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     feed_posts: list[PostReadV1] = post_service_v1.get_feed_posts(
-        user, refresh_token, db, offset, limit
+        user, db, offset, limit, mode
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='Posts retrieved successfully', data=feed_posts),
     )
-    return PostResponseV1(message='Posts retrieved successfully', data=feed_posts)
 
 
 @post_router_v1.get(
@@ -50,17 +61,17 @@ async def get_feed_posts(
     description='Get posts created by following',
 )
 async def get_following_posts(
-    request: Request,
     offset: int = Query(default=0),
     limit: int = Query(default=10),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     posts: list[PostReadV1] = post_service_v1.get_following_posts(
-        user, refresh_token, db, offset, limit
+        user, db, offset, limit
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='Posts retrieved successfully', data=posts),
     )
-    return PostResponseV1(message='Posts retrieved successfully', data=posts)
 
 
 @post_router_v1.get(
@@ -70,20 +81,80 @@ async def get_following_posts(
     description='Get searched posts',
 )
 async def get_search_posts(
-    request: Request,
     q: str = Query(..., description='Search posts by title or using words in contents'),
-    sort: str = Query(default=None, description='Sort by likes'),
+    sort: str = Query(
+        default=None,
+        description='Sort by created_at, likes, comments or hot instead of relevance',
+    ),
     order: str = Query(default=None, description='Sort in asc or desc order'),
     offset: int = Query(default=0),
     limit: int = Query(default=10),
+    after: UUID = Query(
+        default=None, description='Id of the last post of the previous page'
+    ),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     search_posts: list[PostReadV1] = post_service_v1.get_search_posts(
-        user, refresh_token, db, q, sort, order, offset, limit
+        user, db, q, sort, order, offset, limit, after
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='Posts retrieved successfully', data=search_posts),
+    )
+
+
+@post_router_v1.get(
+    '/posts/trending/',
+    status_code=200,
+    response_model=TrendingPostResponseV1,
+    description='Get public posts with the most recent likes and comments',
+)
+async def get_trending_posts(
+    limit: int = Query(default=10, le=settings.TRENDING_TOP_K),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    posts: list[TrendingPostReadV1] = post_service_v1.get_trending_posts(
+        user, db, limit
+    )
+    return ModelJSONResponse(
+        TrendingPostResponseV1(message='Posts retrieved successfully', data=posts),
+    )
+
+
+@post_router_v1.get(
+    '/posts/trending/hashtags/',
+    status_code=200,
+    response_model=HashtagResponseV1,
+    description='Get hashtags of the trending posts',
+)
+async def get_trending_hashtags(
+    limit: int = Query(default=10, le=settings.TRENDING_TOP_K),
+    user: User = Depends(get_current_user),
+):
+    hashtags: list[HashtagReadV1] = post_service_v1.get_trending_hashtags(limit)
+    return ModelJSONResponse(
+        HashtagResponseV1(message='Hashtags retrieved successfully', data=hashtags),
+    )
+
+
+@post_router_v1.post(
+    '/posts/batch/',
+    status_code=200,
+    response_model=PostResponseV1,
+    description='Get posts by id, posts the user can not read are skipped',
+)
+async def get_posts_by_ids(
+    post_batch: PostBatchV1,
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    posts: list[PostReadV1] = post_service_v1.get_posts_by_ids(
+        user, post_batch.ids, db
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='Posts retrieved successfully', data=posts),
     )
-    return PostResponseV1(message='Posts retrieved successfully', data=search_posts)
 
 
 @post_router_v1.get(
@@ -94,13 +165,13 @@ async def get_search_posts(
 )
 async def get_post_by_id(
     post_id: UUID,
-    request: Request,
-    _=Depends(get_current_user),
+    user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post: PostReadV1 = post_service_v1.get_post_by_id(post_id, refresh_token, db)
-    return PostResponseV1(message='Post retrieved successfully', data=post)
+    post: PostReadV1 = post_service_v1.get_post_by_id(post_id, user, db)
+    return ModelJSONResponse(
+        PostResponseV1(message='Post retrieved successfully', data=post),
+    )
 
 
 @post_router_v1.get(
@@ -112,13 +183,11 @@ async def get_post_by_id(
 async def get_post_image(
     post_id: UUID,
     image_url: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     post_image: str = post_service_v1.get_post_image(
-        user, post_id, image_url, refresh_token, db
+        user, post_id, image_url, db
     )
     return FileResponse(path=post_image)
 
@@ -130,20 +199,23 @@ async def get_post_image(
 )
 async def get_post_comments(
     post_id: UUID,
-    request: Request,
     sort: str = Query(default=None, description='Sort by likes or created_at'),
     order: str = Query(default=None, description='Sort in asc or desc order'),
     offset: int = Query(default=0),
     limit: int = Query(default=10),
+    after: UUID = Query(
+        default=None, description='Id of the last comment of the previous page'
+    ),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     post_coments: list[CommentReadV1] = post_service_v1.get_post_comments(
-        user, post_id, refresh_token, db, sort, order, offset, limit
+        user, post_id, db, sort, order, offset, limit, after
     )
-    return CommentResponseV1(
-        message='Comments retrieved successfully', data=post_coments
+    return ModelJSONResponse(
+        CommentResponseV1(
+            message='Comments retrieved successfully', data=post_coments
+        ),
     )
 
 
@@ -156,15 +228,15 @@ async def get_post_comments(
 async def get_comment(
     post_id: UUID,
     comment_id: UUID,
-    request: Request,
     _=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     comment: CommentReadV1 = post_service_v1.get_post_comment(
-        post_id, comment_id, refresh_token, db
+        post_id, comment_id, db
+    )
+    return ModelJSONResponse(
+        CommentResponseV1(message='Comment retrieved successfully', data=comment),
     )
-    return CommentResponseV1(message='Comment retrieved successfully', data=comment)
 
 
 @post_router_v1.post(
@@ -174,14 +246,15 @@ async def get_comment(
     description='Create a post',
 )
 async def create_post(
-    request: Request,
     post_create: PostCreateV1,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post: PostReadV1 = post_service_v1.create_post(post_create, user, refresh_token, db)
-    return PostResponseV1(message='Post created successfully', data=post)
+    post: PostReadV1 = post_service_v1.create_post(post_create, user, db)
+    return ModelJSONResponse(
+        PostResponseV1(message='Post created successfully', data=post),
+        status_code=201,
+    )
 
 
 @post_router_v1.post(
@@ -192,18 +265,19 @@ async def create_post(
 )
 async def create_post_image(
     post_id: UUID,
-    request: Request,
     post_images: list[UploadFile] = File(
         ..., description='Upload at least 0 and at most 2 post image'
     ),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     post_images: ImageResponseV1 = await post_service_v1.upload_image(
-        user, post_id, post_images, refresh_token, db
+        user, post_id, post_images, db
+    )
+    return ModelJSONResponse(
+        ImageResponseV1(message='Post images uploaded successfully', data=post_images),
+        status_code=201,
     )
-    return ImageResponseV1(message='Post images uploaded successfully', data=post_images)
 
 
 @post_router_v1.post(
@@ -214,16 +288,17 @@ async def create_post_image(
 )
 async def create_comment(
     post_id: UUID,
-    request: Request,
     comment_create: CommentCreateV1,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     comment: CommentReadV1 = post_service_v1.create_comment(
-        post_id, comment_create, user, refresh_token, db
+        post_id, comment_create, user, db
+    )
+    return ModelJSONResponse(
+        CommentResponseV1(message='Comment created successfully', data=comment),
+        status_code=201,
     )
-    return CommentResponseV1(message='Comment created successfully', data=comment)
 
 
 @post_router_v1.patch(
@@ -234,16 +309,16 @@ async def create_comment(
 )
 async def update_post(
     post_id: UUID,
-    request: Request,
     post_update: PostUpdateV1,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     post: PostReadV1 | None = post_service_v1.update_post(
-        user, post_id, post_update, refresh_token, db
+        user, post_id, post_update, db
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='Post updated successfully', data=post),
     )
-    return PostResponseV1(message='Post updated successfully', data=post)
 
 
 @post_router_v1.patch(
@@ -254,13 +329,11 @@ async def update_post(
 )
 async def like_post(
     post_id: UUID,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.like_post(user, post_id, refresh_token, db)
-    return PostResponseV1(message='Post liked successfully')
+    post_service_v1.like_post(user, post_id, db)
+    return ModelJSONResponse(PostResponseV1(message='Post liked successfully'))
 
 
 @post_router_v1.patch(
@@ -271,13 +344,11 @@ async def like_post(
 )
 async def unlike_post(
     post_id: UUID,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.unlike_post(user, post_id, refresh_token, db)
-    return PostResponseV1(message='Post unliked successfully')
+    post_service_v1.unlike_post(user, post_id, db)
+    return ModelJSONResponse(PostResponseV1(message='Post unliked successfully'))
 
 
 @post_router_v1.patch(
@@ -289,13 +360,11 @@ async def unlike_post(
 async def like_comment(
     post_id: UUID,
     comment_id: UUID,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.like_comment(user, post_id, comment_id, refresh_token, db)
-    return PostResponseV1(message='Comment liked successfully')
+    post_service_v1.like_comment(user, post_id, comment_id, db)
+    return ModelJSONResponse(PostResponseV1(message='Comment liked successfully'))
 
 
 @post_router_v1.patch(
@@ -307,13 +376,11 @@ async def like_comment(
 async def unlike_comment(
     post_id: UUID,
     comment_id: UUID,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.unlike_comment(user, post_id, comment_id, refresh_token, db)
-    return PostResponseV1(message='Comment unliked successfully')
+    post_service_v1.unlike_comment(user, post_id, comment_id, db)
+    return ModelJSONResponse(PostResponseV1(message='Comment unliked successfully'))
 
 
 @post_router_v1.delete(
@@ -321,12 +388,10 @@ async def unlike_comment(
 )
 async def delete_post(
     post_id: UUID,
-    request: Request,
     user: User = Depends(required_roles([UserRole.USER, UserRole.ADMIN])),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.delete_post(post_id, user, refresh_token, db)
+    post_service_v1.delete_post(post_id, user, db)
 
 
 @post_router_v1.delete(
@@ -337,12 +402,10 @@ async def delete_post(
 async def delete_comment(
     post_id: UUID,
     comment_id: UUID,
-    request: Request,
     _ = Depends(required_roles([UserRole.USER, UserRole.ADMIN])),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.delete_comment(post_id, comment_id, refresh_token, db)
+    post_service_v1.delete_comment(post_id, comment_id, db)
 
 
 @post_router_v1.delete(
@@ -353,9 +416,7 @@ async def delete_comment(
 async def delete_post_image(
     post_id: UUID,
     image_url: str,
-    request: Request,
     _ = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    post_service_v1.delete_post_image(post_id, image_url, refresh_token, db)
+    post_service_v1.delete_post_image(post_id, image_url, db)
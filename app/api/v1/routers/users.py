@@ -1,9 +1,10 @@
+from uuid import UUID
 from sqlalchemy.orm import Session
-from fastapi.requests import Request
 from fastapi.responses import FileResponse
 from fastapi import APIRouter, UploadFile, Depends, File, Query
 
 from app.models.users import User
+from app.core.responses import ModelJSONResponse
 from app.dependencies import get_db, get_current_user
 from app.api.v1.services.user_service import user_service_v1
 from app.api.v1.schemas.images import ImageResponseV1, ImageReadV1
@@ -18,7 +19,9 @@ from app.api.v1.schemas.users import (
     UserUpdateV1,
     UserProfileV1,
     UserResponseV1,
+    UserSuggestionV1,
     UserProfileResponseV1,
+    UserSuggestionResponseV1,
 )
 
 
@@ -32,7 +35,6 @@ users_router_v1 = APIRouter()
     description='Get a list of user profiles',
 )
 async def get_users(
-    request: Request,
     nationality: str = Query(default=None, description='Filter by nationality'),
     sort: str = Query(
         default=None,
@@ -44,11 +46,34 @@ async def get_users(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     users: list[UserReadV1] = user_service_v1.get_users(
-        user, db, refresh_token, nationality, sort, order, offset, limit
+        user, db, nationality, sort, order, offset, limit
+    )
+    return ModelJSONResponse(
+        UserResponseV1(message='Users retrieved successfully', data=users),
+    )
+
+
+@users_router_v1.get(
+    '/users/suggestions/',
+    status_code=200,
+    response_model=UserSuggestionResponseV1,
+    description='Get users followed by the users you follow',
+)
+async def get_follow_suggestions(
+    offset: int = Query(default=0),
+    limit: int = Query(default=10),
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    suggestions: list[UserSuggestionV1] = user_service_v1.get_follow_suggestions(
+        user, db, offset, limit
+    )
+    return ModelJSONResponse(
+        UserSuggestionResponseV1(
+            message='Follow suggestions retrieved successfully', data=suggestions
+        ),
     )
-    return UserResponseV1(message='Users retrieved successfully', data=users)
 
 
 @users_router_v1.get(
@@ -58,7 +83,6 @@ async def get_users(
     description='Search for user profiles',
 )
 async def search_users(
-    request: Request,
     q: str = Query(..., description='Search users by username or display_name'),
     nationality: str = Query(default=None, description='Filter by nationality'),
     sort: str = Query(
@@ -71,11 +95,12 @@ async def search_users(
     _=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     users: list[UserReadV1] = user_service_v1.search_users(
-        db, refresh_token, q, nationality, sort, order, offset, limit
+        db, q, nationality, sort, order, offset, limit
+    )
+    return ModelJSONResponse(
+        UserResponseV1(message='Searched users retrieved successfully', data=users),
     )
-    return UserResponseV1(message='Searched users retrieved successfully', data=users)
 
 
 @users_router_v1.get(
@@ -85,16 +110,16 @@ async def search_users(
     description='Get current user profile',
 )
 async def get_profile(
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     user_profile: UserProfileV1 = user_service_v1.get_current_user_profile(
-        user, refresh_token, db
+        user, db
     )
-    return UserProfileResponseV1(
-        message='User profile retrieved successfully', data=user_profile
+    return ModelJSONResponse(
+        UserProfileResponseV1(
+            message='User profile retrieved successfully', data=user_profile
+        ),
     )
 
 
@@ -105,23 +130,26 @@ async def get_profile(
     response_model=PostResponseV1,
 )
 async def get_user_posts(
-    request: Request,
     username: str,
     sort: str = Query(
         default=None,
-        description='Sort posts by created_at',
+        description='Sort posts by created_at, likes, comments or hot',
     ),
     order: str = Query(default=None, description='Sort in asc or desc order'),
     offset: int = Query(default=0),
     limit: int = Query(default=10),
+    after: UUID = Query(
+        default=None, description='Id of the last post of the previous page'
+    ),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     user_posts: list[PostReadV1] = user_service_v1.get_user_posts(
-        user, username, refresh_token, db, sort, order, offset, limit
+        user, username, db, sort, order, offset, limit, after
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='Posts retrieved successfully', data=user_posts),
     )
-    return PostResponseV1(message='Posts retrieved successfully', data=user_posts)
 
 
 @users_router_v1.get(
@@ -131,14 +159,14 @@ async def get_user_posts(
     description='Get user profile by username',
 )
 async def get_user(
-    request: Request,
     username: str,
     _=Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    user_read: User = user_service_v1.get_user_profile(username, refresh_token, db)
-    return UserResponseV1(message='User retrieved successfully', data=user_read)
+    user_read: User = user_service_v1.get_user_profile(username, db)
+    return ModelJSONResponse(
+        UserResponseV1(message='User retrieved successfully', data=user_read),
+    )
 
 
 @users_router_v1.get(
@@ -149,16 +177,16 @@ async def get_user(
 )
 async def get_followers(
     username: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     followers: list[User] = user_service_v1.get_followers(
-        user, username, refresh_token, db
+        user, username, db
     )
-    return UserResponseV1(
-        message='User followers retrieved successfully', data=followers
+    return ModelJSONResponse(
+        UserResponseV1(
+            message='User followers retrieved successfully', data=followers
+        ),
     )
 
 
@@ -170,16 +198,16 @@ async def get_followers(
 )
 async def get_followings(
     username: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     followings: list[User] = user_service_v1.get_followings(
-        user, username, refresh_token, db
+        user, username, db
     )
-    return UserResponseV1(
-        message='User followings retrieved successfully', data=followings
+    return ModelJSONResponse(
+        UserResponseV1(
+            message='User followings retrieved successfully', data=followings
+        ),
     )
 
 
@@ -191,7 +219,6 @@ async def get_followings(
 )
 async def get_user_comments(
     username: str,
-    request: Request,
     sort: str = Query(
         default=None,
         description='Sort comments by created_at',
@@ -202,12 +229,13 @@ async def get_user_comments(
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     comments: list[CommentReadV1] = user_service_v1.get_user_comments(
-        user, username, refresh_token, db, sort, order, offset, limit
+        user, username, db, sort, order, offset, limit
     )
-    return CommentResponseV1(
-        message='User comments retrieved successfully', data=comments
+    return ModelJSONResponse(
+        CommentResponseV1(
+            message='User comments retrieved successfully', data=comments
+        ),
     )
 
 
@@ -219,17 +247,17 @@ async def get_user_comments(
 )
 async def get_liked_posts(
     username: str,
-    request: Request,
     offset: int = Query(default=0),
     limit: int = Query(default=10),
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     posts: list[PostReadV1] = user_service_v1.get_liked_post(
-        user, username, refresh_token, db, offset, limit
+        user, username, db, offset, limit
+    )
+    return ModelJSONResponse(
+        PostResponseV1(message='User liked posts retrived successflly', data=posts),
     )
-    return PostResponseV1(message='User liked posts retrived successflly', data=posts)
 
 
 @users_router_v1.get(
@@ -241,13 +269,11 @@ async def get_liked_posts(
 async def get_user_avatar(
     username: str,
     image_url: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     avatar: bytes = await user_service_v1.get_user_avatar(
-        user, username, refresh_token, image_url, db
+        user, username, image_url, db
     )
     return FileResponse(path=avatar)
 
@@ -259,18 +285,19 @@ async def get_user_avatar(
     description='Upload user avatar and header images',
 )
 async def upload_image(
-    request: Request,
     images: list[UploadFile] = File(
         ..., description='Upload at least 0 and at most 2 avatar'
     ),
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
     profile_images: ImageReadV1 = await user_service_v1.upload_image(
-        refresh_token, user, images, db
+        user, images, db
+    )
+    return ModelJSONResponse(
+        ImageResponseV1(message='Images uploaded successfully', data=profile_images),
+        status_code=201,
     )
-    return ImageResponseV1(message='Images uploaded successfully', data=profile_images)
 
 
 @users_router_v1.patch(
@@ -280,14 +307,16 @@ async def upload_image(
     description='Update user profile',
 )
 async def update_user(
-    request: Request,
     user_update: UserUpdateV1,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    user_out: User = user_service_v1.update_user(user_update, user, refresh_token, db)
-    return UserResponseV1(message='User profile updated successfully', data=user_out)
+    user_out: UserReadV1 = user_service_v1.update_user(
+        user_update, user, db
+    )
+    return ModelJSONResponse(
+        UserResponseV1(message='User profile updated successfully', data=user_out),
+    )
 
 
 @users_router_v1.patch(
@@ -298,13 +327,11 @@ async def update_user(
 )
 async def follow_user(
     username: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    user_service_v1.follow_user(user, username, refresh_token, db)
-    return UserResponseV1(message='User followed successfully')
+    user_service_v1.follow_user(user, username, db)
+    return ModelJSONResponse(UserResponseV1(message='User followed successfully'))
 
 
 @users_router_v1.patch(
@@ -315,13 +342,11 @@ async def follow_user(
 )
 async def unfollow_user(
     username: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    user_service_v1.unfollow_user(user, username, refresh_token, db)
-    return UserResponseV1(message='User unfollowed successfully')
+    user_service_v1.unfollow_user(user, username, db)
+    return ModelJSONResponse(UserResponseV1(message='User unfollowed successfully'))
 
 
 @users_router_v1.delete(
@@ -331,10 +356,8 @@ async def unfollow_user(
 )
 async def delete_profile_image(
     image_url: str,
-    request: Request,
     user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
-    refresh_token: str | None = request.cookies.get('refresh_token')
-    user_service_v1.delete_profile_image(user, image_url, refresh_token, db)
+    user_service_v1.delete_profile_image(user, image_url, db)
     
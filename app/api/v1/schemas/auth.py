@@ -18,6 +18,8 @@ class TokenStatus(str, enum.Enum):
 class TokenDataV1(BaseModel):
     id: UUID
     name: str
+    # id of the refresh token an access token was issued with
+    sid: Optional[str] = None
 
 
 # Token model to be returned
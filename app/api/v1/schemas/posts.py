@@ -1,9 +1,10 @@
 import enum
 from uuid import UUID
-from typing import Optional
+from typing import Optional, Any
 from datetime import datetime
-from pydantic import BaseModel, ConfigDict, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 
+from app.core.config import settings
 from app.core.exceptions import PostVisibilityError
 
 
@@ -44,7 +45,8 @@ class CommentBaseV1(BaseModel):
 
 
 class CommentCreateV1(CommentBaseV1):
-    pass
+    # the comment replied to, it has to belong to the same post
+    parent_id: Optional[UUID] = None
 
     model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
 
@@ -55,6 +57,12 @@ class PostCreateV1(PostBaseV1):
     model_config = ConfigDict(str_strip_whitespace=True, extra='forbid')
 
 
+class PostBatchV1(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=settings.POST_BATCH_MAX_SIZE)
+
+    model_config = ConfigDict(extra='forbid')
+
+
 class PostUpdateV1(BaseModel):
     title: Optional[str] = None
     content: Optional[str] = None
@@ -84,6 +92,13 @@ class PostReadBaseV1(PostBaseV1):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @classmethod
+    def from_db(cls, post: Any, **values: Any):
+        '''validate a db row once together with the fields not stored on
+        the row instead of validating the base model and dumping it'''
+        fields: dict = {f: getattr(post, f) for f in PostReadBaseV1.model_fields}
+        return cls(**fields, **values)
+
 
 class CommentReadBaseV1(CommentBaseV1):
     id: UUID
@@ -91,18 +106,43 @@ class CommentReadBaseV1(CommentBaseV1):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @classmethod
+    def from_db(cls, comment: Any, **values: Any):
+        '''validate a db row once together with the fields not stored on
+        the row instead of validating the base model and dumping it'''
+        fields: dict = {f: getattr(comment, f) for f in CommentReadBaseV1.model_fields}
+        return cls(**fields, **values)
+
 
 class PostReadV1(PostReadBaseV1):
     display_name: str
     username: str
     likes: int = 0
     comments: int = 0
+    liked_by_me: bool = False
+
+
+class TrendingPostReadV1(PostReadBaseV1):
+    display_name: str
+    username: str
+    score: int
+    liked_by_me: bool = False
+
+
+class HashtagReadV1(BaseModel):
+    tag: str
+    score: int
 
 
 class CommentReadV1(CommentReadBaseV1):
     display_name: str
     username: str
     likes: int
+    liked_by_me: bool = False
+    parent_id: Optional[UUID] = None
+    reply_count: int = 0
+    # the first replies, loaded for the comments of a post listing
+    replies: list['CommentReadV1'] = []
 
 
 class PostResponseV1(BaseResponseV1):
@@ -111,3 +151,17 @@ class PostResponseV1(BaseResponseV1):
 
 class CommentResponseV1(BaseResponseV1):
     data: Optional[CommentReadV1 | list[CommentReadV1]] = None
+
+
+class TrendingPostResponseV1(BaseResponseV1):
+    data: Optional[list[TrendingPostReadV1]] = None
+
+
+class HashtagResponseV1(BaseResponseV1):
+    data: Optional[list[HashtagReadV1]] = None
+
+
+# bulk validation of listing rows, one call into pydantic-core per page
+post_list_adapter_v1 = TypeAdapter(list[PostReadV1])
+comment_list_adapter_v1 = TypeAdapter(list[CommentReadV1])
+trending_post_list_adapter_v1 = TypeAdapter(list[TrendingPostReadV1])
@@ -99,6 +99,17 @@ class UserReadV1(UserBaseV1):
 
     model_config = ConfigDict(from_attributes=True)
 
+    @classmethod
+    def from_db(cls, user: Any, **values: Any):
+        '''build from a trusted db row without re-running validation,
+        fields not stored on the row are passed in as values'''
+        fields: dict = {f: getattr(user, f) for f in UserReadV1.model_fields}
+        return cls.model_construct(**fields, **values)
+
+
+class UserSuggestionV1(UserReadV1):
+    mutuals: int
+
 
 class UserProfileV1(UserReadV1):
     followers: int
@@ -121,6 +132,10 @@ class UserResponseV1(BaseResponseV1):
     data: Optional[UserReadV1 | list[UserReadV1]] = None
 
 
+class UserSuggestionResponseV1(BaseResponseV1):
+    data: Optional[list[UserSuggestionV1]] = None
+
+
 class UserProfileResponseV1(BaseResponseV1):
     data: UserProfileV1 | CurrentUserProfileV1
 
@@ -7,19 +7,17 @@ from app.models.users import User, Role
 from app.core.exceptions import ServerError
 from app.api.v1.schemas.users import UserReadV1
 from app.api.v1.schemas.admin import UserCountV1
-from app.core.security import validate_refresh_token
 from app.api.v1.services.user_service import user_service_v1
 from app.api.v1.repositories.admin_repo import admin_repo_v1
+from app.api.v1.repositories.records import UserRecord
 from app.core.exceptions import UsersNotFoundError, UserNotFoundError
 
 
 class AdminServiceV1:
     @staticmethod
     def get_all_active_users(
-        admin_user: User, refresh_token: str, db: Session
+        admin_user: User, db: Session
     ) -> UserCountV1:
-        _ = validate_refresh_token(refresh_token, db)
-
         try:
             role_id: UUID = admin_user.role_id
             users: int = admin_repo_v1.count_users(role_id, db)
@@ -36,13 +34,13 @@ class AdminServiceV1:
 
     @staticmethod
     def get_suspended_users(
-        admin_user: User, refresh_token: str, db: Session
+        admin_user: User, db: Session
     ) -> list[UserReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         try:
             role_id: UUID = admin_user.role_id
-            users_db: list[User] = admin_repo_v1.get_suspended_users(role_id, db)
+            users_db: list[UserRecord] = admin_repo_v1.get_suspended_users(
+                role_id, db
+            )
 
             if not users_db:
                 sentry_logger.error('Suspended users not found')
@@ -50,7 +48,7 @@ class AdminServiceV1:
 
             users: list[UserReadV1] = []
             for user in users_db:
-                user_read = UserReadV1.model_validate(user)
+                user_read = UserReadV1.from_db(user)
                 users.append(user_read)
 
             sentry_logger.info('Total suspended users retrieved from database')
@@ -68,10 +66,8 @@ class AdminServiceV1:
 
     @staticmethod
     def assign_admin_role(
-        admin_user: User, username: str, refresh_token: str, db: Session
+        admin_user: User, username: str, db: Session
     ) -> UserReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
         user_db: User = user_service_v1.get_user_by_username(username, db)
 
         try:
@@ -81,7 +77,7 @@ class AdminServiceV1:
             user_service_v1.add_user(user_db, db)
             db.commit()
 
-            user: UserReadV1 = UserReadV1.model_validate(user_db)
+            user: UserReadV1 = UserReadV1.from_db(user_db)
             sentry_logger.info(
                 'User {id} role updated to admin by admin {admin_id}',
                 id=user.id,
@@ -99,17 +95,15 @@ class AdminServiceV1:
 
     @staticmethod
     def suspend_user(
-        admin_user: User, username: str, refresh_token: str, db: Session
+        admin_user: User, username: str, db: Session
     ) -> UserReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
         user: User = user_service_v1.get_user_by_username(username, db)
 
         try:
             user.is_suspended = True
             user_service_v1.add_user(user, db)
             db.commit()
-            user: UserReadV1 = UserReadV1.model_validate(user)
+            user: UserReadV1 = UserReadV1.from_db(user)
             sentry_logger.info(
                 'User {id} suspended by admin {admin_id}',
                 id=user.id,
@@ -127,10 +121,8 @@ class AdminServiceV1:
 
     @staticmethod
     def unsuspend_user(
-        admin_user: User, username: str, refresh_token: str, db: Session
+        admin_user: User, username: str, db: Session
     ) -> UserReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
         role_id = admin_user.role_id
         user_db: User = admin_repo_v1.get_suspended_user(role_id, username, db)
 
@@ -142,7 +134,7 @@ class AdminServiceV1:
             user_db.is_suspended = False
             user_service_v1.add_user(user_db, db)
             db.commit()
-            user: UserReadV1 = UserReadV1.model_validate(user_db)
+            user: UserReadV1 = UserReadV1.from_db(user_db)
             sentry_logger.info(
                 'User {id} unsuspended by admin {admin_id}',
                 id=user.id,
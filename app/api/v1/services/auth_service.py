@@ -1,17 +1,22 @@
 import sentry_sdk
 from uuid import UUID
+from time import perf_counter, sleep
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 from sentry_sdk import logger as sentry_logger
 from datetime import datetime, timezone, timedelta
 
 
 from app.models.users import User, Role
+from app.core.config import settings
+from app.core.tokens import refresh_token_codec
+from app.core.revocations import revocation_list
 from app.models.auth import RefreshToken
 from app.api.v1.schemas.auth import RefreshTokenV1
 from app.api.v1.repositories.auth_repo import auth_repo_v1
 from app.api.v1.repositories.user_repo import user_repo_v1
 from app.api.v1.services.user_service import user_service_v1
-from app.api.v1.schemas.users import UserCreateV1, UserInDBV1
+from app.api.v1.schemas.users import UserReadV1, UserCreateV1, UserInDBV1
 from app.api.v1.schemas.auth import TokenV1, TokenDataV1, TokenStatus
 from app.core.exceptions import (
     ServerError,
@@ -19,6 +24,7 @@ from app.core.exceptions import (
     UserExistsError,
     CredentialError,
     UserNotFoundError,
+    AuthenticationError,
 )
 from app.core.security import (
     hash_token,
@@ -35,10 +41,13 @@ class AuthServiceV1:
     def prepare_tokens(user_id: UUID, username: str) -> dict:
         '''create access and refresh tokens'''
         token_data: TokenDataV1 = TokenDataV1(id=user_id, name=username)
+        refresh_token, token_id, token_exp = create_refresh_token(token_data)
+
+        # the access token belongs to the session of the refresh token
+        token_data.sid = token_id
         access_token: str = create_access_token(token_data)
         token: TokenV1 = TokenV1(access_token=access_token)
 
-        refresh_token, token_id, token_exp = create_refresh_token(token_data)
         token_create: RefreshToken = RefreshToken(
             **RefreshTokenV1(
                 token=refresh_token, user_id=user_id, expires_at=token_exp
@@ -60,7 +69,7 @@ class AuthServiceV1:
         return refresh_token
 
     @staticmethod
-    def sign_up(user_create: UserCreateV1, db: Session) -> User:
+    def sign_up(user_create: UserCreateV1, db: Session) -> UserReadV1:
         user_with_email: User | None = user_repo_v1.get_user_by_email(
             user_create.email, db
         )
@@ -88,25 +97,24 @@ class AuthServiceV1:
 
         role: Role = user_service_v1.get_role(user_in_db.role, db)
 
-        user: User = User(
-            **user_in_db.model_dump(exclude={'role', 'password'}),
-            role_id=role.id,
-            hash_password=user_create.password
-        )
-
         try:
-            user_service_v1.add_user(user, db)
+            user_row: Row = user_repo_v1.create_user(
+                dict(
+                    user_in_db.model_dump(exclude={'role', 'password'}),
+                    role_id=role.id,
+                    hash_password=user_create.password,
+                ),
+                db,
+            )
             db.commit()
-            sentry_logger.info('User {id} created successfully', id=user.id)
+            sentry_logger.info('User {id} created successfully', id=user_row.id)
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error('Internal server error while creating user')
             raise ServerError() from e
 
-        user_out: User = user_service_v1.get_user_by_id(user.id, db)
-
-        return user_out
+        return UserReadV1.from_db(user_row)
 
     @staticmethod
     def sign_in(email: str, password: str, db: Session) -> tuple:
@@ -120,36 +128,24 @@ class AuthServiceV1:
         data = AuthServiceV1.prepare_tokens(user_db.id, user_db.username)
         access_token: str = data.get('access_token')
 
-        refresh_tokens: list[RefreshToken] = user_db.refresh_tokens
-
-        # Revoke user's current valid refresh tokens before creating a new on on sign in
-        if refresh_tokens:
-            for rt in refresh_tokens:
-                if rt.status == TokenStatus.VALID:
-                    rt.status = TokenStatus.REVOKED
-
-                    try:
-                        auth_repo_v1.store_refresh_token(rt, db)
-                        db.commit()
-                        sentry_logger.info(
-                            'Refresh token {id} status updated', id=rt.id
-                        )
-                    except Exception as e:
-                        db.rollback()
-                        sentry_sdk.capture_exception(e)
-                        sentry_logger.error(
-                            'Internal server error while updating refresh token {id}',
-                            id=rt.id,
-                        )
-                        raise ServerError() from e
+        refresh_token: RefreshToken = data.get('token_create')
 
         try:
-            refresh_token: RefreshToken = data.get('token_create')
+            # revoke the user's current valid refresh tokens in the same
+            # transaction that creates the new one
+            revoked: list[UUID] = auth_repo_v1.revoke_user_tokens(
+                user_db.id, datetime.now(timezone.utc), db
+            )
             refresh_token_out = refresh_token.token
             refresh_token.token = hash_token(refresh_token.token)
             auth_repo_v1.store_refresh_token(refresh_token, db)
             db.commit()
-            sentry_logger.info('Refresh token {id} created', id=refresh_token.id)
+            revocation_list.revoke(*revoked)
+            sentry_logger.info(
+                'Refresh token {id} created, {revoked} previous tokens revoked',
+                id=refresh_token.id,
+                revoked=len(revoked),
+            )
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
@@ -163,46 +159,50 @@ class AuthServiceV1:
 
     @staticmethod
     def create_access_token(refresh_token: str, db: Session) -> tuple:
-        # check if refresh token is valid
-        refresh_token_db: RefreshToken = validate_refresh_token(refresh_token, db)
+        '''spend the refresh token and store its successor in one transaction'''
+        payload: dict | None = refresh_token_codec.decode(refresh_token)
+
+        if not payload:
+            sentry_logger.error('Error authenticating user. Refresh token not valid')
+            raise AuthenticationError()
 
-        # mark refresh token as used and rotate token
-        refresh_token_db.status = TokenStatus.USED
-        refresh_token_db.used_at = datetime.now(timezone.utc)
+        token_id: str = payload.get('jti')
 
         try:
-            auth_repo_v1.store_refresh_token(refresh_token_db, db)
-            db.commit()
-            sentry_logger.info(
-                'Refresh token {id} status updated', id=refresh_token_db.id
-            )
-        except Exception as e:
-            db.rollback()
-            sentry_sdk.capture_exception(e)
-            sentry_logger.error(
-                'Internal server error while updating refresh token {id}',
-                id=refresh_token_db.id,
+            user_row: Row | None = auth_repo_v1.use_refresh_token(
+                token_id, hash_token(refresh_token), datetime.now(timezone.utc), db
             )
-            raise ServerError() from e
 
-        user_db: User = refresh_token_db.user
+            if not user_row:
+                raise AuthenticationError()
 
-        data: dict = AuthServiceV1.prepare_tokens(user_db.id, user_db.username)
-        access_token: str = data.get('access_token')
+            data: dict = AuthServiceV1.prepare_tokens(user_row.id, user_row.username)
+            access_token: str = data.get('access_token')
 
-        try:
-            refresh_token: RefreshToken = data.get('token_create')
-            refresh_token_out: str = refresh_token.token
-            refresh_token.token = hash_token(refresh_token.token)
-            auth_repo_v1.store_refresh_token(refresh_token, db)
+            new_refresh_token: RefreshToken = data.get('token_create')
+            refresh_token_out: str = new_refresh_token.token
+            new_refresh_token.token = hash_token(new_refresh_token.token)
+            auth_repo_v1.store_refresh_token(new_refresh_token, db)
             db.commit()
-            sentry_logger.info('Refresh token {id} created', id=refresh_token.id)
+            revocation_list.revoke(token_id)
+            sentry_logger.info(
+                'Refresh token {id} rotated to {new_id}',
+                id=token_id,
+                new_id=new_refresh_token.id,
+            )
         except Exception as e:
             db.rollback()
+            if isinstance(e, AuthenticationError):
+                sentry_logger.error(
+                    'Error authenticating user. Refresh token {id} not valid',
+                    id=token_id,
+                )
+                raise AuthenticationError()
+
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
-                'Internal server error while creating refresh token {id}',
-                id=refresh_token.id,
+                'Internal server error while rotating refresh token {id}',
+                id=token_id,
             )
             raise ServerError() from e
 
@@ -218,6 +218,7 @@ class AuthServiceV1:
         try:
             auth_repo_v1.store_refresh_token(refresh_token_db, db)
             db.commit()
+            revocation_list.revoke(refresh_token_db.id)
             sentry_logger.info(
                 'Refresh token {id} status updated', id=refresh_token_db.id
             )
@@ -250,6 +251,7 @@ class AuthServiceV1:
         try:
             auth_repo_v1.store_refresh_token(token_db, db)
             db.commit()
+            revocation_list.revoke(refresh_token_db.id)
             sentry_logger.info(
                 'Refresh token {id} status updated', id=refresh_token_db.id
             )
@@ -289,8 +291,13 @@ class AuthServiceV1:
         user.hash_password = hash_password(new_password)
 
         try:
+            # sessions signed in with the old password are ended
+            revoked: list[UUID] = auth_repo_v1.revoke_user_tokens(
+                user.id, datetime.now(timezone.utc), db
+            )
             user_service_v1.add_user(user, db)
             db.commit()
+            revocation_list.revoke(*revoked)
             sentry_logger.info('User {id} password reset completed', id=user.id)
         except Exception as e:
             db.rollback()
@@ -350,6 +357,7 @@ class AuthServiceV1:
         try:
             auth_repo_v1.store_refresh_token(refresh_token_db, db)
             db.commit()
+            revocation_list.revoke(refresh_token_db.id)
             sentry_logger.info(
                 'Refresh token {id} status updated', id=refresh_token_db.id
             )
@@ -393,6 +401,7 @@ class AuthServiceV1:
         try:
             auth_repo_v1.store_refresh_token(refresh_token_db, db)
             db.commit()
+            revocation_list.revoke(refresh_token_db.id)
             sentry_logger.info(
                 'Refresh token {id} status updated', id=refresh_token_db.id
             )
@@ -418,16 +427,142 @@ class AuthServiceV1:
             raise ServerError() from e
 
     @staticmethod
-    def delete_refresh_tokens(db: Session):
+    def delete_refresh_tokens(db: Session) -> int:
+        '''delete expired, revoked and used tokens in short batched
+        transactions so row locks and WAL writes stay bounded per commit,
+        tokens are kept for the access token lifetime after they expire or
+        are revoked or used so workers can rebuild their revocation list
+
+        a partitioned table is cleaned by maintain_token_partitions, both
+        jobs are scheduled and the table decides which one deletes'''
+        if auth_repo_v1.is_token_table_partitioned(db):
+            sentry_logger.info('refresh_tokens is partitioned, skipping row cleanup')
+            return 0
+
+        before: datetime = datetime.now(timezone.utc) - timedelta(
+            minutes=settings.ACCESS_TOKEN_EXPIRE_TIME
+        )
+        batch_size: int = settings.TOKEN_CLEANUP_BATCH_SIZE
+        last_id: UUID | None = None
+        deleted: int = 0
+        batches: int = 0
+        start: float = perf_counter()
+
         try:
-            auth_repo_v1.delete_tokens(db)
-            db.commit()
-            sentry_logger.info('Refresh tokens deleted')
+            while batches < settings.TOKEN_CLEANUP_MAX_BATCHES:
+                token_ids: list[UUID] = auth_repo_v1.delete_tokens(
+                    before, db, last_id, batch_size
+                )
+                db.commit()
+
+                if not token_ids:
+                    break
+
+                batches += 1
+                deleted += len(token_ids)
+                last_id = max(token_ids)
+
+                if len(token_ids) < batch_size:
+                    break
+                sleep(settings.TOKEN_CLEANUP_THROTTLE)
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
-            sentry_logger.error('Internal server error while deleting refresh tokens')
+            sentry_logger.error(
+                'Internal server error while deleting refresh tokens after {count} deleted',
+                count=deleted,
+            )
             raise ServerError() from e
 
+        sentry_logger.info(
+            '{count} refresh tokens deleted in {batches} batches in {elapsed}s',
+            count=deleted,
+            batches=batches,
+            elapsed=round(perf_counter() - start, 3),
+        )
+        return deleted
+
+    @staticmethod
+    def maintain_token_partitions(db: Session) -> tuple[int, int]:
+        '''pre-create the daily refresh_tokens partitions a new token can
+        expire into and drop partitions whose tokens have all expired,
+        returns the number of partitions created and dropped
+
+        if the table was not partitioned by the migration, e.g. it ran
+        without REFRESH_TOKEN_PARTITIONING, tokens are deleted in batches'''
+        if not auth_repo_v1.is_token_table_partitioned(db):
+            sentry_logger.info('refresh_tokens is not partitioned, deleting tokens')
+            AuthServiceV1.delete_refresh_tokens(db)
+            return 0, 0
+
+        now: datetime = datetime.now(timezone.utc)
+        today = now.date()
+        # revoked sessions are read from the rows until their access tokens
+        # expire, see delete_refresh_tokens
+        before: datetime = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_TIME)
+        days_ahead: int = (
+            settings.REFRESH_TOKEN_EXPIRE_TIME + settings.REFRESH_TOKEN_PARTITIONS_AHEAD
+        )
+        partitions: set[str] = set(auth_repo_v1.get_token_partitions(db))
+        created: int = 0
+        dropped: int = 0
+
+        # one short transaction per partition, a failure is logged and the
+        # remaining partitions are still processed
+        for offset in range(days_ahead + 1):
+            day = today + timedelta(days=offset)
+            if auth_repo_v1.token_partition_name(day) in partitions:
+                continue
+            try:
+                auth_repo_v1.create_token_partition(day, db)
+                db.commit()
+                created += 1
+            except Exception as e:
+                db.rollback()
+                sentry_sdk.capture_exception(e)
+                sentry_logger.error(
+                    'Error occured while creating refresh token partition for {day}',
+                    day=day,
+                )
+
+        for name in partitions:
+            if name == 'refresh_tokens_default':
+                continue
+
+            day = datetime.strptime(
+                name.removeprefix('refresh_tokens_p'), '%Y%m%d'
+            ).replace(tzinfo=timezone.utc)
+            # every token in the partition expired before its upper bound
+            if day + timedelta(days=1) > before:
+                continue
+            try:
+                auth_repo_v1.drop_token_partition(name, db)
+                db.commit()
+                dropped += 1
+            except Exception as e:
+                db.rollback()
+                sentry_sdk.capture_exception(e)
+                sentry_logger.error(
+                    'Error occured while dropping refresh token partition {name}',
+                    name=name,
+                )
+
+        try:
+            auth_repo_v1.delete_default_partition_tokens(before, db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error(
+                'Error occured while deleting expired tokens from default partition'
+            )
+
+        sentry_logger.info(
+            'Refresh token partitions maintained, {created} created {dropped} dropped',
+            created=created,
+            dropped=dropped,
+        )
+        return created, dropped
+
 
 auth_service_v1 = AuthServiceV1()
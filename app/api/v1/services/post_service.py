@@ -1,19 +1,31 @@
 from pathlib import Path
 import sentry_sdk
 from uuid import UUID
+from datetime import datetime, timedelta, timezone
 from fastapi import UploadFile
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from sentry_sdk import logger as sentry_logger
 
 from app.models.users import User
 from app.core.config import settings
 from app.core.exceptions import ServerError
+from app.core.like_buffer import like_buffer
+from app.core.ranking import feed_ranker
+from app.core.trending import trending_counter
+from app.core.comment_cache import comment_page_cache
 from app.models.images import Image, PostImage
 from app.utils import write_file, validate_image
 from app.api.v1.schemas.images import ImageReadV1
-from app.core.security import validate_refresh_token
 from app.api.v1.repositories.post_repo import post_repo_v1
-from app.models.posts import Post, Comment, Like, CommentLike
+from app.api.v1.repositories.records import (
+    PostRecord,
+    PostDetailRecord,
+    PostCommentRecord,
+    FeedCandidateRecord,
+)
+from app.models.posts import Post, Comment
 from app.core.exceptions import (
     PostUploadError,
     PostNotFoundError,
@@ -28,10 +40,13 @@ from app.api.v1.schemas.posts import (
     PostReadV1,
     PostUpdateV1,
     PostCreateV1,
+    HashtagReadV1,
     CommentReadV1,
-    PostReadBaseV1,
     CommentCreateV1,
-    CommentReadBaseV1,
+    TrendingPostReadV1,
+    post_list_adapter_v1,
+    comment_list_adapter_v1,
+    trending_post_list_adapter_v1,
 )
 
 
@@ -39,42 +54,96 @@ class PostServiceV1:
     @staticmethod
     def get_feed_posts(
         user: User,
-        refresh_token: str,
         db: Session,
         offset: int = 0,
         limit: int = 10,
+        mode: str = 'latest',
     ) -> list[PostReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
+        if mode == 'ranked':
+            return PostServiceV1.get_ranked_feed_posts(user, db, offset, limit)
 
         try:
-            posts_db: list = post_repo_v1.get_feed_posts(user.id, db, offset, limit)
+            posts_db: list[PostDetailRecord] = post_repo_v1.get_feed_posts(
+                user.id, db, offset, limit
+            )
 
             if not posts_db:
                 sentry_logger.error('No posts found in database')
                 raise PostsNotFoundError()
 
-            feed_posts: list[PostReadV1] = []
-            for post_db in posts_db:
-                (id, title, content, visibility, created_at, display_name, username) = (
-                    post_db
+            post_rows: list[dict] = [record._asdict() for record in posts_db]
+            post_rows = PostServiceV1.mark_liked_posts(user.id, post_rows, db)
+            feed_posts: list[PostReadV1] = (
+                post_list_adapter_v1.validate_python(post_rows)
+            )
+
+            sentry_logger.info('Posts retrieved from database')
+            return feed_posts
+        except Exception as e:
+            if isinstance(e, PostsNotFoundError):
+                raise PostsNotFoundError()
+
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error(
+                'Internal server error occured while retrieving feed posts from database'
+            )
+            raise ServerError() from e
+
+    @staticmethod
+    def get_ranked_feed_posts(
+        user: User,
+        db: Session,
+        offset: int = 0,
+        limit: int = 10,
+    ) -> list[PostReadV1]:
+        '''feed posts of the candidate window ordered by feed_ranker'''
+        try:
+            now: datetime = datetime.now(timezone.utc)
+            candidates: list[FeedCandidateRecord] = (
+                post_repo_v1.get_feed_candidates(
+                    user.id,
+                    now - timedelta(hours=settings.FEED_CANDIDATE_WINDOW),
+                    settings.FEED_CANDIDATE_LIMIT,
+                    db,
                 )
+            )
+            affinity: dict[UUID, int] = post_repo_v1.get_author_affinity(
+                user.id, now - timedelta(days=settings.FEED_AFFINITY_WINDOW), db
+            )
+
+            ranked: list[FeedCandidateRecord] = feed_ranker.rank(
+                candidates, affinity, now, offset, limit
+            )
+            if not ranked:
+                sentry_logger.error('No posts found in database')
+                raise PostsNotFoundError()
 
-                post_db: Post = post_repo_v1.get_post_by_id(id, db)
-
-                post_read = PostReadV1(
-                    id=id,
-                    title=title,
-                    content=content,
-                    visibility=visibility,
-                    created_at=created_at,
-                    display_name=display_name,
-                    username=username,
-                    comments=len(post_db.comments),
-                    likes=len(post_db.likes),
+            records: dict[UUID, PostRecord] = {
+                record.id: record
+                for record in post_repo_v1.get_post_records(
+                    [candidate.id for candidate in ranked], db
                 )
-                feed_posts.append(post_read)
+            }
+            # a post deleted since the candidates were read is skipped
+            post_rows: list[dict] = [
+                dict(
+                    records[candidate.id]._asdict(),
+                    comments=candidate.comments,
+                    likes=candidate.likes,
+                )
+                for candidate in ranked
+                if candidate.id in records
+            ]
+            post_rows = PostServiceV1.mark_liked_posts(user.id, post_rows, db)
+            feed_posts: list[PostReadV1] = (
+                post_list_adapter_v1.validate_python(post_rows)
+            )
 
-            sentry_logger.info('Posts retrieved from database')
+            sentry_logger.info(
+                'Ranked {count} feed candidates for user {id}',
+                count=len(candidates),
+                id=user.id,
+            )
             return feed_posts
         except Exception as e:
             if isinstance(e, PostsNotFoundError):
@@ -82,59 +151,58 @@ class PostServiceV1:
 
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
-                'Internal server error occured while retrieving feed posts from database'
+                'Internal server error occured while ranking feed posts'
             )
             raise ServerError() from e
 
+    @staticmethod
+    def get_trending_posts(
+        user: User, db: Session, limit: int = 10
+    ) -> list[TrendingPostReadV1]:
+        '''served from the last ranking of trending_counter, only the
+        user's likes are read'''
+        post_rows: list[dict] = [
+            dict(record._asdict(), score=score)
+            for record, score in trending_counter.top_posts(limit)
+        ]
+        post_rows = PostServiceV1.mark_liked_posts(user.id, post_rows, db)
+        trending_posts: list[TrendingPostReadV1] = (
+            trending_post_list_adapter_v1.validate_python(post_rows)
+        )
+        return trending_posts
+
+    @staticmethod
+    def get_trending_hashtags(limit: int = 10) -> list[HashtagReadV1]:
+        return [
+            HashtagReadV1(tag=tag, score=score)
+            for tag, score in trending_counter.top_hashtags(limit)
+        ]
+
     @staticmethod
     def get_search_posts(
         user: User,
-        refresh_token: str,
         db: Session,
         q: str,
         sort: str | None = None,
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
+        after: UUID | None = None,
     ) -> list[PostReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         try:
-            posts_db: list = post_repo_v1.get_search_posts(
-                user.id, db, q, sort, order, offset, limit
+            posts_db: list[PostDetailRecord] = post_repo_v1.get_search_posts(
+                user.id, db, q, sort, order, offset, limit, after
             )
 
             if not posts_db:
                 sentry_logger.error('No posts found in database')
                 raise PostsNotFoundError()
 
-            search_posts: list[PostReadV1] = []
-            for post_db in posts_db:
-                (
-                    id,
-                    title,
-                    content,
-                    visibility,
-                    created_at,
-                    display_name,
-                    username,
-                    vector_rank,
-                ) = post_db
-
-                post: Post = post_repo_v1.get_post_by_id(id, db)
-
-                post_read = PostReadV1(
-                    id=id,
-                    title=title,
-                    content=content,
-                    visibility=visibility,
-                    created_at=created_at,
-                    display_name=display_name,
-                    username=username,
-                    comments=len(post.comments),
-                    likes=len(post.likes),
-                )
-                search_posts.append(post_read)
+            post_rows: list[dict] = [record._asdict() for record in posts_db]
+            post_rows = PostServiceV1.mark_liked_posts(user.id, post_rows, db)
+            search_posts: list[PostReadV1] = (
+                post_list_adapter_v1.validate_python(post_rows)
+            )
 
             sentry_logger.info('Posts retrieved from database')
             return search_posts
@@ -151,48 +219,22 @@ class PostServiceV1:
     @staticmethod
     def get_following_posts(
         user: User,
-        refresh_token: str,
         db: Session,
         offset: int = 0,
         limit: int = 10,
     ) -> list[PostReadV1]:
         '''get posts made by following users'''
-        _ = validate_refresh_token(refresh_token, db)
-
         try:
-            posts_db: Post = post_repo_v1.get_following_posts(
+            posts_db: list[PostDetailRecord] = post_repo_v1.get_following_posts(
                 user.id, db, offset, limit
             )
 
             if not posts_db:
                 raise PostsNotFoundError()
 
-            posts: list[PostReadV1] = []
-            for post_db in posts_db:
-                (
-                    id,
-                    title,
-                    content,
-                    visibility,
-                    created_at,
-                    display_name,
-                    username
-                ) = post_db
-
-                post: Post = post_repo_v1.get_post_by_id(id, db)
-
-                post_read = PostReadV1(
-                    id=id,
-                    title=title,
-                    content=content,
-                    visibility=visibility,
-                    created_at=created_at,
-                    display_name=display_name,
-                    username=username,
-                    comments=len(post.comments),
-                    likes=len(post.likes),
-                )
-                posts.append(post_read)
+            post_rows: list[dict] = [record._asdict() for record in posts_db]
+            post_rows = PostServiceV1.mark_liked_posts(user.id, post_rows, db)
+            posts: list[PostReadV1] = post_list_adapter_v1.validate_python(post_rows)
             sentry_logger.info('Following posts retrieved from database')
             return posts
         except Exception as e:
@@ -205,48 +247,137 @@ class PostServiceV1:
             )
             raise ServerError() from e
 
+    @staticmethod
+    def mark_liked_posts(
+        user_id: UUID, post_rows: list[dict], db: Session
+    ) -> list[dict]:
+        '''set liked_by_me on a page of post rows, the user's likes among
+        the page are read in one query'''
+        if not post_rows:
+            return post_rows
+
+        liked: set[UUID] = post_repo_v1.get_liked_post_ids(
+            user_id, [row['id'] for row in post_rows], db
+        )
+        for row in post_rows:
+            row['liked_by_me'] = row['id'] in liked
+            if settings.LIKE_BUFFER_ENABLED:
+                # the reader sees their own likes before they are flushed,
+                # trending rows have a score instead of a like count
+                if 'likes' in row:
+                    row['likes'] = like_buffer.adjust_likes(
+                        user_id, row['id'], row['liked_by_me'], row['likes']
+                    )
+                buffered: bool | None = like_buffer.state(user_id, row['id'])
+                if buffered is not None:
+                    row['liked_by_me'] = buffered
+        return post_rows
+
+    @staticmethod
+    def mark_liked_comments(
+        user_id: UUID, comment_rows: list[dict], db: Session
+    ) -> list[dict]:
+        '''copies of a page of comment rows and their replies with
+        liked_by_me set, the user's likes among the page are read in one
+        query'''
+        comment_ids: list[UUID] = []
+        rows: list[dict] = list(comment_rows)
+        while rows:
+            row: dict = rows.pop()
+            comment_ids.append(row['id'])
+            rows.extend(row.get('replies', ()))
+
+        liked: set[UUID] = post_repo_v1.get_liked_comment_ids(user_id, comment_ids, db)
+
+        def mark(rows: list[dict]) -> list[dict]:
+            return [
+                dict(
+                    row,
+                    liked_by_me=row['id'] in liked,
+                    replies=mark(row.get('replies', [])),
+                )
+                for row in rows
+            ]
+
+        return mark(comment_rows)
+
+    @staticmethod
+    def load_comment_threads(
+        comments: list[PostCommentRecord], db: Session
+    ) -> list[dict]:
+        '''comment rows with their first replies nested under them, each
+        level of replies is read for the whole page in one query so a page
+        costs at most COMMENT_THREAD_DEPTH + 1 queries'''
+        rows: list[dict] = [dict(c._asdict(), replies=[]) for c in comments]
+
+        level: list[dict] = rows
+        for _ in range(settings.COMMENT_THREAD_DEPTH):
+            parents: dict[UUID, dict] = {
+                row['id']: row for row in level if row['reply_count']
+            }
+            if not parents:
+                break
+
+            replies: list[PostCommentRecord] = post_repo_v1.get_comment_replies(
+                list(parents), settings.COMMENT_REPLY_LIMIT, db
+            )
+            level = []
+            for reply in replies:
+                row: dict = dict(reply._asdict(), replies=[])
+                parents[reply.parent_id]['replies'].append(row)
+                level.append(row)
+        return rows
+
     @staticmethod
     def get_post_comments(
         user: User,
         post_id: UUID,
-        refresh_token: str,
         db: Session,
         sort: str | None = None,
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
+        after: UUID | None = None,
     ) -> list[CommentReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
 
         if not post_db:
             sentry_logger.error('Post {id} not found', id=post_id)
             raise PostNotFoundError()
 
+        page_key: tuple = (sort, order, limit)
+        cacheable: bool = comment_page_cache.cacheable(
+            post_db.comment_count, offset, after
+        )
+
         try:
-            post_comments_db: list = post_repo_v1.get_post_comments(
-                post_id, db, sort, order, offset, limit
-            )
+            # cached pages are shared by every reader, liked_by_me is set on
+            # copies of the rows
+            comment_rows: list[dict] | None = None
+            if cacheable:
+                comment_rows = comment_page_cache.get(post_id, page_key)
+
+            if comment_rows is None:
+                post_comments_db: list[PostCommentRecord] = (
+                    post_repo_v1.get_post_comments(
+                        post_id, db, sort, order, offset, limit, after
+                    )
+                )
 
-            if not post_comments_db:
-                sentry_logger.error('No comments found for post {id}', id=post_id)
-                raise CommentsNotFoundError()
+                if not post_comments_db:
+                    sentry_logger.error('No comments found for post {id}', id=post_id)
+                    raise CommentsNotFoundError()
 
-            post_comments: list[CommentReadV1] = []
-            for post_comment in post_comments_db:
-                comment_id, comment_content, comment_created_at, comment_likes = (
-                    post_comment
-                )
-                comment: CommentReadV1 = CommentReadV1(
-                    id=comment_id,
-                    content=comment_content,
-                    created_at=comment_created_at,
-                    display_name=user.display_name,
-                    username=user.username,
-                    likes=comment_likes,
+                comment_rows = PostServiceV1.load_comment_threads(post_comments_db, db)
+                if cacheable:
+                    comment_page_cache.put(post_id, page_key, comment_rows)
+
+            post_comments: list[CommentReadV1] = (
+                comment_list_adapter_v1.validate_python(
+                    PostServiceV1.mark_liked_comments(user.id, comment_rows, db)
                 )
-                post_comments.append(comment)
+            )
+
             sentry_logger.info('Post {id} retrieved from database', id=post_id)
             return post_comments
         except Exception as e:
@@ -260,9 +391,7 @@ class PostServiceV1:
             raise ServerError() from e
 
     @staticmethod
-    def get_post_by_id(post_id: UUID, refresh_token: str, db: Session) -> PostReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
+    def get_post_by_id(post_id: UUID, current_user: User, db: Session) -> PostReadV1:
         post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
 
         if not post_db:
@@ -272,12 +401,19 @@ class PostServiceV1:
         user: User = post_db.user
 
         try:
-            post: PostReadV1 = PostReadV1(
-                **PostReadBaseV1.model_validate(post_db).model_dump(),
+            post_row: dict = PostServiceV1.mark_liked_posts(
+                current_user.id,
+                [{'id': post_id, 'likes': post_db.like_count}],
+                db,
+            )[0]
+
+            post: PostReadV1 = PostReadV1.from_db(
+                post_db,
                 display_name=user.display_name,
                 username=user.username,
-                likes=len(post_db.likes),
-                comments=len(post_db.comments),
+                likes=post_row['likes'],
+                comments=post_db.comment_count,
+                liked_by_me=post_row['liked_by_me'],
             )
             sentry_logger.info('Post {id} retrieved from database', id=post_id)
             return post
@@ -289,12 +425,48 @@ class PostServiceV1:
             )
             raise ServerError() from e
 
+    @staticmethod
+    def get_posts_by_ids(
+        current_user: User, post_ids: list[UUID], db: Session
+    ) -> list[PostReadV1]:
+        '''the posts the user can read in the requested order, ids of
+        missing or hidden posts are skipped'''
+        post_ids = list(dict.fromkeys(post_ids))
+
+        try:
+            posts_db: list[PostDetailRecord] = post_repo_v1.get_visible_posts(
+                current_user.id, post_ids, db
+            )
+
+            if not posts_db:
+                sentry_logger.error('No posts found in database')
+                raise PostsNotFoundError()
+
+            post_rows: dict[UUID, dict] = {
+                post_row['id']: post_row
+                for post_row in PostServiceV1.mark_liked_posts(
+                    current_user.id, [record._asdict() for record in posts_db], db
+                )
+            }
+            posts: list[PostReadV1] = post_list_adapter_v1.validate_python(
+                [post_rows[post_id] for post_id in post_ids if post_id in post_rows]
+            )
+            sentry_logger.info('Posts retrieved from database')
+            return posts
+        except Exception as e:
+            if isinstance(e, PostsNotFoundError):
+                raise PostsNotFoundError()
+
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error(
+                'Internal server error occured while retrieving posts from database'
+            )
+            raise ServerError() from e
+
     @staticmethod
     def get_post_image(
-        user: User, post_id: UUID, image_url: str, refresh_token: str, db: Session
+        user: User, post_id: UUID, image_url: str, db: Session
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
 
         if not post_db:
@@ -326,10 +498,8 @@ class PostServiceV1:
 
     @staticmethod
     def get_post_comment(
-        post_id: UUID, comment_id: UUID, refresh_token: str, db: Session
+        post_id: UUID, comment_id: UUID, db: Session
     ) -> CommentReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
         post_db: Post | None = post_repo_v1.get_post_by_id(post_id, db)
 
         if not post_db:
@@ -342,14 +512,16 @@ class PostServiceV1:
             sentry_logger.error('Comment {id} not found', id=comment_id)
             raise CommentNotFoundError()
 
-        user: User = post_db.user
+        user: User = comment_db.user
 
         try:
-            comment: CommentReadV1 = CommentReadV1(
-                **CommentReadBaseV1.model_validate(comment_db).model_dump(),
+            comment: CommentReadV1 = CommentReadV1.from_db(
+                comment_db,
                 display_name=user.display_name,
                 username=user.username,
-                likes=len(comment_db.comment_likes),
+                likes=comment_db.like_count,
+                parent_id=comment_db.parent_id,
+                reply_count=comment_db.reply_count,
             )
             sentry_logger.info('Post {id} comment retrieved from database', id=post_id)
             return comment
@@ -363,19 +535,16 @@ class PostServiceV1:
 
     @staticmethod
     def create_post(
-        post_create: PostCreateV1, user: User, refresh_token: str, db: Session
+        post_create: PostCreateV1, user: User, db: Session
     ) -> PostReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
-        post_db: Post = Post(**post_create.model_dump(), user_id=user.id)
-
         try:
-            post_repo_v1.add_post(post_db, db)
+            post_row: Row = post_repo_v1.create_post(
+                dict(post_create.model_dump(), user_id=user.id), db
+            )
             db.commit()
             sentry_logger.info('User {id} post created', id=user.id)
-            post_db_out: Post = post_repo_v1.get_post_by_id(post_db.id, db)
-            post: PostReadV1 = PostReadV1(
-                **PostReadBaseV1.model_validate(post_db_out).model_dump(),
+            post: PostReadV1 = PostReadV1.from_db(
+                post_row,
                 display_name=user.display_name,
                 username=user.username,
             )
@@ -394,35 +563,40 @@ class PostServiceV1:
         post_id: UUID,
         comment_create: CommentCreateV1,
         user: User,
-        refresh_token: str,
         db: Session,
     ) -> CommentReadV1:
-        _ = validate_refresh_token(refresh_token, db)
+        parent_id: UUID | None = comment_create.parent_id
+        if parent_id is not None:
+            parent_db: Comment | None = post_repo_v1.get_comment_by_id(parent_id, db)
 
-        post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
-
-        if not post_db:
-            sentry_logger.error('Post {id} not found', id=post_id)
-            raise PostNotFoundError()
+            if not parent_db or parent_db.post_id != post_id:
+                sentry_logger.error('Comment {id} not found', id=parent_id)
+                raise CommentNotFoundError()
 
         try:
-            comment_db: Comment = Comment(
-                **comment_create.model_dump(), post_id=post_id, user_id=user.id
+            comment_row: Row = post_repo_v1.create_comment(
+                dict(comment_create.model_dump(), post_id=post_id, user_id=user.id),
+                db,
             )
-            post_repo_v1.create_comment(comment_db, db)
             db.commit()
-            comment_db_out: Comment = post_repo_v1.get_comment_by_id(comment_db.id, db)
+            comment_page_cache.invalidate(post_id)
+            trending_counter.record(post_id, settings.TRENDING_COMMENT_WEIGHT)
 
-            comment: CommentReadV1 = CommentReadV1(
-                **CommentReadBaseV1.model_validate(comment_db_out).model_dump(),
+            comment: CommentReadV1 = CommentReadV1.from_db(
+                comment_row,
                 display_name=user.display_name,
                 username=user.username,
-                likes=len(comment_db_out.comment_likes),
+                likes=0,
+                parent_id=comment_row.parent_id,
             )
             sentry_logger.info('Comment {id} created', id=comment.id)
             return comment
         except Exception as e:
             db.rollback()
+            if isinstance(e, IntegrityError):
+                sentry_logger.error('Post {id} not found', id=post_id)
+                raise PostNotFoundError()
+
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
                 'Internal server error occured while writing user {id} comment to database',
@@ -435,11 +609,8 @@ class PostServiceV1:
         user: User,
         post_id: UUID,
         image_uploads: list[UploadFile],
-        refresh_token: str,
         db: Session,
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         # validate file uploaded to ensure an image is uploaded
         for i in image_uploads:
             if not await validate_image(i):
@@ -501,71 +672,49 @@ class PostServiceV1:
             raise ServerError() from e
 
     @staticmethod
-    def like_post(user: User, post_id: UUID, refresh_token: str, db: Session):
-        _ = validate_refresh_token(refresh_token, db)
-
-        post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
-
-        if not post_db:
-            sentry_logger.error('Post {id} not found', id=post_id)
-            raise PostNotFoundError()
-        
-        # prevents double likes from increasing post likes count
-        if post_repo_v1.get_like(user.id, post_id, db):
-            return
+    def like_post(user: User, post_id: UUID, db: Session) -> bool:
+        '''like post in one insert, a missing post fails the foreign key
+        instead of being read first, returns False if already liked'''
+        if settings.LIKE_BUFFER_ENABLED and PostServiceV1.buffer_like(
+            user, post_id, True, db
+        ):
+            return True
 
         try:
-            like: Like = Like(user_id=user.id, post_id=post_id)
-            post_repo_v1.like_post(like, db)
+            liked: bool = post_repo_v1.like_post(user.id, post_id, db)
             db.commit()
-            sentry_logger.info(
-                'Post {id} liked by user {id}', id=post_id, username=user.id
-            )
         except Exception as e:
             db.rollback()
+            if isinstance(e, IntegrityError):
+                sentry_logger.error('Post {id} not found', id=post_id)
+                raise PostNotFoundError()
+
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
                 'Internal server error occured while liking post {id}', id=post_id
             )
             raise ServerError() from e
 
+        if liked:
+            trending_counter.record(post_id)
+            sentry_logger.info(
+                'Post {id} liked by user {user_id}', id=post_id, user_id=user.id
+            )
+        return liked
+
     @staticmethod
     def like_comment(
         user: User,
         post_id: UUID,
         comment_id: UUID,
-        refresh_token: str,
         db: Session,
-    ):
-        _ = validate_refresh_token(refresh_token, db)
-
-        post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
-
-        if not post_db:
-            sentry_logger.error('Post {id} not found', id=post_id)
-            raise PostNotFoundError()
-
-        comment_db: Comment | None = post_repo_v1.get_comment_by_id(comment_id, db)
-
-        if not comment_db:
-            sentry_logger.error('Comment {id} not found', id=comment_id)
-            raise CommentNotFoundError()
-
-        # prevents double likes from increasing comment likes count
-        if post_repo_v1.get_comment_like(user.id, comment_id, db):
-            return
-
+    ) -> bool:
+        '''like comment in one insert that selects the comment of the post,
+        returns False if already liked'''
         try:
-            like: CommentLike = CommentLike(user_id=user.id, comment_id=comment_id)
-            post_repo_v1.like_comment(like, db)
+            liked: bool = post_repo_v1.like_comment(user.id, post_id, comment_id, db)
             db.commit()
-            sentry_logger.info(
-                'Comment {id} liked by {username}',
-                id=comment_id,
-                username=user.username,
-            )
         except Exception as e:
-            print(e)
             db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
@@ -573,43 +722,56 @@ class PostServiceV1:
             )
             raise ServerError() from e
 
+        if liked:
+            sentry_logger.info(
+                'Comment {id} liked by {username}',
+                id=comment_id,
+                username=user.username,
+            )
+            return liked
+
+        # nothing was inserted, tell an existing like from a missing target
+        PostServiceV1.check_post_comment(post_id, comment_id, db)
+        return liked
+
     @staticmethod
     def update_post(
         user: User,
         post_id: UUID,
         post_update: PostUpdateV1,
-        refresh_token: str,
         db: Session,
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
-        post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
-
-        if not post_db:
-            sentry_logger.error('Post {id} not found', id=post_id)
-            raise PostNotFoundError()
+        try:
+            post_row: Row | None = post_repo_v1.update_post(
+                post_id, user.id, post_update.model_dump(exclude_unset=True), db
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error(
+                'Internal server error occured while updating post {id}',
+                id=post_id,
+            )
+            raise ServerError() from e
 
-        if post_db.user_id != user.id:
+        if not post_row:
+            # nothing was updated, tell a missing post from another user's
+            if not post_repo_v1.post_exists(post_id, db):
+                sentry_logger.error('Post {id} not found', id=post_id)
+                raise PostNotFoundError()
             raise AuthorizationError()
 
+        sentry_logger.info('Post {id} updated', id=post_id)
         try:
-            post_update_dict: dict = post_update.model_dump(exclude_unset=True)
-
-            for k, v in post_update_dict.items():
-                setattr(post_db, k, v)
-            post_repo_v1.add_post(post_db, db)
-            db.commit()
-            sentry_logger.error('Post {id} updated', id=post_id)
-            post: Post = post_repo_v1.get_post_by_id(post_id, db)
-            post_read: PostReadV1 = PostReadV1(
-                **PostReadBaseV1.model_validate(post).model_dump(),
+            post_read: PostReadV1 = PostReadV1.from_db(
+                post_row,
                 display_name=user.display_name,
                 username=user.username,
-                likes=len(post.likes),
+                likes=post_row.likes,
             )
             return post_read
         except Exception as e:
-            db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
                 'Internal server error occured while updating post {id}',
@@ -618,27 +780,18 @@ class PostServiceV1:
             raise ServerError() from e
 
     @staticmethod
-    def unlike_post(user: User, post_id: UUID, refresh_token: str, db: Session):
-        _ = validate_refresh_token(refresh_token, db)
-
-        post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
-
-        if not post_db:
-            sentry_logger.error('Post {id} not found', id=post_id)
-            raise PostNotFoundError()
-        
-        like: Like | None = post_repo_v1.get_like(user.id, post_id, db)
-        
-        # prevents user from unliking post twice
-        if not like:
-            return
+    def unlike_post(
+        user: User, post_id: UUID, db: Session
+    ) -> bool:
+        '''unlike post in one delete, returns False if it was not liked'''
+        if settings.LIKE_BUFFER_ENABLED and PostServiceV1.buffer_like(
+            user, post_id, False, db
+        ):
+            return True
 
         try:
-            post_repo_v1.unlike_post(post_db, like, db)
+            unliked: bool = post_repo_v1.unlike_post(user.id, post_id, db)
             db.commit()
-            sentry_logger.info(
-                'Post {id} unliked by user {id}', id=post_id, username=user.id
-            )
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
@@ -647,55 +800,85 @@ class PostServiceV1:
             )
             raise ServerError() from e
 
+        if unliked:
+            trending_counter.record(post_id, -1)
+            sentry_logger.info(
+                'Post {id} unliked by user {user_id}', id=post_id, user_id=user.id
+            )
+            return unliked
+
+        # nothing was deleted, tell a missing like from a missing post
+        if not post_repo_v1.post_exists(post_id, db):
+            sentry_logger.error('Post {id} not found', id=post_id)
+            raise PostNotFoundError()
+        return unliked
+
     @staticmethod
     def unlike_comment(
         user: User,
         post_id: UUID,
         comment_id: UUID,
-        refresh_token: str,
         db: Session,
-    ):
-        _ = validate_refresh_token(refresh_token, db)
-        comment_like: CommentLike | None = post_repo_v1.get_comment_like(
-            user.id, comment_id, db
-        )
-
-        post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
-
-        if not post_db:
-            sentry_logger.error('Post {id} not found', id=post_id)
-            raise PostNotFoundError()
-
-        comment_db: Comment | None = post_repo_v1.get_comment_by_id(comment_id, db)
-
-        if not comment_db:
-            sentry_logger.error('Comment {id} not found', id=comment_id)
-            raise CommentNotFoundError()
-        
-        # prevents user from unliking comment twice
-        if not comment_like:
-            return
-
+    ) -> bool:
+        '''unlike comment in one delete, returns False if it was not liked'''
         try:
-            post_repo_v1.unlike_comment(comment_db, comment_like, db)
-            db.commit()
-            sentry_logger.info(
-                'Comment {id} unliked by user {id}',
-                id=comment_id,
-                username=user.id,
+            unliked: bool = post_repo_v1.unlike_comment(
+                user.id, post_id, comment_id, db
             )
+            db.commit()
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
-                'Internal server error occured while unliking post {id}', id=post_id
+                'Internal server error occured while unliking comment {id}',
+                id=comment_id,
             )
             raise ServerError() from e
 
+        if unliked:
+            sentry_logger.info(
+                'Comment {id} unliked by user {user_id}',
+                id=comment_id,
+                user_id=user.id,
+            )
+            return unliked
+
+        # nothing was deleted, tell a missing like from a missing target
+        PostServiceV1.check_post_comment(post_id, comment_id, db)
+        return unliked
+
     @staticmethod
-    def delete_post(post_id: UUID, user: User, refresh_token: str, db: Session):
-        _ = validate_refresh_token(refresh_token, db)
+    def buffer_like(user: User, post_id: UUID, liked: bool, db: Session) -> bool:
+        '''record a like intent for the background flush instead of writing
+        it, returns False when the buffer is full'''
+        if not post_repo_v1.post_exists(post_id, db):
+            sentry_logger.error('Post {id} not found', id=post_id)
+            raise PostNotFoundError()
+
+        previous: bool | None = like_buffer.state(user.id, post_id)
+        if not like_buffer.record(user.id, post_id, liked):
+            return False
+
+        # a repeated intent is not counted again
+        if previous is not liked:
+            trending_counter.record(post_id, 1 if liked else -1)
+        return True
 
+    @staticmethod
+    def check_post_comment(post_id: UUID, comment_id: UUID, db: Session):
+        '''raise not found errors after a like write changed nothing'''
+        if not post_repo_v1.post_exists(post_id, db):
+            sentry_logger.error('Post {id} not found', id=post_id)
+            raise PostNotFoundError()
+
+        comment_db: Comment | None = post_repo_v1.get_comment_by_id(comment_id, db)
+
+        if not comment_db or comment_db.post_id != post_id:
+            sentry_logger.error('Comment {id} not found', id=comment_id)
+            raise CommentNotFoundError()
+
+    @staticmethod
+    def delete_post(post_id: UUID, user: User, db: Session):
         post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
 
         if not post_db:
@@ -705,6 +888,7 @@ class PostServiceV1:
         try:
             post_repo_v1.delete_post(post_db, db)
             db.commit()
+            comment_page_cache.invalidate(post_id)
             sentry_logger.info('Post {id} deleted from database', id=post_id)
         except Exception as e:
             db.rollback()
@@ -716,9 +900,7 @@ class PostServiceV1:
             raise ServerError() from e
 
     @staticmethod
-    def delete_comment(post_id: UUID ,comment_id: UUID, refresh_token: str, db: Session):
-        _ = validate_refresh_token(refresh_token, db)
-
+    def delete_comment(post_id: UUID ,comment_id: UUID, db: Session):
         post_db: Post = post_repo_v1.get_post_by_id(post_id, db)
 
         if not post_db:
@@ -727,13 +909,14 @@ class PostServiceV1:
 
         comment_db: Comment = post_repo_v1.get_comment_by_id(comment_id, db)
 
-        if not comment_db:
+        if not comment_db or comment_db.post_id != post_id:
             sentry_logger.error('Comment {id} not found', id=comment_id)
             raise CommentNotFoundError()
 
         try:
             post_repo_v1.delete_comment(comment_db, db)
             db.commit()
+            comment_page_cache.invalidate(post_id)
             sentry_logger.info('Comment {id} deleted from database', id=comment_id)
         except Exception as e:
             db.rollback()
@@ -746,10 +929,8 @@ class PostServiceV1:
 
     @staticmethod
     def delete_post_image(
-        post_id: UUID, image_url: str, refresh_token: str, db: Session
+        post_id: UUID, image_url: str, db: Session
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         post_image: PostImage | None = post_repo_v1.get_post_image(
             image_url, post_id, db
         )
@@ -1,26 +1,43 @@
 import sentry_sdk
+import numpy as np
 from uuid import UUID
+from itertools import chain
 from pathlib import Path
+from time import perf_counter, sleep
+from datetime import datetime, timezone
 from fastapi import UploadFile
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 from sentry_sdk import logger as sentry_logger
 
 
 from app.core.config import settings
+from app.core.follow_graph import FollowGraph
+from app.schedules.celery_app import app as celery_app
 from app.models.users import User, Role
-from app.models.posts import Post, Comment
 from app.utils import write_file, validate_image
 from app.api.v1.schemas.images import ImageReadV1
 from app.models.images import Image, ProfileImage
-from app.core.security import validate_refresh_token
 from app.api.v1.repositories.user_repo import user_repo_v1
-from app.api.v1.repositories.post_repo import post_repo_v1
-from app.api.v1.schemas.posts import PostReadV1, CommentReadV1
+from app.api.v1.services.post_service import post_service_v1
+from app.api.v1.repositories.records import (
+    PostDetailRecord,
+    UserRecord,
+    CommentRecord,
+    UserSuggestionRecord,
+)
+from app.api.v1.schemas.posts import (
+    PostReadV1,
+    CommentReadV1,
+    post_list_adapter_v1,
+    comment_list_adapter_v1,
+)
 from app.api.v1.schemas.users import (
     UserReadV1,
     UserUpdateV1,
     RoleCreateV1,
     UserProfileV1,
+    UserSuggestionV1,
     CurrentUserProfileV1,
 )
 
@@ -48,17 +65,14 @@ class UserServiceV1:
     def get_users(
         user: User,
         db: Session,
-        refresh_token: str,
         nationality: str | None = None,
         sort: str | None = None,
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
     ) -> list[UserReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         try:
-            users_db: list[User] = user_repo_v1.get_users(
+            users_db: list[UserRecord] = user_repo_v1.get_users(
                 user.id, db, nationality, sort, order, offset, limit
             )
             if not users_db:
@@ -66,8 +80,8 @@ class UserServiceV1:
                 raise UsersNotFoundError()
 
             users: list[UserReadV1] = []
-            for user in users_db:
-                user_read = UserReadV1.model_validate(user)
+            for user_record in users_db:
+                user_read = UserReadV1.from_db(user_record)
                 users.append(user_read)
 
             sentry_logger.info('Users retrieved from database successfully')
@@ -81,10 +95,119 @@ class UserServiceV1:
             sentry_logger.error('Error occured retrieving users from database')
             raise ServerError() from e
 
+    @staticmethod
+    def get_follow_suggestions(
+        user: User,
+        db: Session,
+        offset: int = 0,
+        limit: int = 10,
+    ) -> list[UserSuggestionV1]:
+        try:
+            suggestions_db: list[UserSuggestionRecord] = (
+                user_repo_v1.get_follow_suggestions(user.id, db, offset, limit)
+            )
+            if not suggestions_db:
+                sentry_logger.error('No follow suggestions for user {id}', id=user.id)
+                raise UsersNotFoundError()
+
+            suggestions: list[UserSuggestionV1] = [
+                UserSuggestionV1.from_db(record, mutuals=record.mutuals)
+                for record in suggestions_db
+            ]
+
+            sentry_logger.info('Follow suggestions retrieved for user {id}', id=user.id)
+            return suggestions
+        except Exception as e:
+            if isinstance(e, UsersNotFoundError):
+                raise UsersNotFoundError()
+
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error('Error occured retrieving follow suggestions')
+            raise ServerError() from e
+
+    @staticmethod
+    def load_follow_graph(db: Session) -> tuple[list[UUID], FollowGraph]:
+        '''the active users and their follows as a csr graph, a user is
+        numbered by their position in the returned ids'''
+        user_ids: list[UUID] = user_repo_v1.get_graph_user_ids(db)
+
+        chunks: list[np.ndarray] = []
+        for rows in user_repo_v1.stream_follow_edges(
+            user_ids, db, settings.FOLLOW_SUGGESTION_EDGE_CHUNK_SIZE
+        ):
+            chunks.append(
+                np.fromiter(chain.from_iterable(rows), np.int32, 2 * len(rows))
+            )
+        db.commit()
+
+        edges = np.concatenate(chunks) if chunks else np.empty(0, np.int32)
+        graph = FollowGraph.from_edges(len(user_ids), edges[0::2], edges[1::2])
+        return user_ids, graph
+
+    @staticmethod
+    def compute_follow_suggestions(db: Session) -> int:
+        '''replace the follow suggestions of every active user with the
+        users followed by the users they follow, ranked by mutuals
+
+        the graph is loaded once, suggestions are computed and written for
+        FOLLOW_SUGGESTION_BATCH_SIZE users at a time with a commit per
+        batch, returns the number of suggestions written'''
+        rows: int = 0
+        start: float = perf_counter()
+
+        try:
+            user_ids, graph = UserServiceV1.load_follow_graph(db)
+            loaded: float = perf_counter() - start
+
+            batch_size: int = settings.FOLLOW_SUGGESTION_BATCH_SIZE
+            for first in range(0, graph.size, batch_size):
+                batch = np.arange(first, min(first + batch_size, graph.size))
+                owners, suggested, mutuals = graph.suggest(
+                    batch,
+                    settings.FOLLOW_SUGGESTION_TOP_K,
+                    settings.FOLLOW_SUGGESTION_MAX_FOLLOWING,
+                )
+                suggestions: list[dict] = [
+                    {
+                        'user_id': user_ids[owner],
+                        'suggested_id': user_ids[suggested_user],
+                        'mutuals': count,
+                    }
+                    for owner, suggested_user, count in zip(
+                        owners.tolist(), suggested.tolist(), mutuals.tolist()
+                    )
+                ]
+
+                user_repo_v1.replace_follow_suggestions(
+                    [user_ids[user] for user in batch.tolist()], suggestions, db
+                )
+                db.commit()
+                rows += len(suggestions)
+                sleep(settings.FOLLOW_SUGGESTION_THROTTLE)
+        except Exception as e:
+            db.rollback()
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error(
+                'Internal server error while computing follow suggestions'
+                ' after {count} suggestions',
+                count=rows,
+            )
+            raise ServerError() from e
+
+        sentry_logger.info(
+            '{rows} follow suggestions computed for {users} users and {edges}'
+            ' follows in {elapsed}s ({loaded}s loading the graph)',
+            rows=rows,
+            users=graph.size,
+            edges=len(graph.indices),
+            elapsed=round(perf_counter() - start, 3),
+            loaded=round(loaded, 3),
+        )
+        return rows
+
     @staticmethod
     def search_users(
         db: Session,
-        refresh_token: str,
         q: str,
         nationality: str | None = None,
         sort: str | None = None,
@@ -92,10 +215,8 @@ class UserServiceV1:
         offset: int = 0,
         limit: int = 10,
     ) -> list[UserReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         try:
-            users_db: list[User] = user_repo_v1.search_users(
+            users_db: list[UserRecord] = user_repo_v1.search_users(
                 db, q, nationality, sort, order, offset, limit
             )
             if not users_db:
@@ -103,8 +224,8 @@ class UserServiceV1:
                 raise UsersNotFoundError()
 
             users: list[UserReadV1] = []
-            for user in users_db:
-                user_read = UserReadV1.model_validate(user)
+            for user_record in users_db:
+                user_read = UserReadV1.from_db(user_record)
                 users.append(user_read)
 
             sentry_logger.info('Searched users retrieved from database successfully')
@@ -148,11 +269,8 @@ class UserServiceV1:
 
     @staticmethod
     def get_user_by_username(
-        username: str, db: Session, refresh_token: str = None
+        username: str, db: Session
     ) -> User:
-        if refresh_token:
-            _ = validate_refresh_token(refresh_token, db)
-
         user = user_repo_v1.get_user_by_username(username, db)
         if not user:
             sentry_logger.error(
@@ -163,12 +281,10 @@ class UserServiceV1:
 
     @staticmethod
     def get_user_profile(
-        username: str, refresh_token: str, db: Session
+        username: str, db: Session
     ) -> UserProfileV1:
         '''get other user profile with username
         the age of the owner's profile is not visible to public'''
-        _ = validate_refresh_token(refresh_token, db)
-
         user = user_repo_v1.get_user_by_username(username, db)
         if not user:
             sentry_logger.error(
@@ -179,26 +295,22 @@ class UserServiceV1:
         # get user followers and following
         followers, following = user.followers, user.following
 
-        user_read = UserReadV1.model_validate(user)
-        user_profile = UserProfileV1(
-            **user_read.model_dump(), followers=len(followers), following=len(following)
+        user_profile = UserProfileV1.from_db(
+            user, followers=len(followers), following=len(following)
         )
 
         return user_profile
 
     @staticmethod
     def get_current_user_profile(
-        user: User, refresh_token: str, db: Session
+        user: User, db: Session
     ) -> CurrentUserProfileV1:
         '''get current user profile with username and age'''
-        _ = validate_refresh_token(refresh_token, db)
-
         # get user followers and following
         followers, following = user.followers, user.following
 
-        user_read = UserReadV1.model_validate(user)
-        user_profile = CurrentUserProfileV1(
-            **user_read.model_dump(),
+        user_profile = CurrentUserProfileV1.from_db(
+            user,
             followers=len(followers),
             following=len(following),
             age=user.age,
@@ -213,10 +325,8 @@ class UserServiceV1:
 
     @staticmethod
     def get_followers(
-        current_user: User, username: str, refresh_token: str, db: Session
+        current_user: User, username: str, db: Session
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         user_id = current_user.id
 
         try:
@@ -262,10 +372,8 @@ class UserServiceV1:
 
     @staticmethod
     def get_followings(
-        current_user: User, username: str, refresh_token: str, db: Session
+        current_user: User, username: str, db: Session
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         user_id = current_user.id
 
         try:
@@ -315,23 +423,21 @@ class UserServiceV1:
     def get_user_posts(
         current_user: User,
         username: str,
-        refresh_token: str,
         db: Session,
         sort: str | None = None,
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
+        after: UUID | None = None,
     ) -> list[PostReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         user_id = current_user.id
 
         try:
             if current_user.username == username:
                 '''select all posts made by the current logged in user'''
 
-                posts_db: list = user_repo_v1.get_current_user_posts(
-                    user_id, db, sort, order, offset, limit
+                posts_db: list[PostDetailRecord] = user_repo_v1.get_current_user_posts(
+                    user_id, db, sort, order, offset, limit, after
                 )
             else:
                 '''select all posts by the user with the provided username
@@ -347,40 +453,21 @@ class UserServiceV1:
                     raise UserNotFoundError()
                 user_id = user.id
 
-                posts_db: list = user_repo_v1.get_user_posts(
-                    current_user, user, user_id, db, sort, order, offset, limit,
+                posts_db: list[PostDetailRecord] = user_repo_v1.get_user_posts(
+                    current_user, user, user_id, db, sort, order, offset, limit, after
                 )
 
             if not posts_db:
                 sentry_logger.error('User {id} posts not found', id=user_id)
                 raise PostsNotFoundError()
 
-            user_posts: list[PostReadV1] = []
-            for post_db in posts_db:
-                (
-                    id,
-                    title,
-                    content,
-                    visibility,
-                    created_at,
-                    display_name,
-                    username,
-                ) = post_db
-
-                post: Post = post_repo_v1.get_post_by_id(id, db)
-
-                post_read = PostReadV1(
-                    id=id,
-                    title=title,
-                    content=content,
-                    visibility=visibility,
-                    created_at=created_at,
-                    display_name=display_name,
-                    username=username,
-                    comments=len(post.comments),
-                    likes=len(post.likes),
-                )
-                user_posts.append(post_read)
+            post_rows: list[dict] = [record._asdict() for record in posts_db]
+            post_rows = post_service_v1.mark_liked_posts(
+                current_user.id, post_rows, db
+            )
+            user_posts: list[PostReadV1] = (
+                post_list_adapter_v1.validate_python(post_rows)
+            )
 
             sentry_logger.info('User {id} posts retrieved from database', id=user_id)
             return user_posts
@@ -402,19 +489,16 @@ class UserServiceV1:
     def get_liked_post(
         current_user: User,
         username: str,
-        refresh_token: str,
         db: Session,
         offset: int = 0,
         limit: int = 10,
     ) -> list[PostReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         user_id = current_user.id
 
         try:
             '''only query db if current user tries to get other user's liked posts'''
             if current_user.username == username:
-                liked_posts: list = user_repo_v1.get_liked_posts(
+                liked_posts: list[PostDetailRecord] = user_repo_v1.get_liked_posts(
                     current_user.id, db, offset, limit
                 )
             else:
@@ -427,7 +511,7 @@ class UserServiceV1:
                     raise UserNotFoundError()
                 user_id = user.id
 
-                liked_posts: list = user_repo_v1.get_liked_posts(
+                liked_posts: list[PostDetailRecord] = user_repo_v1.get_liked_posts(
                     user.id, db, offset, limit
                 )
 
@@ -435,32 +519,13 @@ class UserServiceV1:
                 sentry_logger.error('User {id} posts not found', id=user_id)
                 raise PostsNotFoundError()
 
-            user_posts: list[PostReadV1] = []
-            for post_db in liked_posts:
-                (
-                    display_name,
-                    username,
-                    id,
-                    title,
-                    content,
-                    visibility,
-                    created_at,
-                ) = post_db
-
-                post: Post = post_repo_v1.get_post_by_id(id, db)
-
-                post_read = PostReadV1(
-                    id=id,
-                    title=title,
-                    content=content,
-                    visibility=visibility,
-                    created_at=created_at,
-                    display_name=display_name,
-                    username=username,
-                    comments=len(post.comments),
-                    likes=len(post.likes),
-                )
-                user_posts.append(post_read)
+            post_rows: list[dict] = [record._asdict() for record in liked_posts]
+            post_rows = post_service_v1.mark_liked_posts(
+                current_user.id, post_rows, db
+            )
+            user_posts: list[PostReadV1] = (
+                post_list_adapter_v1.validate_python(post_rows)
+            )
 
             sentry_logger.info('User {id} posts retrieved from database', id=user_id)
             return user_posts
@@ -482,22 +547,19 @@ class UserServiceV1:
     def get_user_comments(
         current_user: User,
         username: str,
-        refresh_token: str,
         db: Session,
         sort: str | None = None,
         order: str | None = None,
         offset: int = 0,
         limit: int = 10,
     ) -> list[CommentReadV1]:
-        _ = validate_refresh_token(refresh_token, db)
-
         user_id = current_user.id
 
         try:
             '''only query db if current user tries to get otheruser's followings'''
             if current_user.username == username:
                 '''get current user's comments'''
-                comments: list = user_repo_v1.get_user_comments(
+                comments: list[CommentRecord] = user_repo_v1.get_user_comments(
                     current_user.id, db, sort, order, offset, limit
                 )
             else:
@@ -511,7 +573,7 @@ class UserServiceV1:
                     raise UserNotFoundError()
                 user_id = user.id
 
-                comments: list = user_repo_v1.get_user_comments(
+                comments: list[CommentRecord] = user_repo_v1.get_user_comments(
                     user.id, db, sort, order, offset, limit
                 )
 
@@ -519,19 +581,13 @@ class UserServiceV1:
                 sentry_logger.error('Comments for User {id} not found', id=user_id)
                 raise CommentsNotFoundError()
 
-            user_comments: list[CommentReadV1] = []
-            for comment_db in comments:
-                comment_id, content, display_name, username, created_at = comment_db
-                comment: Comment = post_repo_v1.get_comment_by_id(comment_id, db)
-                comment_read = CommentReadV1(
-                    id=comment_id,
-                    content=content,
-                    display_name=display_name,
-                    username=username,
-                    created_at=created_at,
-                    likes=len(comment.comment_likes),
-                )
-                user_comments.append(comment_read)
+            comment_rows: list[dict] = [record._asdict() for record in comments]
+            comment_rows = post_service_v1.mark_liked_comments(
+                current_user.id, comment_rows, db
+            )
+            user_comments: list[CommentReadV1] = (
+                comment_list_adapter_v1.validate_python(comment_rows)
+            )
 
             sentry_logger.info('User {id} comments retrieved from database', id=user_id)
             return user_comments
@@ -553,12 +609,9 @@ class UserServiceV1:
     async def get_user_avatar(
         current_user: User,
         username: User,
-        refresh_token: str,
         image_url: str,
         db: Session,
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         user_id = current_user.id
 
         try:
@@ -611,53 +664,52 @@ class UserServiceV1:
         user_repo_v1.add_user(user, db)
 
     @staticmethod
-    def follow_user(current_user: User, username: str, refresh_token: str, db: Session):
-        _ = validate_refresh_token(refresh_token, db)
-
-        user: User = user_repo_v1.get_user_by_username(username, db)
-
-        if not user:
-            sentry_logger.error(
-                'User not found while attempting to follow {username}',
-                username=username,
-            )
-            raise UserNotFoundError()
-
+    def follow_user(
+        current_user: User, username: str, db: Session
+    ) -> bool:
+        '''follow user in one insert, returns False if already following'''
         '''prevents users from following themselves'''
         if current_user.username == username:
             raise UserFollowError()
 
-        '''ensures idempotency by checking if the current user is already following user'''
-        if user in current_user.following:
-            return
-
         try:
-            user_repo_v1.follow_user(current_user, user, db)
+            followed: bool = user_repo_v1.follow_user(current_user.id, username, db)
             db.commit()
-            sentry_logger.info(
-                '{current_user} followed {user} successfully',
-                current_user=current_user,
-                user=user.username,
-            )
+            # the loaded collection does not see the core insert
+            db.expire(current_user, ['following'])
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
-                'Internal server error occured while {current_user_id} attempted to follow user {user_id}',
+                'Internal server error occured while {current_user_id} attempted to follow user {username}',
                 current_user_id=current_user.id,
-                user_id=user.id,
+                username=username,
             )
             raise ServerError() from e
 
+        if followed:
+            sentry_logger.info(
+                '{current_user} followed {user} successfully',
+                current_user=current_user.username,
+                user=username,
+            )
+            return followed
+
+        '''nothing was inserted, tell an existing follow from a missing user'''
+        if not user_repo_v1.get_user_by_username(username, db):
+            sentry_logger.error(
+                'User not found while attempting to follow {username}',
+                username=username,
+            )
+            raise UserNotFoundError()
+        return followed
+
     @staticmethod
     async def upload_image(
-        refresh_token: str,
         user: User,
         image_uploads: list[UploadFile],
         db: Session,
     ) -> ImageReadV1:
-        _ = validate_refresh_token(refresh_token, db)
-
         # validate file uploaded to ensure an image is uploaded
         for i in image_uploads:
             if not await validate_image(i):
@@ -720,10 +772,8 @@ class UserServiceV1:
 
     @staticmethod
     def update_user(
-        user_update: UserUpdateV1, user: User, refresh_token: str, db: Session
-    ) -> User:
-        _ = validate_refresh_token(refresh_token, db)
-
+        user_update: UserUpdateV1, user: User, db: Session
+    ) -> UserReadV1:
         if user_update.email and user_repo_v1.get_user_by_email(user_update.email, db):
             sentry_logger.error(
                 'User with email {email} exists', email=user_update.email
@@ -739,13 +789,10 @@ class UserServiceV1:
             )
             raise UserExistsError()
 
-        user_update_dict: dict = user_update.model_dump(exclude_unset=True)
-
-        for k, v in user_update_dict.items():
-            setattr(user, k, v)
-
         try:
-            user_repo_v1.add_user(user, db)
+            user_row: Row = user_repo_v1.update_user(
+                user.id, user_update.model_dump(exclude_unset=True), db
+            )
             sentry_logger.info('User {id} profile updated', id=user.id)
             db.commit()
         except Exception as e:
@@ -757,70 +804,145 @@ class UserServiceV1:
             )
             raise ServerError() from e
 
-        return user_repo_v1.get_user_by_id(user.id, db)
+        return UserReadV1.from_db(user_row)
 
     @staticmethod
     def unfollow_user(
-        current_user: User, username: str, refresh_token: str, db: Session
-    ):
-        _ = validate_refresh_token(refresh_token, db)
-
-        user: User = user_repo_v1.get_user_by_username(username, db)
-
-        if not user:
-            sentry_logger.error(
-                'User not found while attempting to follow {username}',
-                username=username,
-            )
-            raise UserNotFoundError()
-
+        current_user: User, username: str, db: Session
+    ) -> bool:
+        '''unfollow user in one delete, returns False if not following'''
         '''prevents users from unfollowing themselves'''
         if current_user.username == username:
             raise UserUnfollowError()
 
-        '''ensures idempotency by checking if the current user is already not following user'''
-        if user not in current_user.following:
-            return
-
         try:
-            user_repo_v1.unfollow_user(current_user, user, db)
+            unfollowed: bool = user_repo_v1.unfollow_user(current_user.id, username, db)
             db.commit()
-            sentry_logger.info(
-                '{current_user} unfollowed {user} successfully',
-                current_user=current_user,
-                user=user.username,
-            )
+            # the loaded collection does not see the core delete
+            db.expire(current_user, ['following'])
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
-                'Internal server error occured while user {current_user_id} attempted to unfollow user {user_id}',
+                'Internal server error occured while user {current_user_id} attempted to unfollow user {username}',
                 current_user_id=current_user.id,
-                user_id=user.id,
+                username=username,
             )
             raise ServerError() from e
 
+        if unfollowed:
+            sentry_logger.info(
+                '{current_user} unfollowed {user} successfully',
+                current_user=current_user.username,
+                user=username,
+            )
+            return unfollowed
+
+        '''nothing was deleted, tell a missing follow from a missing user'''
+        if not user_repo_v1.get_user_by_username(username, db):
+            sentry_logger.error(
+                'User not found while attempting to unfollow {username}',
+                username=username,
+            )
+            raise UserNotFoundError()
+        return unfollowed
+
     @staticmethod
-    def delete_user_accounts(db: Session):
-        '''deletes user accounts 30 days after deactivation'''
+    def delete_user_accounts(db: Session) -> int:
+        '''deletes user accounts 30 days after deactivation
+
+        users are purged USER_PURGE_BATCH_SIZE at a time, their rows are
+        deleted children first in chunks of USER_PURGE_CHUNK_SIZE with a
+        commit per chunk so no statement holds locks on the hot tables for
+        long, image files are removed afterwards by a celery task'''
+        now: datetime = datetime.now(timezone.utc)
+        users: int = 0
+        rows: int = 0
+        files: int = 0
+        start: float = perf_counter()
+
         try:
-            user_repo_v1.delete_user(db)
-            db.commit()
-            sentry_logger.info('User accounts deleted permanently')
+            while True:
+                user_ids: list[UUID] = user_repo_v1.get_purgeable_user_ids(
+                    now, db, settings.USER_PURGE_BATCH_SIZE
+                )
+                if not user_ids:
+                    break
+
+                profile_images, post_images = user_repo_v1.get_purge_images(
+                    user_ids, db
+                )
+                image_ids: list[UUID] = [
+                    image_id for image_id, _ in profile_images + post_images
+                ]
+
+                purge_conditions: list = user_repo_v1.get_purge_conditions(user_ids)
+                for table, condition, counter in purge_conditions:
+                    while True:
+                        count: int = user_repo_v1.delete_rows(
+                            table,
+                            condition,
+                            db,
+                            settings.USER_PURGE_CHUNK_SIZE,
+                            counter,
+                        )
+                        db.commit()
+                        rows += count
+
+                        if count < settings.USER_PURGE_CHUNK_SIZE:
+                            break
+                        sleep(settings.USER_PURGE_THROTTLE)
+
+                image_urls: list[str] = user_repo_v1.delete_orphan_images(
+                    image_ids, db
+                )
+                db.commit()
+                rows += len(image_urls)
+
+                # files are only removed once no row references them, an image
+                # is shared by filename so it may sit in either upload folder
+                profile_path: Path = Path(settings.PROFILE_IMAGE_PATH).resolve()
+                post_path: Path = Path(settings.POST_IMAGE_PATH).resolve()
+                filepaths: list[str] = [
+                    f'{str(path)}\\{url}'
+                    for url in image_urls
+                    for path in (profile_path, post_path)
+                ]
+
+                if filepaths:
+                    celery_app.send_task(
+                        'app.schedules.celery_tasks.delete_image_files',
+                        args=[filepaths],
+                    )
+                    files += len(image_urls)
+
+                users += len(user_ids)
         except Exception as e:
             db.rollback()
             sentry_sdk.capture_exception(e)
             sentry_logger.error(
                 'Internal server error while deleting user accounts permanently'
+                ' after {count} users',
+                count=users,
             )
             raise ServerError() from e
 
+        elapsed: float = perf_counter() - start
+        sentry_logger.info(
+            '{users} user accounts deleted permanently with {rows} rows and '
+            '{files} image files in {elapsed}s ({rate} users/s)',
+            users=users,
+            rows=rows,
+            files=files,
+            elapsed=round(elapsed, 3),
+            rate=round(users / elapsed, 1) if elapsed else users,
+        )
+        return users
+
     @staticmethod
     def delete_profile_image(
-        user: User, image_url: str, refresh_token: str, db: Session
+        user: User, image_url: str, db: Session
     ):
-        _ = validate_refresh_token(refresh_token, db)
-
         profile_image: ProfileImage | None = user_repo_v1.get_profile_image(
             image_url, user.id, db
         )
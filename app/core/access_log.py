@@ -0,0 +1,129 @@
+import sys
+import random
+import asyncio
+import orjson
+import sentry_sdk
+from time import time
+from collections import deque
+from sentry_sdk import logger as sentry_logger
+
+from app.core.config import settings
+
+
+class AccessLogger:
+    '''structured access log kept in an in-memory ring buffer
+
+    record() is called on the request path and only appends a tuple to a
+    bounded deque (atomic under the GIL, no lock), the background flusher
+    drains the buffer in batches and writes one JSON document per line'''
+
+    fields: tuple = ('ts', 'method', 'route', 'status', 'latency_us', 'user_id')
+
+    def __init__(
+        self,
+        buffer_size: int,
+        sample_rate: float,
+        exclude_paths: set[str],
+        flush_interval: float,
+        flush_batch_size: int,
+        path: str | None = None,
+    ):
+        self.buffer: deque = deque(maxlen=buffer_size)
+        self.sample_rate = sample_rate
+        self.exclude_paths = frozenset(exclude_paths)
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.path = path
+        self.dropped: int = 0
+        self._task: asyncio.Task | None = None
+
+    def is_excluded(self, path: str) -> bool:
+        '''cheap pre-check done before the request is timed'''
+        return path in self.exclude_paths
+
+    def record(
+        self,
+        method: str,
+        route: str,
+        status: int,
+        latency_us: int,
+        user_id: str | None = None,
+    ):
+        # server errors are always kept regardless of the sample rate
+        if (
+            status < 500
+            and self.sample_rate < 1.0
+            and random.random() >= self.sample_rate
+        ):
+            return
+
+        if len(self.buffer) == self.buffer.maxlen:
+            # the oldest record is evicted by the deque
+            self.dropped += 1
+        self.buffer.append((time(), method, route, status, latency_us, user_id))
+
+    def drain(self) -> list[tuple]:
+        '''pop at most flush_batch_size records from the buffer'''
+        records: list[tuple] = []
+        popleft = self.buffer.popleft
+        for _ in range(min(len(self.buffer), self.flush_batch_size)):
+            records.append(popleft())
+        return records
+
+    def serialize(self, records: list[tuple]) -> bytes:
+        fields: tuple = self.fields
+        return b''.join(
+            orjson.dumps(dict(zip(fields, r)), option=orjson.OPT_APPEND_NEWLINE)
+            for r in records
+        )
+
+    def write(self, data: bytes):
+        if not self.path:
+            sys.stdout.buffer.write(data)
+            sys.stdout.flush()
+            return
+
+        with open(self.path, 'ab') as f:
+            f.write(data)
+
+    async def flush(self):
+        while self.buffer:
+            records: list[tuple] = self.drain()
+            try:
+                await asyncio.to_thread(self.write, self.serialize(records))
+            except Exception as e:
+                sentry_sdk.capture_exception(e)
+                sentry_logger.error(
+                    'Error occured while writing {count} access log records',
+                    count=len(records),
+                )
+                return
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+access_logger = AccessLogger(
+    buffer_size=settings.ACCESS_LOG_BUFFER_SIZE,
+    sample_rate=settings.ACCESS_LOG_SAMPLE_RATE,
+    exclude_paths=settings.ACCESS_LOG_EXCLUDE_PATHS,
+    flush_interval=settings.ACCESS_LOG_FLUSH_INTERVAL,
+    flush_batch_size=settings.ACCESS_LOG_FLUSH_BATCH_SIZE,
+    path=settings.ACCESS_LOG_PATH,
+)
@@ -0,0 +1,140 @@
+import asyncio
+from collections import deque
+from sqlalchemy.pool import Pool
+
+from app.core.config import settings
+from app.database.session import db_engine
+
+
+class AdmissionController:
+    '''bounded concurrency in front of the database pool
+
+    a request holds one of slots (the pool capacity) while it runs, others
+    wait in line without blocking the event loop, critical routes first and
+    expensive routes last, expensive routes hold at most expensive_share of
+    the slots and are shed while the pool has no free connection
+
+    a request is shed (503) as soon as its expected wait, the requests
+    ahead of it times the average service time per slot, is over the
+    budget of its priority, or once it has waited that long, so under
+    overload latency stays near the budgets instead of growing with the
+    queue until the pool timeout'''
+
+    priorities: tuple = ('critical', 'normal', 'expensive')
+
+    def __init__(
+        self,
+        slots: int,
+        budgets: dict[str, float],
+        expensive_share: float,
+        routes: dict[str, str],
+        exempt_paths: set[str],
+        pool: Pool | None = None,
+        pool_capacity: int = 0,
+    ):
+        self.slots = slots
+        self.limits: list[int] = [slots, slots, max(1, int(slots * expensive_share))]
+        self.budgets: list[float] = [budgets[p] for p in self.priorities]
+        # 'METHOD path' -> priority, other routes are normal
+        self.routes: dict[str, int] = {
+            route: self.priorities.index(priority)
+            for route, priority in routes.items()
+        }
+        self.exempt_paths = frozenset(exempt_paths)
+        self.pool = pool
+        self.pool_capacity = pool_capacity
+
+        self.in_flight: list[int] = [0, 0, 0]
+        self.waiters: list[deque] = [deque(), deque(), deque()]
+        # moving averages in seconds
+        self.service_time: float = 0.05
+        self.queue_time: float = 0.0
+        self.shed: int = 0
+
+    def priority(self, method: str, path: str) -> int | None:
+        '''None for paths that are not admitted, e.g. /health'''
+        if path in self.exempt_paths:
+            return None
+        return self.routes.get(f'{method} {path}', 1)
+
+    def can_run(self, priority: int) -> bool:
+        return (
+            sum(self.in_flight) < self.slots
+            and self.in_flight[priority] < self.limits[priority]
+        )
+
+    def expected_wait(self, priority: int) -> float:
+        ahead: int = sum(len(w) for w in self.waiters[: priority + 1])
+        return (ahead + 1) * self.service_time / self.limits[priority]
+
+    def pool_saturated(self) -> bool:
+        # background workers share the pool, checkedout counts them too
+        return self.pool is not None and self.pool.checkedout() >= self.pool_capacity
+
+    def reject(self) -> bool:
+        self.shed += 1
+        return False
+
+    def forget(self, priority: int, waiter: asyncio.Future):
+        # release() drops cancelled waiters it comes across
+        if waiter in self.waiters[priority]:
+            self.waiters[priority].remove(waiter)
+
+    async def acquire(self, priority: int) -> bool:
+        '''False when the request is shed'''
+        if priority == 2 and self.pool_saturated():
+            return self.reject()
+
+        if self.can_run(priority) and not any(self.waiters[: priority + 1]):
+            self.in_flight[priority] += 1
+            return True
+
+        budget: float = self.budgets[priority]
+        if self.expected_wait(priority) > budget:
+            return self.reject()
+
+        loop = asyncio.get_running_loop()
+        waiter: asyncio.Future = loop.create_future()
+        self.waiters[priority].append(waiter)
+        start: float = loop.time()
+        try:
+            await asyncio.wait_for(waiter, budget)
+        except asyncio.TimeoutError:
+            # the slot may have been handed over as the wait timed out
+            if waiter.cancelled():
+                self.forget(priority, waiter)
+                return self.reject()
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self.forget(priority, waiter)
+            else:
+                self.release(priority)
+            raise
+
+        self.queue_time += 0.1 * (loop.time() - start - self.queue_time)
+        return True
+
+    def release(self, priority: int, service_time: float | None = None):
+        self.in_flight[priority] -= 1
+        if service_time is not None:
+            self.service_time += 0.1 * (service_time - self.service_time)
+
+        # hand the free slots to the waiters in priority order
+        for p, waiters in enumerate(self.waiters):
+            while waiters and self.can_run(p):
+                waiter: asyncio.Future = waiters.popleft()
+                if waiter.done():
+                    continue
+                self.in_flight[p] += 1
+                waiter.set_result(None)
+
+
+admission_controller = AdmissionController(
+    slots=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+    budgets=settings.ADMISSION_LATENCY_BUDGETS,
+    expensive_share=settings.ADMISSION_EXPENSIVE_SHARE,
+    routes=settings.ADMISSION_ROUTE_PRIORITIES,
+    exempt_paths=settings.ADMISSION_EXEMPT_PATHS,
+    pool=db_engine.pool,
+    pool_capacity=settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+)
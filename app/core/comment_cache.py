@@ -0,0 +1,58 @@
+from uuid import UUID
+from time import time
+
+from app.core.config import settings
+
+
+class CommentPageCache:
+    '''first comment pages of hot posts
+
+    the first page of a post with at least min_comments comments is kept
+    for ttl seconds per (sort, order, limit), so the pages most requested
+    on a viral post are served without reading the comments and their
+    replies, later pages and cursor pages are always read
+
+    creating or deleting a comment of a post drops its pages, like counts
+    and writes made by other processes are at most ttl seconds old, at
+    most size posts are kept'''
+
+    def __init__(self, size: int, ttl: float, min_comments: int):
+        self.size = size
+        self.ttl = ttl
+        self.min_comments = min_comments
+        # post_id -> (sort, order, limit) -> (expires_at, page)
+        self.pages: dict[UUID, dict[tuple, tuple[float, list]]] = {}
+        self.hits: int = 0
+
+    def cacheable(
+        self, comment_count: int, offset: int = 0, after: UUID | None = None
+    ) -> bool:
+        return (
+            self.size > 0
+            and comment_count >= self.min_comments
+            and offset == 0
+            and after is None
+        )
+
+    def get(self, post_id: UUID, key: tuple) -> list | None:
+        cached: tuple | None = self.pages.get(post_id, {}).get(key)
+        if cached is None or cached[0] <= time():
+            return None
+        self.hits += 1
+        return cached[1]
+
+    def put(self, post_id: UUID, key: tuple, page: list) -> None:
+        if post_id not in self.pages and len(self.pages) >= self.size:
+            # evict the oldest post, dicts keep insertion order
+            self.pages.pop(next(iter(self.pages)))
+        self.pages.setdefault(post_id, {})[key] = (time() + self.ttl, page)
+
+    def invalidate(self, post_id: UUID) -> None:
+        self.pages.pop(post_id, None)
+
+
+comment_page_cache = CommentPageCache(
+    size=settings.COMMENT_CACHE_SIZE,
+    ttl=settings.COMMENT_CACHE_TTL,
+    min_comments=settings.COMMENT_CACHE_MIN_COMMENTS,
+)
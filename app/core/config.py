@@ -17,6 +17,10 @@ class Settings(BaseSettings):
     # DB URL
     DATABASE_URL: str
     WORKER_DATABASE_URL: str
+    # api connection pool, TIMEOUT is in seconds
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
 
     # TEST DB URL
     TEST_DATABASE_URL: str
@@ -33,6 +37,10 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_TIME: int
     REFRESH_TOKEN_SECRET_KEY: str
     REFRESH_TOKEN_EXPIRE_TIME: int
+    # verified access tokens kept in memory until they expire
+    ACCESS_TOKEN_CACHE_SIZE: int = 10000
+    # seconds between reads of sessions revoked by other processes
+    SESSION_REVOCATION_SYNC_INTERVAL: float = 5.0
 
     #Admin login credentials
     ADMIN_DISPLAY_NAME: str
@@ -50,5 +58,139 @@ class Settings(BaseSettings):
     # Sentry dsn
     SENTRY_SDK_DSN: str
 
+    # Access log
+    # ACCESS_LOG_PATH unset writes json lines to stdout
+    ACCESS_LOG_ENABLED: bool = True
+    ACCESS_LOG_PATH: str | None = None
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_EXCLUDE_PATHS: set[str] = {'/health'}
+    ACCESS_LOG_BUFFER_SIZE: int = 10000
+    ACCESS_LOG_FLUSH_INTERVAL: float = 1.0
+    ACCESS_LOG_FLUSH_BATCH_SIZE: int = 1000
+
+    # Refresh token cleanup
+    # tokens are deleted in short transactions of at most BATCH_SIZE rows
+    # with THROTTLE seconds between them, INTERVAL is in minutes
+    TOKEN_CLEANUP_BATCH_SIZE: int = 1000
+    TOKEN_CLEANUP_MAX_BATCHES: int = 500
+    TOKEN_CLEANUP_THROTTLE: float = 0.05
+    TOKEN_CLEANUP_INTERVAL: int = 15
+
+    # Refresh token partitioning
+    # read by the migrations, set it before running alembic upgrade
+    # daily partitions are created PARTITIONS_AHEAD days beyond the refresh
+    # token lifetime and expired ones are dropped instead of row deletes
+    REFRESH_TOKEN_PARTITIONING: bool = False
+    REFRESH_TOKEN_PARTITIONS_AHEAD: int = 3
+
+    # User purge
+    # deactivated users are purged BATCH_SIZE at a time and their rows are
+    # deleted in chunks of CHUNK_SIZE with THROTTLE seconds between chunks
+    USER_PURGE_BATCH_SIZE: int = 100
+    USER_PURGE_CHUNK_SIZE: int = 5000
+    USER_PURGE_THROTTLE: float = 0.05
+
+    # Like buffer
+    # post likes and unlikes are kept in memory and written in bulk every
+    # FLUSH_INTERVAL seconds, requests write directly once MAX_SIZE
+    # intents are pending
+    LIKE_BUFFER_ENABLED: bool = False
+    LIKE_BUFFER_MAX_SIZE: int = 100000
+    LIKE_BUFFER_FLUSH_INTERVAL: float = 0.2
+    LIKE_BUFFER_FLUSH_BATCH_SIZE: int = 5000
+
+    # Ranked feed
+    # candidates are the newest CANDIDATE_LIMIT feed posts of the last
+    # CANDIDATE_WINDOW hours, affinity counts the viewer's likes and
+    # comments of the last AFFINITY_WINDOW days, HALF_LIFE is in hours
+    FEED_CANDIDATE_WINDOW: int = 72
+    FEED_CANDIDATE_LIMIT: int = 2000
+    FEED_AFFINITY_WINDOW: int = 90
+    FEED_RECENCY_HALF_LIFE: float = 6.0
+    FEED_RECENCY_WEIGHT: float = 1.0
+    FEED_ENGAGEMENT_WEIGHT: float = 1.0
+    FEED_AFFINITY_WEIGHT: float = 1.0
+    FEED_COMMENT_WEIGHT: float = 2.0
+
+    # Trending
+    # likes and comments of the last WINDOW minutes are counted in memory,
+    # the TOP_K posts and hashtags are ranked every REFRESH_INTERVAL seconds
+    # from the CANDIDATE_LIMIT most active posts, unlikes count -1
+    TRENDING_WINDOW: int = 60
+    TRENDING_TOP_K: int = 50
+    TRENDING_CANDIDATE_LIMIT: int = 5000
+    TRENDING_REFRESH_INTERVAL: float = 30.0
+    TRENDING_COMMENT_WEIGHT: int = 2
+
+    # Follow suggestions
+    # computed daily by a celery task for BATCH_SIZE users at a time, only
+    # the first MAX_FOLLOWING follows of a user and of each user they follow
+    # are expanded and the TOP_K suggestions with most mutuals are kept
+    FOLLOW_SUGGESTION_TOP_K: int = 20
+    FOLLOW_SUGGESTION_MAX_FOLLOWING: int = 200
+    FOLLOW_SUGGESTION_BATCH_SIZE: int = 1000
+    FOLLOW_SUGGESTION_EDGE_CHUNK_SIZE: int = 100000
+    FOLLOW_SUGGESTION_THROTTLE: float = 0.05
+
+    # Post batch reads
+    # /posts/batch/ returns at most MAX_SIZE posts per request
+    POST_BATCH_MAX_SIZE: int = 100
+
+    # Comment threads
+    # a page of comments loads THREAD_DEPTH levels of replies, the first
+    # REPLY_LIMIT replies of each comment, first pages of posts with at
+    # least CACHE_MIN_COMMENTS comments are cached for CACHE_TTL seconds
+    COMMENT_THREAD_DEPTH: int = 2
+    COMMENT_REPLY_LIMIT: int = 3
+    COMMENT_CACHE_SIZE: int = 1000
+    COMMENT_CACHE_TTL: float = 5.0
+    COMMENT_CACHE_MIN_COMMENTS: int = 100
+
+    # Rate limiting
+    # requests to the routes of RATE_LIMITS are limited per user, or per
+    # client address without a valid access token, to REQUESTS every PERIOD
+    # seconds, a client may send REQUESTS at once and then one every PERIOD
+    # / REQUESTS seconds, routes are 'METHOD path' with path parameters
+    RATE_LIMIT_ENABLED: bool = False
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMITS: dict[str, tuple[int, float]] = {
+        'POST /api/v1/auth/sign-up/': (5, 60.0),
+        'POST /api/v1/auth/sign-in/': (10, 60.0),
+        'POST /api/v1/posts/': (10, 60.0),
+        'POST /api/v1/posts/{post_id}/images/': (10, 60.0),
+        'POST /api/v1/posts/{post_id}/comments/': (30, 60.0),
+        'PATCH /api/v1/posts/{post_id}/like/': (60, 60.0),
+        'PATCH /api/v1/posts/{post_id}/unlike/': (60, 60.0),
+        'PATCH /api/v1/posts/{post_id}/comments/{comment_id}/like/': (60, 60.0),
+        'PATCH /api/v1/posts/{post_id}/comments/{comment_id}/unlike/': (60, 60.0),
+        'POST /api/v1/users/profile/images/': (5, 60.0),
+        'PATCH /api/v1/users/{username}/follow/': (30, 60.0),
+        'PATCH /api/v1/users/{username}/unfollow/': (30, 60.0),
+    }
+
+    # Admission control
+    # requests run in at most DB_POOL_SIZE + DB_MAX_OVERFLOW slots, the
+    # others wait in line by priority and get 503 once they would wait more
+    # than the LATENCY_BUDGET (seconds) of their priority, expensive routes
+    # use at most EXPENSIVE_SHARE of the slots and are shed while the pool
+    # has no free connection, routes not listed are normal
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_EXEMPT_PATHS: set[str] = {'/health'}
+    ADMISSION_EXPENSIVE_SHARE: float = 0.5
+    ADMISSION_LATENCY_BUDGETS: dict[str, float] = {
+        'critical': 5.0,
+        'normal': 1.0,
+        'expensive': 0.25,
+    }
+    ADMISSION_ROUTE_PRIORITIES: dict[str, str] = {
+        'GET /api/v1/auth/refresh/': 'critical',
+        'POST /api/v1/auth/sign-in/': 'critical',
+        'PATCH /api/v1/auth/sign-out/': 'critical',
+        'GET /api/v1/posts/feed/': 'expensive',
+        'GET /api/v1/posts/search/': 'expensive',
+        'GET /api/v1/posts/trending/': 'expensive',
+        'GET /api/v1/users/search/': 'expensive',
+    }
+
 
 settings = Settings()
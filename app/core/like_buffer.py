@@ -0,0 +1,163 @@
+import asyncio
+import sentry_sdk
+from uuid import UUID
+from time import perf_counter
+from threading import Lock
+from sentry_sdk import logger as sentry_logger
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.api.v1.repositories.post_repo import post_repo_v1
+
+
+class LikeBuffer:
+    '''write-behind buffer for post like and unlike intents
+
+    record() keeps the latest intent per (user_id, post_id) in memory so a
+    burst of likes on one post costs no transaction on the request path,
+    the background flusher writes the deduplicated intents with one bulk
+    insert and one bulk delete per batch and a single commit
+
+    intents are lost if the process dies before a flush, at most
+    flush_interval seconds of likes, the buffer is local to the process,
+    a shared store only has to provide record, state and drain'''
+
+    def __init__(
+        self,
+        max_size: int,
+        flush_interval: float,
+        flush_batch_size: int,
+        session_factory=SessionLocal,
+    ):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.flush_batch_size = flush_batch_size
+        self.session_factory = session_factory
+
+        # (user_id, post_id) -> True for like, False for unlike
+        self.pending: dict[tuple[UUID, UUID], bool] = {}
+        # intents drained but not committed yet, still served to readers
+        self.flushing: dict[tuple[UUID, UUID], bool] = {}
+        self.lock = Lock()
+        self._task: asyncio.Task | None = None
+
+    def record(self, user_id: UUID, post_id: UUID, liked: bool) -> bool:
+        '''False when the buffer is full, the caller writes directly
+
+        an intent for a key that is being flushed is always buffered, a
+        direct write could commit before the flush and be overwritten by
+        the older intent'''
+        key: tuple = (user_id, post_id)
+        with self.lock:
+            if (
+                key not in self.pending
+                and key not in self.flushing
+                and len(self.pending) >= self.max_size
+            ):
+                return False
+            self.pending[key] = liked
+        return True
+
+    def state(self, user_id: UUID, post_id: UUID) -> bool | None:
+        '''the buffered intent of the user for the post, None if there is
+        none and the database is up to date'''
+        key: tuple = (user_id, post_id)
+        with self.lock:
+            liked: bool | None = self.pending.get(key)
+            if liked is None:
+                liked = self.flushing.get(key)
+        return liked
+
+    def adjust_likes(
+        self, user_id: UUID, post_id: UUID, liked: bool, likes: int
+    ) -> int:
+        '''apply the user's own buffered intent to a like count read from
+        the database, liked is whether the user's like was in that read'''
+        buffered: bool | None = self.state(user_id, post_id)
+        if buffered is None or buffered == liked:
+            return likes
+        return likes + 1 if buffered else likes - 1
+
+    def drain(self) -> dict[tuple[UUID, UUID], bool]:
+        '''move at most flush_batch_size intents to flushing'''
+        with self.lock:
+            keys: list = list(self.pending)[: self.flush_batch_size]
+            batch: dict = {key: self.pending.pop(key) for key in keys}
+            self.flushing.update(batch)
+        return batch
+
+    def requeue(self, batch: dict[tuple[UUID, UUID], bool]):
+        '''give a failed batch back, newer intents for a key win'''
+        with self.lock:
+            for key, liked in batch.items():
+                self.pending.setdefault(key, liked)
+                self.flushing.pop(key, None)
+
+    def done(self, batch: dict[tuple[UUID, UUID], bool]):
+        with self.lock:
+            for key in batch:
+                self.flushing.pop(key, None)
+
+    def write(self, batch: dict[tuple[UUID, UUID], bool]) -> tuple[int, int]:
+        likes: list = [key for key, liked in batch.items() if liked]
+        unlikes: list = [key for key, liked in batch.items() if not liked]
+
+        with self.session_factory() as db:
+            try:
+                inserted: int = post_repo_v1.insert_likes(likes, db) if likes else 0
+                deleted: int = post_repo_v1.delete_likes(unlikes, db) if unlikes else 0
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        return inserted, deleted
+
+    async def flush(self):
+        while self.pending:
+            batch: dict = self.drain()
+            start: float = perf_counter()
+            try:
+                inserted, deleted = await asyncio.to_thread(self.write, batch)
+            except Exception as e:
+                self.requeue(batch)
+                sentry_sdk.capture_exception(e)
+                sentry_logger.error(
+                    'Error occured while flushing {count} buffered likes',
+                    count=len(batch),
+                )
+                return
+
+            self.done(batch)
+            sentry_logger.info(
+                'Flushed {count} buffered likes, {inserted} inserted and {deleted} deleted in {ms} ms',
+                count=len(batch),
+                inserted=inserted,
+                deleted=deleted,
+                ms=round((perf_counter() - start) * 1000, 2),
+            )
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+like_buffer = LikeBuffer(
+    max_size=settings.LIKE_BUFFER_MAX_SIZE,
+    flush_interval=settings.LIKE_BUFFER_FLUSH_INTERVAL,
+    flush_batch_size=settings.LIKE_BUFFER_FLUSH_BATCH_SIZE,
+)
@@ -0,0 +1,190 @@
+import orjson
+import sentry_sdk
+from time import perf_counter_ns, monotonic
+from datetime import datetime, timezone
+from sentry_sdk import logger as sentry_logger
+from starlette.middleware import Middleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core.access_log import AccessLogger, access_logger
+from app.core.rate_limit import RateLimiter, rate_limiter
+from app.core.admission import AdmissionController, admission_controller
+
+
+# Pure ASGI middlewares, each layer only wraps `send` so responses
+# (including FileResponse streams) are passed through without the extra
+# task and body copying done by BaseHTTPMiddleware
+
+
+class HeaderMiddleware:
+    '''inject static headers into every http response'''
+
+    def __init__(self, app: ASGIApp, headers: dict[str, str]):
+        self.app = app
+        self.raw_headers: list[tuple[bytes, bytes]] = [
+            (k.lower().encode('latin-1'), v.encode('latin-1'))
+            for k, v in headers.items()
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        raw_headers = self.raw_headers
+
+        async def send_with_headers(message: Message):
+            if message['type'] == 'http.response.start':
+                message.setdefault('headers', [])
+                message['headers'] = list(message['headers']) + raw_headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+class AccessLogMiddleware:
+    '''time each request and record it in the access log'''
+
+    def __init__(self, app: ASGIApp, logger: AccessLogger = access_logger):
+        self.app = app
+        self.logger = logger
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or self.logger.is_excluded(scope['path']):
+            await self.app(scope, receive, send)
+            return
+
+        status: int = 500
+        start: int = perf_counter_ns()
+
+        async def send_with_status(message: Message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # log the route template rather than the raw url to keep
+            # cardinality low, user_id is set by get_current_user
+            route = scope.get('route')
+            state: dict = scope.get('state') or {}
+            self.logger.record(
+                scope['method'],
+                route.path if route else scope['path'],
+                status,
+                (perf_counter_ns() - start) // 1000,
+                state.get('user_id'),
+            )
+
+
+class RateLimitMiddleware:
+    '''reject requests over their route limit with 429 before they reach
+    the routes and take a database connection'''
+
+    def __init__(self, app: ASGIApp, limiter: RateLimiter = rate_limiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            retry_after: int = await self.limiter.check(
+                scope['method'], scope['path'], scope['headers'], scope.get('client')
+            )
+        except Exception as e:
+            # an unavailable store lets requests through
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error('Error occured while checking rate limit')
+            retry_after = 0
+
+        if not retry_after:
+            await self.app(scope, receive, send)
+            return
+
+        await send_error(
+            send,
+            429,
+            'Too Many Requests',
+            f'Rate limit exceeded, retry in {retry_after} seconds',
+            retry_after,
+        )
+
+
+class AdmissionMiddleware:
+    '''queue requests for a database pool slot and shed them with 503
+    once they would wait longer than their latency budget'''
+
+    def __init__(
+        self, app: ASGIApp, controller: AdmissionController = admission_controller
+    ):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        priority: int | None = self.controller.priority(scope['method'], scope['path'])
+        if priority is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.controller.acquire(priority):
+            await send_error(
+                send, 503, 'Service Unavailable', 'Server is busy, retry shortly', 1
+            )
+            return
+
+        start: float = monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(priority, monotonic() - start)
+
+
+async def send_error(
+    send: Send, status: int, error_code: str, message: str, retry_after: int
+):
+    '''json error in the format of the exception handlers'''
+    body: bytes = orjson.dumps({
+        'error_code': error_code,
+        'message': message,
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+    })
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode('latin-1')),
+            (b'retry-after', str(retry_after).encode('latin-1')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def build_middleware() -> list[Middleware]:
+    '''middleware pipeline in the order a request passes through it'''
+    middleware: list[Middleware] = [
+        Middleware(HeaderMiddleware, headers={'X-App-Name': settings.API_TITLE}),
+    ]
+
+    if settings.ACCESS_LOG_ENABLED:
+        middleware.append(Middleware(AccessLogMiddleware))
+
+    # after the access log so rejected requests are logged
+    if settings.RATE_LIMIT_ENABLED:
+        middleware.append(Middleware(RateLimitMiddleware))
+
+    # limited requests are rejected before they queue for a slot
+    if settings.ADMISSION_ENABLED:
+        middleware.append(Middleware(AdmissionMiddleware))
+
+    return middleware
@@ -0,0 +1,127 @@
+from math import ceil
+from time import monotonic
+from abc import ABC, abstractmethod
+from starlette.routing import compile_path
+
+from app.core.config import settings
+from app.core.tokens import access_token_codec
+
+
+class RateLimitStore(ABC):
+    '''theoretical arrival times of the rate limited clients
+
+    acquire() is a GCRA step, a client may send a request once its
+    theoretical arrival time (tat) is at most period seconds ahead, each
+    request moves it interval seconds further, so a client sends period /
+    interval requests in a burst and then one every interval seconds
+
+    a shared store (e.g. redis running the same step in a script) only has
+    to provide acquire, the local store keeps the limits per process'''
+
+    @abstractmethod
+    async def acquire(
+        self, key: str, interval: float, period: float, now: float
+    ) -> float:
+        '''0 when the request is allowed, else the seconds until it is'''
+
+
+class LocalRateLimitStore(RateLimitStore):
+    '''in-memory store, requests run on the event loop between awaits so
+    the step needs no lock'''
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> tat
+        self.tats: dict[str, float] = {}
+
+    def evict(self, now: float) -> None:
+        '''forget idle clients, their tat is behind now so they would start
+        from now anyway, the oldest tenth of the keys goes if too few are
+        idle so a full store is not swept on every new client'''
+        self.tats = {k: tat for k, tat in self.tats.items() if tat > now}
+        for _ in range(len(self.tats) - self.max_keys * 9 // 10):
+            # dicts keep insertion order
+            self.tats.pop(next(iter(self.tats)))
+
+    async def acquire(
+        self, key: str, interval: float, period: float, now: float
+    ) -> float:
+        tat: float = max(self.tats.get(key, now), now) + interval
+        if tat - now > period:
+            return tat - now - period
+
+        if key not in self.tats and len(self.tats) >= self.max_keys:
+            self.evict(now)
+        self.tats[key] = tat
+        return 0.0
+
+
+class RateLimiter:
+    '''per route limits keyed by the user id of the bearer token, or the
+    client address for unauthenticated requests
+
+    limits map 'METHOD /path/{param}/' to (requests, period seconds), the
+    route is matched from the raw path before routing so requests to other
+    routes are passed through after a dict lookup'''
+
+    def __init__(
+        self, limits: dict[str, tuple[int, float]], store: RateLimitStore
+    ):
+        self.store = store
+        # method -> [(path regex, route, interval, period)]
+        self.routes: dict[str, list[tuple]] = {}
+        for rule, (requests, period) in limits.items():
+            method, _, path = rule.partition(' ')
+            regex, _, _ = compile_path(path)
+            self.routes.setdefault(method.upper(), []).append(
+                (regex, path, period / requests, period)
+            )
+        self.limited: int = 0
+
+    def match(self, method: str, path: str) -> tuple | None:
+        for route in self.routes.get(method, ()):
+            if route[0].match(path):
+                return route
+        return None
+
+    def client_key(self, headers: list[tuple[bytes, bytes]], client) -> str:
+        for name, value in headers:
+            if name == b'authorization':
+                scheme, _, token = value.decode('latin-1').partition(' ')
+                if scheme.lower() != 'bearer':
+                    break
+                # verified tokens are cached, this is a dict lookup for a
+                # client reusing its access token
+                payload: dict | None = access_token_codec.decode(token)
+                if payload and payload.get('sub'):
+                    return f'user:{payload["sub"]}'
+                break
+        return f'ip:{client[0] if client else "unknown"}'
+
+    async def check(
+        self,
+        method: str,
+        path: str,
+        headers: list[tuple[bytes, bytes]],
+        client,
+    ) -> int:
+        '''0 when the request may go through, else the seconds to wait'''
+        route: tuple | None = self.match(method, path)
+        if route is None:
+            return 0
+
+        _, template, interval, period = route
+        key: str = f'{method} {template} {self.client_key(headers, client)}'
+        retry_after: float = await self.store.acquire(
+            key, interval, period, monotonic()
+        )
+        if not retry_after:
+            return 0
+        self.limited += 1
+        return max(1, ceil(retry_after))
+
+
+rate_limiter = RateLimiter(
+    limits=settings.RATE_LIMITS,
+    store=LocalRateLimitStore(max_keys=settings.RATE_LIMIT_MAX_KEYS),
+)
@@ -0,0 +1,17 @@
+import orjson
+from typing import Any
+from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+
+
+class ModelJSONResponse(JSONResponse):
+    '''json response rendered without fastapi's jsonable_encoder pass
+
+    routers return this with an already validated response model which is
+    serialized straight to bytes by pydantic-core, any other content
+    (e.g. dicts from the default response path) is serialized with orjson'''
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.__pydantic_serializer__.to_json(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
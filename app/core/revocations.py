@@ -0,0 +1,91 @@
+import asyncio
+import sentry_sdk
+from time import time
+from datetime import datetime, timedelta, timezone
+from sentry_sdk import logger as sentry_logger
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.api.v1.repositories.auth_repo import auth_repo_v1
+
+
+class RevocationList:
+    '''sessions whose access tokens are no longer accepted
+
+    access tokens carry the id of the refresh token they were issued with
+    (sid), a session is revoked when that refresh token is revoked, used
+    or signed out so protected requests are authenticated from the access
+    token alone, without reading the refresh token
+
+    entries only have to outlive the access tokens of the session, they
+    are kept for ttl seconds after the revocation, revocations made by
+    other processes are picked up by sync() every sync_interval seconds'''
+
+    def __init__(self, ttl: float, sync_interval: float, session_factory=SessionLocal):
+        self.ttl = ttl
+        self.sync_interval = sync_interval
+        self.session_factory = session_factory
+        # sid -> time the entry can be dropped
+        self.sessions: dict[str, float] = {}
+        self.synced_at: datetime = datetime.now(timezone.utc) - timedelta(seconds=ttl)
+        self._task: asyncio.Task | None = None
+
+    def is_revoked(self, payload: dict) -> bool:
+        sid: str | None = payload.get('sid')
+        # tokens issued without a session can not be revoked
+        return sid is None or sid in self.sessions
+
+    def revoke(self, *sids) -> None:
+        expires_at: float = time() + self.ttl
+        for sid in sids:
+            self.sessions[str(sid)] = expires_at
+
+    def prune(self) -> None:
+        now: float = time()
+        for sid in [sid for sid, expires_at in self.sessions.items() if expires_at <= now]:
+            del self.sessions[sid]
+
+    def load(self, since: datetime) -> list:
+        '''ids of the sessions revoked since'''
+        with self.session_factory() as db:
+            return auth_repo_v1.get_revoked_token_ids(since, db)
+
+    async def sync(self):
+        self.prune()
+        # overlap the window so a revocation committed during the last
+        # sync is not missed
+        since: datetime = self.synced_at - timedelta(seconds=self.sync_interval)
+        synced_at: datetime = datetime.now(timezone.utc)
+        try:
+            sids: list = await asyncio.to_thread(self.load, since)
+        except Exception as e:
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error('Error occured while syncing revoked sessions')
+            return
+
+        self.revoke(*sids)
+        self.synced_at = synced_at
+
+    async def run(self):
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+revocation_list = RevocationList(
+    ttl=settings.ACCESS_TOKEN_EXPIRE_TIME * 60,
+    sync_interval=settings.SESSION_REVOCATION_SYNC_INTERVAL,
+)
@@ -1,7 +1,5 @@
 import hashlib
-import sentry_sdk
 from uuid import uuid4
-from jose import jwt, JWTError
 from pwdlib import PasswordHash
 from sqlalchemy.orm import Session
 from pwdlib.hashers.argon2 import Argon2Hasher
@@ -9,6 +7,7 @@ from sentry_sdk import logger as sentry_logger
 from datetime import datetime, timedelta, timezone
 
 from app.core.config import settings
+from app.core.tokens import access_token_codec, refresh_token_codec
 from app.models.auth import RefreshToken
 from app.core.exceptions import AuthenticationError
 from app.api.v1.repositories.auth_repo import auth_repo_v1
@@ -44,16 +43,11 @@ def create_access_token(data: TokenDataV1, expire_time: timedelta | None = None)
     payload: dict = {
         'sub': str(data.id),
         'name': data.name,
+        'sid': data.sid,
         'exp': expiry_time,
         'iat': datetime.now(timezone.utc),
     }
-
-    token: str = jwt.encode(
-        claims=payload,
-        key=settings.ACCESS_TOKEN_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM,
-    )
-    return token
+    return access_token_codec.encode(payload)
 
 
 def create_refresh_token(
@@ -74,39 +68,26 @@ def create_refresh_token(
         'jti': str(uuid4()),
     }
 
-    token: str = jwt.encode(
-        claims=payload,
-        key=settings.REFRESH_TOKEN_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM,
-    )
+    token: str = refresh_token_codec.encode(payload)
     return token, payload.get('jti'), payload.get('exp')
 
 
-def decode_token(token: str, key: str) -> dict | None:
-    try:
-        payload: dict = jwt.decode(
-            token=token,
-            key=key,
-            algorithms=[settings.JWT_ALGORITHM],
-        )
-        return payload
-    except JWTError as e:
-        sentry_sdk.capture_exception(e)
-        return None
-
-
 def validate_refresh_token(refresh_token: str, db: Session) -> RefreshToken:
-    payload: dict | None = decode_token(refresh_token, settings.REFRESH_TOKEN_SECRET_KEY)
+    payload: dict | None = refresh_token_codec.decode(refresh_token)
 
     # raise authentication error if refresh token has expired
     if not payload:
         sentry_logger.error('Error authenticating user. Refresh token not valid')
         raise AuthenticationError()
 
-    refresh_token_db: RefreshToken = auth_repo_v1.get_refresh_token(
-        payload.get('jti'), db
+    refresh_token_db: RefreshToken | None = auth_repo_v1.get_refresh_token(
+        payload.get('jti'), hash_token(refresh_token), db
     )
 
+    if not refresh_token_db:
+        sentry_logger.error('Error authenticating user. Refresh token not found')
+        raise AuthenticationError()
+
     if (
         refresh_token_db.status == TokenStatus.REVOKED
         or refresh_token_db.status == TokenStatus.USED
@@ -0,0 +1,121 @@
+import hashlib
+import binascii
+import orjson
+from time import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from jwt.algorithms import get_default_algorithms
+
+from app.core.config import settings
+
+
+def b64_encode(data: bytes) -> bytes:
+    return urlsafe_b64encode(data).rstrip(b'=')
+
+
+def b64_decode(data: str) -> bytes:
+    return urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class TokenCodec:
+    '''compact JWS (JWT) signing and verification with a prepared key
+
+    the key and the algorithm are resolved once, encode() signs with the
+    PyJWT algorithm primitives and decode() only accepts tokens signed with
+    the configured algorithm and an exp claim in the future
+
+    verified payloads are cached by token digest until they expire so a
+    client reusing its access token skips the signature check, expected
+    failures (expired or forged tokens) are counted in failures instead of
+    being raised
+
+    asymmetric algorithms (EdDSA) need the cryptography package, a codec
+    built from a public key verifies tokens but can not sign them'''
+
+    def __init__(self, key: str, algorithm: str, cache_size: int = 0):
+        algorithms: dict = get_default_algorithms()
+        if algorithm not in algorithms or algorithm == 'none':
+            raise ValueError(
+                f'JWT algorithm {algorithm} is not available, '
+                'asymmetric algorithms need the cryptography package'
+            )
+
+        self.algorithm = algorithm
+        self._alg = algorithms[algorithm]
+        self._key = self._alg.prepare_key(key)
+        self._header: bytes = b64_encode(
+            orjson.dumps({'alg': algorithm, 'typ': 'JWT'})
+        )
+
+        self.cache_size = cache_size
+        # token digest -> (exp, payload)
+        self.cache: dict[bytes, tuple[float, dict]] = {}
+        self.hits: int = 0
+        self.failures: dict[str, int] = {'expired': 0, 'invalid': 0, 'malformed': 0}
+
+    def encode(self, claims: dict) -> str:
+        payload: dict = {
+            k: int(v.timestamp()) if isinstance(v, datetime) else v
+            for k, v in claims.items()
+        }
+        signing_input: bytes = self._header + b'.' + b64_encode(orjson.dumps(payload))
+        signature: bytes = self._alg.sign(signing_input, self._key)
+        return (signing_input + b'.' + b64_encode(signature)).decode('ascii')
+
+    def fail(self, reason: str) -> None:
+        self.failures[reason] += 1
+        return None
+
+    def decode(self, token: str | None) -> dict | None:
+        '''the verified payload or None'''
+        if not token:
+            return self.fail('malformed')
+
+        now: float = time()
+        digest: bytes | None = None
+        if self.cache_size:
+            digest = hashlib.sha256(token.encode('utf-8')).digest()
+            cached: tuple | None = self.cache.get(digest)
+            if cached and cached[0] > now:
+                self.hits += 1
+                return cached[1]
+
+        try:
+            signing_input, _, signature = token.rpartition('.')
+            header, _, payload = signing_input.partition('.')
+            if orjson.loads(b64_decode(header)).get('alg') != self.algorithm:
+                return self.fail('invalid')
+            if not self._alg.verify(
+                signing_input.encode('ascii'), self._key, b64_decode(signature)
+            ):
+                return self.fail('invalid')
+            claims: dict = orjson.loads(b64_decode(payload))
+            exp = claims['exp']
+        except (ValueError, TypeError, KeyError, AttributeError, binascii.Error):
+            # orjson.JSONDecodeError and non-ascii tokens are ValueErrors
+            return self.fail('malformed')
+
+        if not isinstance(exp, (int, float)):
+            return self.fail('malformed')
+        if exp <= now:
+            return self.fail('expired')
+
+        if digest is not None:
+            if len(self.cache) >= self.cache_size:
+                # evict the oldest entry, dicts keep insertion order
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[digest] = (exp, claims)
+        return claims
+
+
+access_token_codec = TokenCodec(
+    key=settings.ACCESS_TOKEN_SECRET_KEY,
+    algorithm=settings.JWT_ALGORITHM,
+    cache_size=settings.ACCESS_TOKEN_CACHE_SIZE,
+)
+
+# refresh tokens are single use, caching them would never hit
+refresh_token_codec = TokenCodec(
+    key=settings.REFRESH_TOKEN_SECRET_KEY,
+    algorithm=settings.JWT_ALGORITHM,
+)
@@ -0,0 +1,157 @@
+import re
+import heapq
+import asyncio
+import sentry_sdk
+from uuid import UUID
+from time import time
+from threading import Lock
+from collections import Counter
+from sentry_sdk import logger as sentry_logger
+
+from app.core.config import settings
+from app.database.session import SessionLocal
+from app.api.v1.repositories.records import PostRecord
+from app.api.v1.repositories.post_repo import post_repo_v1
+
+
+hashtag_pattern = re.compile(r'#(\w{1,50})')
+
+
+def extract_hashtags(content: str) -> set[str]:
+    return {tag.lower() for tag in hashtag_pattern.findall(content)}
+
+
+class TrendingCounter:
+    '''sliding window counts of post likes and comments
+
+    record() adds to the post's count in the bucket of the current minute,
+    the window is a ring of one bucket per minute and a bucket is cleared
+    when its slot is reused, so the cost of a write does not depend on the
+    window or the traffic
+
+    refresh() sums the buckets, loads the public posts among the top
+    candidate_limit and keeps the top_k posts and the top_k hashtags of
+    their contents, readers only slice these lists
+
+    counts are local to the process, with several workers each one ranks
+    the share of the traffic it serves'''
+
+    def __init__(
+        self,
+        window: int,
+        top_k: int,
+        candidate_limit: int,
+        refresh_interval: float,
+        session_factory=SessionLocal,
+    ):
+        self.window = window
+        self.top_k = top_k
+        self.candidate_limit = candidate_limit
+        self.refresh_interval = refresh_interval
+        self.session_factory = session_factory
+
+        # slot -> post_id -> count, minutes[slot] is the minute it counts
+        self.buckets: list[dict[UUID, int]] = [{} for _ in range(window)]
+        self.minutes: list[int] = [-1] * window
+        self.lock = Lock()
+
+        self.posts: list[tuple[PostRecord, int]] = []
+        self.hashtags: list[tuple[str, int]] = []
+        self._task: asyncio.Task | None = None
+
+    def record(self, post_id: UUID, count: int = 1) -> None:
+        minute: int = int(time() // 60)
+        slot: int = minute % self.window
+        with self.lock:
+            if self.minutes[slot] != minute:
+                self.buckets[slot] = {}
+                self.minutes[slot] = minute
+            bucket: dict = self.buckets[slot]
+            bucket[post_id] = bucket.get(post_id, 0) + count
+
+    def totals(self) -> Counter:
+        '''counts of the posts over the last window minutes'''
+        oldest: int = int(time() // 60) - self.window
+        with self.lock:
+            buckets: list = [
+                dict(bucket)
+                for bucket, minute in zip(self.buckets, self.minutes)
+                if minute > oldest
+            ]
+
+        totals: Counter = Counter()
+        for bucket in buckets:
+            totals.update(bucket)
+        return totals
+
+    def rank(self) -> tuple[list, list]:
+        # unlikes are negative counts, posts at or below zero are not trending
+        totals: Counter = self.totals()
+        candidates: list[tuple[UUID, int]] = heapq.nlargest(
+            self.candidate_limit,
+            ((post_id, count) for post_id, count in totals.items() if count > 0),
+            key=lambda item: item[1],
+        )
+        if not candidates:
+            return [], []
+
+        counts: dict[UUID, int] = dict(candidates)
+        with self.session_factory() as db:
+            records: list[PostRecord] = post_repo_v1.get_post_records(
+                list(counts), db, public=True
+            )
+
+        hashtags: Counter = Counter()
+        for record in records:
+            for tag in extract_hashtags(record.content):
+                hashtags[tag] += counts[record.id]
+
+        posts: list = heapq.nlargest(
+            self.top_k,
+            ((record, counts[record.id]) for record in records),
+            key=lambda item: item[1],
+        )
+        return posts, hashtags.most_common(self.top_k)
+
+    async def refresh(self):
+        try:
+            posts, hashtags = await asyncio.to_thread(self.rank)
+        except Exception as e:
+            sentry_sdk.capture_exception(e)
+            sentry_logger.error('Error occured while ranking trending posts')
+            return
+
+        self.posts = posts
+        self.hashtags = hashtags
+
+    def top_posts(self, limit: int) -> list[tuple[PostRecord, int]]:
+        return self.posts[:limit]
+
+    def top_hashtags(self, limit: int) -> list[tuple[str, int]]:
+        return self.hashtags[:limit]
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh()
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+trending_counter = TrendingCounter(
+    window=settings.TRENDING_WINDOW,
+    top_k=settings.TRENDING_TOP_K,
+    candidate_limit=settings.TRENDING_CANDIDATE_LIMIT,
+    refresh_interval=settings.TRENDING_REFRESH_INTERVAL,
+)
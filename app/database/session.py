@@ -6,6 +6,9 @@ from app.core.config import settings
 
 db_engine: Engine = create_engine(
     url=settings.DATABASE_URL,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
     connect_args={
         'options': '-c timezone=utc'
     },  # set session timezone to utc on connection with db
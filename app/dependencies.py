@@ -1,12 +1,13 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
+from fastapi.requests import Request
 from sentry_sdk import logger as sentry_logger
 from fastapi.security import OAuth2PasswordBearer
 
 
 from app.models.users import User
-from app.core.config import settings
-from app.core.security import decode_token
+from app.core.tokens import access_token_codec
+from app.core.revocations import revocation_list
 from app.api.v1.schemas.users import UserRole
 from app.database.session import SessionLocal
 from app.api.v1.services.user_service import user_service_v1
@@ -25,15 +26,22 @@ def get_db():
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+    request: Request,
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
 ) -> User:
-    payload: dict = decode_token(token, settings.ACCESS_TOKEN_SECRET_KEY)
+    payload: dict | None = access_token_codec.decode(token)
 
-    if not payload:
+    # the session is checked in memory, the refresh token is only read on
+    # /auth/ endpoints
+    if not payload or revocation_list.is_revoked(payload):
         sentry_logger.error('Error authenticating user')
         raise AuthenticationError()
 
     user = user_service_v1.get_user_by_id(payload.get('sub'), db)
+
+    # picked up by the access log once the response is sent
+    request.state.user_id = payload.get('sub')
     return user
 
 
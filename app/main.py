@@ -1,10 +1,14 @@
 import sentry_sdk
 from fastapi import FastAPI
-from fastapi.requests import Request
-from datetime import datetime, timezone
-from sentry_sdk import logger as sentry_logger
+from contextlib import asynccontextmanager
 
 from app.core.config import settings
+from app.core.like_buffer import like_buffer
+from app.core.trending import trending_counter
+from app.core.revocations import revocation_list
+from app.core.access_log import access_logger
+from app.core.middleware import build_middleware
+from app.core.responses import ModelJSONResponse
 from app.api.v1.routers.auth import auth_router_v1
 from app.api.v1.routers.posts import post_router_v1
 from app.api.v1.routers.admin import admin_router_v1
@@ -33,10 +37,31 @@ sentry_sdk.init(
 )
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # start background workers on startup and drain them on shutdown
+    if settings.ACCESS_LOG_ENABLED:
+        access_logger.start()
+    revocation_list.start()
+    if settings.LIKE_BUFFER_ENABLED:
+        like_buffer.start()
+    trending_counter.start()
+    yield
+    await trending_counter.stop()
+    await revocation_list.stop()
+    if settings.LIKE_BUFFER_ENABLED:
+        await like_buffer.stop()
+    if settings.ACCESS_LOG_ENABLED:
+        await access_logger.stop()
+
+
 app = FastAPI(
     title=settings.API_TITLE,
     description=settings.API_DESCRIPTION,
     version=settings.API_VERSION,
+    lifespan=lifespan,
+    middleware=build_middleware(),
+    default_response_class=ModelJSONResponse,
 )
 
 from app.core import exception_handlers
@@ -52,11 +77,3 @@ app.include_router(post_router_v1, prefix=settings.API_VERSION_PREFIX, tags=['Po
 async def check_health():
     return {'message': 'OK'}
 
-
-@app.middleware('http')
-async def log_middleware(request: Request, call_next):
-    log_message = f'{datetime.now(timezone.utc)} {request.method} {request.url}'
-    sentry_logger.info(log_message)
-    response = await call_next(request)
-    response.headers['X-App-Name'] = 'Social Media API'
-    return response
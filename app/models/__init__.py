@@ -1,4 +1,4 @@
 from app.models.auth import RefreshToken
-from app.models.users import User, UserRole
+from app.models.users import User, UserRole, FollowSuggestion
 from app.models.posts import Post, Like, Comment
 from app.models.images import Image, PostImage, ProfileImage
\ No newline at end of file
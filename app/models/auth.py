@@ -35,8 +35,25 @@ class RefreshToken(Base):
 
     user = relationship('User', back_populates='refresh_tokens')
 
+    # with REFRESH_TOKEN_PARTITIONING the table is range partitioned by day on
+    # expires_at and the database primary key is (id, expires_at), see the
+    # partition_refresh_tokens migration, the ORM still identifies rows by id
     __table_args__ = (
         PrimaryKeyConstraint('id', name='refresh_tokens_pk'),
         Index('idx_auth_token', token),
         Index('idx_auth_user_id', user_id),
+        # sign in revokes the valid tokens of a user in one update
+        Index(
+            'idx_auth_valid_user_id',
+            user_id,
+            postgresql_where=status == TokenStatus.VALID,
+        ),
+        # used by the batched token cleanup, valid tokens are left out of
+        # the status index so it only holds rows waiting to be deleted
+        Index('idx_auth_expires_at', expires_at),
+        Index(
+            'idx_auth_inactive_id',
+            id,
+            postgresql_where=status.in_((TokenStatus.REVOKED, TokenStatus.USED)),
+        ),
     )
@@ -12,6 +12,8 @@ from sqlalchemy import (
     UUID,
     Computed,
     Index,
+    Integer,
+    Float,
     PrimaryKeyConstraint
 )
 
@@ -19,6 +21,13 @@ from app.database.base import Base
 from app.api.v1.schemas.posts import VisibilityEnum
 
 
+# the hot score of a post is log10 of its engagement (likes plus twice the
+# comments, at least 1) plus its creation time in HOT_SCORE_PERIOD seconds,
+# a post HOT_SCORE_PERIOD seconds newer ranks as high with a tenth of the
+# engagement, the score only changes with the counters so it is indexable
+HOT_SCORE_PERIOD: int = 45000
+
+
 class Post(Base):
     __tablename__ = 'posts'
 
@@ -36,9 +45,17 @@ class Post(Base):
     )
     created_at = Column(
         DateTime(timezone=True),
-        default=datetime.now(timezone.utc),
+        default=lambda: datetime.now(timezone.utc),
         nullable=False
     )
+    # engagement counters, kept in step by the like and comment writes
+    like_count = Column(Integer, default=0, server_default='0', nullable=False)
+    comment_count = Column(Integer, default=0, server_default='0', nullable=False)
+    hot_score = Column(
+        Float,
+        server_default=text(f'extract(epoch from now()) / {HOT_SCORE_PERIOD}'),
+        nullable=False,
+    )
 
     user = relationship('User', back_populates='posts', viewonly=True)
 
@@ -64,8 +81,18 @@ class Post(Base):
 
     __table_args__ = (
         PrimaryKeyConstraint('id', name='posts_pk'),
-        Index('idx_post_user_id', user_id),
+        # the user and followed users branches of the feed, newest first
+        Index('idx_post_user_created_at', user_id, created_at.desc()),
         Index('idx_post_created_at', created_at),
+        Index(
+            'idx_post_public_created_at',
+            created_at.desc(),
+            postgresql_where=visibility == VisibilityEnum.PUBLIC,
+        ),
+        # engagement sorts of a user's posts, the id breaks ties for cursors
+        Index('idx_post_user_likes', user_id, like_count.desc(), id.desc()),
+        Index('idx_post_user_comments', user_id, comment_count.desc(), id.desc()),
+        Index('idx_post_user_hot', user_id, hot_score.desc(), id.desc()),
         Index('idx_post_content_search', content_search, postgresql_using='gin'),
         Index(
             'idx_post_title',
@@ -86,7 +113,7 @@ class Like(Base):
         UUID, ForeignKey('users.id', ondelete='CASCADE')
     )
     liked_at = Column(
-        DateTime(timezone=True), default=datetime.now(timezone.utc), nullable=False
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
     )
 
     post = relationship('Post', back_populates='likes')
@@ -109,12 +136,20 @@ class Comment(Base):
     user_id = Column(
         UUID, ForeignKey('users.id', name='user_id_fk', ondelete='CASCADE'), nullable=False
     )
+    # replies point to the comment they answer, top level comments have none
+    parent_id = Column(
+        UUID,
+        ForeignKey('comments.id', name='parent_id_fk', ondelete='CASCADE'),
+        nullable=True,
+    )
     content = Column(Text, nullable=False)
     created_at = Column(
         DateTime(timezone=True),
-        default=datetime.now(timezone.utc),
+        default=lambda: datetime.now(timezone.utc),
         nullable=False,
     )
+    like_count = Column(Integer, default=0, server_default='0', nullable=False)
+    reply_count = Column(Integer, default=0, server_default='0', nullable=False)
 
     user = relationship('User', back_populates='comments')
     post = relationship('Post', back_populates='comments')
@@ -130,6 +165,22 @@ class Comment(Base):
     __table_args__ = (
         PrimaryKeyConstraint('id', name='comments_pk'),
         Index('idx_comment_post_id', post_id),
+        # listings of a post's top level comments and of a comment's replies
+        Index(
+            'idx_comment_top_created_at',
+            post_id,
+            created_at,
+            id,
+            postgresql_where=parent_id.is_(None),
+        ),
+        Index(
+            'idx_comment_top_likes',
+            post_id,
+            like_count.desc(),
+            id.desc(),
+            postgresql_where=parent_id.is_(None),
+        ),
+        Index('idx_comment_parent_created_at', parent_id, created_at, id),
         Index('idx_comment_user_id', user_id),
         Index('idx_comment_created_at', created_at)
     )
@@ -147,7 +198,7 @@ class CommentLike(Base):
         ForeignKey('comments.id', name='comment_id_fk', ondelete='CASCADE'),
     )
     liked_at = Column(
-        DateTime(timezone=True), default=datetime.now(timezone.utc), nullable=False
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False
     )
 
     user = relationship('User', back_populates='comment_likes', viewonly=True)
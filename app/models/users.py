@@ -8,6 +8,7 @@ from sqlalchemy import (
     Text,
     DateTime,
     Boolean,
+    Integer,
     Table,
     UUID,
     Enum,
@@ -35,6 +36,7 @@ follows = Table(
         ForeignKey('users.id', name='follower_id_fk', ondelete='CASCADE'),
     ),
     PrimaryKeyConstraint('following_id', 'follower_id', name='follows_pk'),
+    Index('idx_follow_follower_id', 'follower_id'),
 )
 
 
@@ -151,3 +153,39 @@ class Role(Base):
         PrimaryKeyConstraint('id', name='roles_pk'),
         UniqueConstraint('name', name='name_unique_key'),
     )
+
+
+class FollowSuggestion(Base):
+    '''users followed by the people a user follows, precomputed by the
+    follow suggestions celery task'''
+
+    __tablename__ = 'follow_suggestions'
+
+    user_id = Column(
+        UUID,
+        ForeignKey('users.id', name='suggestion_user_id_fk', ondelete='CASCADE'),
+        nullable=False,
+    )
+    suggested_id = Column(
+        UUID,
+        ForeignKey('users.id', name='suggestion_suggested_id_fk', ondelete='CASCADE'),
+        nullable=False,
+    )
+    # how many of the users the user follows follow the suggested user
+    mutuals = Column(Integer, nullable=False)
+    created_at = Column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+    )
+
+    __table_args__ = (
+        PrimaryKeyConstraint('user_id', 'suggested_id', name='follow_suggestions_pk'),
+        Index(
+            'idx_suggestion_user_mutuals',
+            user_id,
+            mutuals.desc(),
+            suggested_id,
+        ),
+        Index('idx_suggestion_suggested_id', suggested_id),
+    )
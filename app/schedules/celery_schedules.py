@@ -1,5 +1,6 @@
 from celery.schedules import crontab
 
+from app.core.config import settings
 from app.schedules.celery_app import app
 
 
@@ -7,11 +8,24 @@ from app.schedules.celery_app import app
 app.conf.beat_schedule = {
     'delete_tokens': {
         'task': 'app.schedules.celery_tasks.delete_refresh_tokens',
-        'schedule': crontab(hour=15, minute=0)
+        'schedule': crontab(minute=f'*/{settings.TOKEN_CLEANUP_INTERVAL}')
     },
 
     'delete_users': {
         'task': 'app.schedules.celery_tasks.delete_users',
         'schedule': crontab(day_of_month=15, hour=18, minute=0)
     },
+
+    'compute_follow_suggestions': {
+        'task': 'app.schedules.celery_tasks.compute_follow_suggestions',
+        'schedule': crontab(hour=3, minute=0)
+    },
+
+    # both refresh token jobs always run, delete_refresh_tokens skips a
+    # partitioned table and maintain_token_partitions deletes rows of an
+    # unpartitioned one, whatever REFRESH_TOKEN_PARTITIONING says
+    'maintain_token_partitions': {
+        'task': 'app.schedules.celery_tasks.maintain_token_partitions',
+        'schedule': crontab(hour=0, minute=30)
+    },
 }
@@ -1,3 +1,4 @@
+from pathlib import Path
 from sqlalchemy import create_engine, Engine
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -23,8 +24,26 @@ def delete_refresh_tokens():
     with SessionLocal() as db:
         auth_service_v1.delete_refresh_tokens(db)
 
+# background task to create and drop daily refresh token partitions
+@app.task
+def maintain_token_partitions():
+    with SessionLocal() as db:
+        auth_service_v1.maintain_token_partitions(db)
+
 # background task to delete users permanently
 @app.task
 def delete_users():
     with SessionLocal() as db:
         user_service_v1.delete_user_accounts(db)
+
+# background task to precompute follow suggestions
+@app.task
+def compute_follow_suggestions():
+    with SessionLocal() as db:
+        user_service_v1.compute_follow_suggestions(db)
+
+# background task to remove image files of purged users from disk
+@app.task
+def delete_image_files(filepaths: list[str]):
+    for filepath in filepaths:
+        Path(filepath).unlink(missing_ok=True)
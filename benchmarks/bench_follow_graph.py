@@ -0,0 +1,68 @@
+'''time follow suggestions over a synthetic follow graph
+
+no database needed, run from the project root with the environment
+variables set:
+    python -m benchmarks.bench_follow_graph [users] [follows] [batches]
+
+popular users are followed more often, batches limits how many batches
+of FOLLOW_SUGGESTION_BATCH_SIZE users are computed, the full run time is
+extrapolated from them
+'''
+import sys
+import resource
+import numpy as np
+from time import perf_counter
+
+from app.core.config import settings
+from app.core.follow_graph import FollowGraph
+
+
+def make_graph(users: int, edges: int, seed: int = 0) -> FollowGraph:
+    rng = np.random.default_rng(seed)
+    # follow counts vary between users, targets skew to low (popular) ids
+    weights = rng.pareto(1.5, users) + 1
+    degrees = np.floor(weights / weights.sum() * edges).astype(np.int64)
+    sources = np.repeat(np.arange(users, dtype=np.int32), degrees)
+    targets = (users * rng.random(len(sources)) ** 3).astype(np.int32)
+    return FollowGraph.from_edges(users, sources, targets)
+
+
+def main():
+    users: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    edges: int = int(sys.argv[2]) if len(sys.argv) > 2 else 50_000_000
+    batches: int = int(sys.argv[3]) if len(sys.argv) > 3 else 50
+    batch_size: int = settings.FOLLOW_SUGGESTION_BATCH_SIZE
+
+    start: float = perf_counter()
+    graph: FollowGraph = make_graph(users, edges)
+    built: float = perf_counter() - start
+    print(
+        f'graph of {graph.size} users and {len(graph.indices)} follows built in '
+        f'{built:.1f}s, {(graph.indptr.nbytes + graph.indices.nbytes) / 2**20:.0f} MiB'
+    )
+
+    # batches spread over the whole range of users
+    firsts = np.linspace(0, users - batch_size, batches).astype(np.int64)
+    rows: int = 0
+    start = perf_counter()
+    for first in firsts:
+        owners, _, _ = graph.suggest(
+            np.arange(first, first + batch_size),
+            settings.FOLLOW_SUGGESTION_TOP_K,
+            settings.FOLLOW_SUGGESTION_MAX_FOLLOWING,
+        )
+        rows += len(owners)
+    elapsed: float = perf_counter() - start
+
+    per_batch: float = elapsed / batches
+    peak: float = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10
+    print(
+        f'{batches} batches of {batch_size} users in {elapsed:.1f}s '
+        f'({per_batch * 1000:.0f} ms per batch, {rows} suggestions), '
+        f'all {users} users in about {per_batch * users / batch_size:.0f}s, '
+        f'peak memory {peak:.0f} MiB'
+    )
+
+
+if __name__ == '__main__':
+    main()
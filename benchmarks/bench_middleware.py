@@ -0,0 +1,103 @@
+'''compare requests/sec of the BaseHTTPMiddleware and pure ASGI stacks
+
+run from the project root with the environment variables set:
+    python -m benchmarks.bench_middleware
+'''
+import asyncio
+from pathlib import Path
+from time import perf_counter, perf_counter_ns
+
+import httpx
+from fastapi import FastAPI
+from fastapi.requests import Request
+from fastapi.responses import FileResponse
+from starlette.middleware import Middleware
+
+from app.core.access_log import AccessLogger
+from app.core.middleware import HeaderMiddleware, AccessLogMiddleware
+
+
+REQUESTS: int = 3000
+IMAGE_PATH: Path = Path('tests/assets/20240811_012037.jpg').resolve()
+
+
+def make_logger() -> AccessLogger:
+    # the flusher is never started, records only land in the ring buffer
+    return AccessLogger(
+        buffer_size=10000,
+        sample_rate=1.0,
+        exclude_paths=set(),
+        flush_interval=1.0,
+        flush_batch_size=1000,
+    )
+
+
+def add_routes(app: FastAPI):
+    @app.get('/health')
+    async def check_health():
+        return {'message': 'OK'}
+
+    @app.get('/images/{image_url}')
+    async def get_image(image_url: str):
+        return FileResponse(path=IMAGE_PATH)
+
+
+def base_http_app() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+    logger = make_logger()
+
+    @app.middleware('http')
+    async def log_middleware(request: Request, call_next):
+        start: int = perf_counter_ns()
+        response = await call_next(request)
+        response.headers['X-App-Name'] = 'Social Media API'
+        route = request.scope.get('route')
+        logger.record(
+            request.method,
+            route.path if route else request.url.path,
+            response.status_code,
+            (perf_counter_ns() - start) // 1000,
+        )
+        return response
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI(
+        middleware=[
+            Middleware(HeaderMiddleware, headers={'X-App-Name': 'Social Media API'}),
+            Middleware(AccessLogMiddleware, logger=make_logger()),
+        ]
+    )
+    add_routes(app)
+    return app
+
+
+async def run(app: FastAPI, url: str) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        # warm up
+        for _ in range(100):
+            await client.get(url)
+
+        start: float = perf_counter()
+        for _ in range(REQUESTS):
+            res = await client.get(url)
+            assert res.headers['x-app-name'] == 'Social Media API'
+        return REQUESTS / (perf_counter() - start)
+
+
+async def main():
+    for url in ('/health', '/images/20240811_012037.jpg'):
+        base_rps: float = await run(base_http_app(), url)
+        asgi_rps: float = await run(asgi_app(), url)
+        print(
+            f'{url:<32} BaseHTTPMiddleware {base_rps:>8.0f} req/s'
+            f'   ASGI {asgi_rps:>8.0f} req/s   x{asgi_rps / base_rps:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,49 @@
+'''time scoring a batch of ranked feed candidates
+
+no database needed, run from the project root with the environment
+variables set:
+    python -m benchmarks.bench_ranking [candidates]
+'''
+import sys
+import random
+from time import perf_counter
+from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+
+from app.core.ranking import feed_ranker
+from app.api.v1.repositories.records import FeedCandidateRecord
+
+
+def make_candidates(count: int, now: datetime) -> list[FeedCandidateRecord]:
+    authors: list = [uuid4() for _ in range(max(count // 20, 1))]
+    return [
+        FeedCandidateRecord(
+            id=uuid4(),
+            user_id=random.choice(authors),
+            created_at=now - timedelta(minutes=random.uniform(0, 72 * 60)),
+            likes=random.randint(0, 500),
+            comments=random.randint(0, 50),
+        )
+        for _ in range(count)
+    ]
+
+
+def main():
+    count: int = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    now: datetime = datetime.now(timezone.utc)
+    candidates: list = make_candidates(count, now)
+    authors: list = list({c.user_id for c in candidates})
+    affinity: dict = {author: random.randint(1, 30) for author in authors[::3]}
+
+    feed_ranker.rank(candidates, affinity, now)  # warm up
+    runs: int = 50
+    start: float = perf_counter()
+    for _ in range(runs):
+        feed_ranker.rank(candidates, affinity, now)
+    ms: float = (perf_counter() - start) * 1000 / runs
+
+    print(f'ranked {count} candidates in {ms:.2f} ms per page')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+'''compare the per row double validation of read models with the bulk
+adapter (posts) and trusted construction (users) used by the services
+
+run from the project root with the environment variables set:
+    python -m benchmarks.bench_read_models
+'''
+from uuid import uuid4
+from time import perf_counter
+from types import SimpleNamespace
+from datetime import date, datetime, timezone
+
+from app.api.v1.schemas.users import UserReadV1, UserResponseV1
+from app.api.v1.schemas.posts import (
+    VisibilityEnum,
+    PostReadV1,
+    PostReadBaseV1,
+    PostResponseV1,
+    post_list_adapter_v1,
+)
+
+
+ROWS: int = 1000
+ROUNDS: int = 20
+
+
+# orm objects are only read through attribute access
+def make_posts() -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            title=f'post title {i}',
+            content='lorem ipsum dolor sit amet ' * 8,
+            visibility=VisibilityEnum.PUBLIC,
+            created_at=datetime.now(timezone.utc),
+        )
+        for i in range(ROWS)
+    ]
+
+
+def make_users() -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            id=uuid4(),
+            display_name=f'Example User {i}',
+            username=f'@example_{i}',
+            email=f'example_{i}@example.com',
+            dob=date(2000, 1, 1),
+            nationality='Nigeria',
+            bio='example bio',
+            created_at=datetime.now(timezone.utc),
+        )
+        for i in range(ROWS)
+    ]
+
+
+def validated_posts(rows: list) -> str:
+    posts: list[PostReadV1] = [
+        PostReadV1(
+            **PostReadBaseV1.model_validate(row).model_dump(),
+            display_name='Example User',
+            username='@example_user',
+            likes=1,
+        )
+        for row in rows
+    ]
+    return PostResponseV1(message='', data=posts).model_dump_json()
+
+
+def bulk_posts(rows: list) -> str:
+    post_rows: list[dict] = [
+        dict(
+            vars(row), display_name='Example User', username='@example_user', likes=1
+        )
+        for row in rows
+    ]
+    posts: list[PostReadV1] = post_list_adapter_v1.validate_python(post_rows)
+    return PostResponseV1(message='', data=posts).model_dump_json()
+
+
+def validated_users(rows: list) -> str:
+    users: list[UserReadV1] = [UserReadV1.model_validate(row) for row in rows]
+    return UserResponseV1(message='', data=users).model_dump_json()
+
+
+def from_db_users(rows: list) -> str:
+    users: list[UserReadV1] = [UserReadV1.from_db(row) for row in rows]
+    return UserResponseV1(message='', data=users).model_dump_json()
+
+
+def timed(fn, rows: list) -> float:
+    start: float = perf_counter()
+    for _ in range(ROUNDS):
+        fn(rows)
+    return (perf_counter() - start) / ROUNDS * 1000
+
+
+def main():
+    cases = (
+        ('posts', make_posts(), validated_posts, bulk_posts),
+        ('users', make_users(), validated_users, from_db_users),
+    )
+    for name, rows, validated, fast in cases:
+        assert validated(rows) == fast(rows)
+
+        validated_ms: float = timed(validated, rows)
+        fast_ms: float = timed(fast, rows)
+        print(
+            f'{ROWS} {name:<6} validated {validated_ms:>7.2f} ms'
+            f'   fast path {fast_ms:>7.2f} ms   x{validated_ms / fast_ms:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
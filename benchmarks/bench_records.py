@@ -0,0 +1,57 @@
+'''compare memory of listing users as ORM entities and as named tuple records
+
+needs a database seeded with users, run from the project root with the
+environment variables set:
+    python -m benchmarks.bench_records [limit]
+'''
+import sys
+import tracemalloc
+from uuid import uuid4
+from sqlalchemy import select
+
+from app.models.users import User
+from app.database.session import SessionLocal
+from app.api.v1.repositories.user_repo import user_repo_v1
+
+
+def measure(fn) -> tuple[int, int, int]:
+    '''returns (retained bytes, peak bytes, identity map size)'''
+    with SessionLocal() as db:
+        tracemalloc.start()
+        result = fn(db)
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        tracked: int = len(db.identity_map)
+        del result
+    return retained, peak, tracked
+
+
+def entities(limit: int):
+    # what get_users returned before, full User rows tracked by the session
+    def run(db):
+        stmt = select(User).limit(limit)
+        return db.execute(stmt).scalars().all()
+    return run
+
+
+def records(limit: int):
+    def run(db):
+        # a random id so no user is excluded from the page
+        return user_repo_v1.get_users(uuid4(), db, limit=limit)
+    return run
+
+
+def main():
+    limit: int = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    for name, fn in (('entities', entities(limit)), ('records', records(limit))):
+        measure(fn)  # warm up the statement cache
+        retained, peak, tracked = measure(fn)
+        print(
+            f'{name:<9} limit {limit}   retained {retained / 1024:>9.1f} KiB'
+            f'   peak {peak / 1024:>9.1f} KiB   identity map {tracked}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+'''compare fastapi's default response serialization with ModelJSONResponse
+
+run from the project root with the environment variables set:
+    python -m benchmarks.bench_serialization
+'''
+import asyncio
+from uuid import uuid4
+from time import perf_counter
+from datetime import datetime, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.core.responses import ModelJSONResponse
+from app.api.v1.schemas.posts import PostReadV1, PostResponseV1
+
+
+ROUNDS: int = 50
+PAGE_SIZES: tuple = (20, 100, 500)
+
+
+def make_page(size: int) -> PostResponseV1:
+    posts: list[PostReadV1] = [
+        PostReadV1(
+            id=uuid4(),
+            title=f'post title {i}',
+            content='lorem ipsum dolor sit amet ' * 8,
+            visibility='public',
+            created_at=datetime.now(timezone.utc),
+            display_name='Example User',
+            username='@example_user',
+            likes=i,
+            comments=i // 2,
+        )
+        for i in range(size)
+    ]
+    return PostResponseV1(message='Posts retrieved successfully', data=posts)
+
+
+async def default_path(field, page: PostResponseV1) -> bytes:
+    # what fastapi does for a route returning a model with response_model set
+    content = await serialize_response(field=field, response_content=page)
+    return JSONResponse(content).body
+
+
+async def model_path(page: PostResponseV1) -> bytes:
+    return ModelJSONResponse(page).body
+
+
+async def timed(coro_fn, *args) -> float:
+    start: float = perf_counter()
+    for _ in range(ROUNDS):
+        await coro_fn(*args)
+    return (perf_counter() - start) / ROUNDS * 1000
+
+
+async def main():
+    field = create_model_field(name='response', type_=PostResponseV1, mode='serialization')
+
+    for size in PAGE_SIZES:
+        page: PostResponseV1 = make_page(size)
+        assert await default_path(field, page) == await model_path(page)
+
+        default_ms: float = await timed(default_path, field, page)
+        model_ms: float = await timed(model_path, page)
+        print(
+            f'{size:>4} posts   default {default_ms:>7.3f} ms'
+            f'   ModelJSONResponse {model_ms:>7.3f} ms   x{default_ms / model_ms:.2f}'
+        )
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
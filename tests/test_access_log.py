@@ -0,0 +1,87 @@
+import pytest
+import orjson
+from fastapi import FastAPI
+from fastapi.requests import Request
+from fastapi.testclient import TestClient
+from starlette.middleware import Middleware
+
+from app.core.access_log import AccessLogger
+from app.core.middleware import HeaderMiddleware, AccessLogMiddleware
+
+
+@pytest.fixture
+def logger() -> AccessLogger:
+    return AccessLogger(
+        buffer_size=4,
+        sample_rate=1.0,
+        exclude_paths={'/health'},
+        flush_interval=1.0,
+        flush_batch_size=2,
+    )
+
+
+def test_access_log_excludes_health(logger):
+    assert logger.is_excluded('/health')
+    assert not logger.is_excluded('/api/v1/posts/feed/')
+
+
+def test_access_log_ring_buffer_evicts_oldest(logger):
+    for status in range(200, 206):
+        logger.record('GET', '/api/v1/posts/feed/', status, 10)
+
+    assert len(logger.buffer) == 4
+    assert logger.dropped == 2
+    assert logger.buffer[0][3] == 202
+
+
+def test_access_log_sampling_keeps_server_errors():
+    logger = AccessLogger(
+        buffer_size=4,
+        sample_rate=0.0,
+        exclude_paths=set(),
+        flush_interval=1.0,
+        flush_batch_size=2,
+    )
+    logger.record('GET', '/api/v1/posts/feed/', 200, 10)
+    logger.record('GET', '/api/v1/posts/feed/', 500, 10)
+
+    assert len(logger.buffer) == 1
+    assert logger.buffer[0][3] == 500
+
+
+def test_access_log_drain_is_batched_json(logger):
+    for _ in range(3):
+        logger.record('PATCH', '/api/v1/posts/{post_id}/like/', 200, 10, 'user_id')
+
+    records = logger.drain()
+    lines = logger.serialize(records).splitlines()
+
+    assert len(records) == 2
+    assert len(logger.buffer) == 1
+    assert orjson.loads(lines[0])['route'] == '/api/v1/posts/{post_id}/like/'
+
+
+def test_access_log_middleware_records_route_template(logger):
+    app = FastAPI(
+        middleware=[
+            Middleware(HeaderMiddleware, headers={'X-App-Name': 'Social Media API'}),
+            Middleware(AccessLogMiddleware, logger=logger),
+        ]
+    )
+
+    @app.get('/posts/{post_id}/')
+    async def get_post(post_id: str, request: Request):
+        request.state.user_id = 'fake_user_id'
+        return {'id': post_id}
+
+    with TestClient(app) as client:
+        res = client.get('/posts/1/')
+
+    assert res.headers['x-app-name'] == 'Social Media API'
+    _, method, route, status, _, user_id = logger.buffer[0]
+    assert (method, route, status, user_id) == (
+        'GET',
+        '/posts/{post_id}/',
+        200,
+        'fake_user_id',
+    )
@@ -0,0 +1,80 @@
+import pytest
+import asyncio
+
+from app.core.admission import AdmissionController
+
+
+budgets: dict = {'critical': 1.0, 'normal': 1.0, 'expensive': 0.01}
+
+
+@pytest.fixture
+def controller() -> AdmissionController:
+    return AdmissionController(
+        slots=2,
+        budgets=budgets,
+        expensive_share=0.5,
+        routes={
+            'GET /auth/refresh/': 'critical',
+            'GET /posts/search/': 'expensive',
+        },
+        exempt_paths={'/health'},
+    )
+
+
+def test_admission_priorities(controller):
+    assert controller.priority('GET', '/health') is None
+    assert controller.priority('GET', '/auth/refresh/') == 0
+    assert controller.priority('GET', '/posts/1/') == 1
+    assert controller.priority('GET', '/posts/search/') == 2
+
+
+def test_admission_sheds_expensive_over_share(controller):
+    async def run() -> list[bool]:
+        admitted: list[bool] = [await controller.acquire(2) for _ in range(2)]
+        admitted.append(await controller.acquire(1))
+        return admitted
+
+    assert asyncio.run(run()) == [True, False, True]
+    assert controller.shed == 1
+
+
+def test_admission_wakes_critical_first():
+    controller = AdmissionController(
+        slots=1, budgets=budgets, expensive_share=0.5, routes={}, exempt_paths=set()
+    )
+
+    async def run() -> list[int]:
+        order: list[int] = []
+
+        async def request(priority: int):
+            if await controller.acquire(priority):
+                order.append(priority)
+                await asyncio.sleep(0)
+                controller.release(priority, 0.01)
+
+        assert await controller.acquire(1)
+        tasks = [asyncio.create_task(request(p)) for p in (1, 0)]
+        await asyncio.sleep(0)
+        controller.release(1, 0.01)
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(run()) == [0, 1]
+
+
+def test_admission_sheds_after_latency_budget():
+    controller = AdmissionController(
+        slots=1,
+        budgets=dict(budgets, normal=0.05),
+        expensive_share=0.5,
+        routes={},
+        exempt_paths=set(),
+    )
+
+    async def run() -> bool:
+        assert await controller.acquire(1)
+        return await controller.acquire(1)
+
+    assert asyncio.run(run()) is False
+    assert controller.shed == 1
+    assert not controller.waiters[1]
@@ -1,4 +1,20 @@
+from threading import Barrier
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.orm import Session
+from datetime import datetime, timezone, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.models.auth import RefreshToken
+from app.models.users import User, Role
+from app.core.exceptions import AuthenticationError
+from app.api.v1.schemas.users import UserCreateV1
+from app.api.v1.repositories.user_repo import user_repo_v1
+from app.core.tokens import access_token_codec
+from app.core.revocations import RevocationList
+from app.api.v1.schemas.auth import TokenStatus
 from tests.fake_data import user_create_1
+from app.api.v1.services.auth_service import auth_service_v1
 
 '''tests are independent and can run alone and pass'''
 
@@ -50,6 +66,60 @@ def test_get_access_token(create_role, sign_up, test_client):
     assert 'access_token' in res.json()
 
 
+def test_refresh_token_spent_once(test_engine):
+    '''concurrent refreshes with the same token rotate it only once
+
+    each rotation runs in its own session and connection on committed rows
+    so the rotations race on the row lock, the test data is removed after'''
+    user_create: dict = dict(
+        user_create_1, username='@refresh_race', email='refresh_race@example.com'
+    )
+    role_created: bool = False
+
+    with Session(test_engine) as db:
+        if not user_repo_v1.get_role('user', db):
+            user_repo_v1.create_role(Role(name='user'), db)
+            db.commit()
+            role_created = True
+        auth_service_v1.sign_up(UserCreateV1(**user_create), db)
+        _, refresh_token = auth_service_v1.sign_in(
+            user_create['email'], user_create['password'], db
+        )
+
+    workers: int = 8
+    barrier = Barrier(workers)
+
+    def refresh(_) -> bool:
+        with Session(test_engine) as db:
+            barrier.wait()
+            try:
+                auth_service_v1.create_access_token(refresh_token, db)
+                return True
+            except AuthenticationError:
+                return False
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            rotated = list(executor.map(refresh, range(workers)))
+
+        with Session(test_engine) as db:
+            statuses = db.execute(
+                select(RefreshToken.status)
+                .join(User, User.id == RefreshToken.user_id)
+                .where(User.email == user_create['email'])
+            ).scalars().all()
+
+        assert rotated.count(True) == 1
+        assert sorted(statuses) == [TokenStatus.USED, TokenStatus.VALID]
+    finally:
+        with Session(test_engine) as db:
+            # refresh tokens are deleted with the user
+            db.execute(delete(User).where(User.email == user_create['email']))
+            if role_created:
+                db.execute(delete(Role).where(Role.name == 'user'))
+            db.commit()
+
+
 def test_sign_out(create_role, sign_up, test_client):
     sign_in_res = test_client.post(
         '/api/v1/auth/sign-in/',
@@ -66,6 +136,29 @@ def test_sign_out(create_role, sign_up, test_client):
     assert res.status_code == 200
 
 
+def test_access_token_session(create_role, sign_up, test_client):
+    '''protected endpoints only need the access token until its session is
+    signed out'''
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+    headers: dict = {'Authorization': f'Bearer {sign_in_res.json()['access_token']}'}
+    refresh_token: str = test_client.cookies.get('refresh_token')
+
+    test_client.cookies.clear()
+    res = test_client.get('/api/v1/users/me/profile/', headers=headers)
+    assert res.status_code == 200
+
+    test_client.cookies.set('refresh_token', refresh_token)
+    test_client.patch('/api/v1/auth/sign-out/', headers=headers)
+    res = test_client.get('/api/v1/users/me/profile/', headers=headers)
+    assert res.status_code == 401
+
+
 def test_update_password(create_role, sign_up, test_client):
     sign_in_res = test_client.post(
         '/api/v1/auth/sign-in/',
@@ -178,3 +271,111 @@ def test_unauthenticated_auth(create_role, sign_up, test_client):
     )
 
     assert res.status_code == 401
+
+
+def test_sign_in_revokes_tokens(create_role, sign_up, test_client, test_db_session):
+    '''signing in again revokes the previous valid token'''
+    for _ in range(2):
+        test_client.post(
+            '/api/v1/auth/sign-in/',
+            data={
+                'username': user_create_1.get('email'),
+                'password': user_create_1.get('password'),
+            },
+        )
+
+    statuses = test_db_session.execute(select(RefreshToken.status)).scalars().all()
+
+    assert sorted(statuses) == [TokenStatus.REVOKED, TokenStatus.VALID]
+
+
+def test_delete_refresh_tokens(
+    create_role, sign_up, test_client, test_db_session, monkeypatch
+):
+    '''used tokens are deleted one per batch and the valid token is kept'''
+    monkeypatch.setattr(settings, 'TOKEN_CLEANUP_BATCH_SIZE', 1)
+    monkeypatch.setattr(settings, 'TOKEN_CLEANUP_THROTTLE', 0)
+
+    test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+    # each refresh marks the previous token as used
+    test_client.get('/api/v1/auth/refresh/')
+    test_client.get('/api/v1/auth/refresh/')
+    # used tokens are kept until the access tokens of their session expire
+    used_at = datetime.now(timezone.utc) - timedelta(
+        minutes=settings.ACCESS_TOKEN_EXPIRE_TIME + 1
+    )
+    test_db_session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.status == TokenStatus.USED)
+        .values(used_at=used_at)
+    )
+
+    deleted = auth_service_v1.delete_refresh_tokens(test_db_session)
+    remaining = test_db_session.execute(
+        select(func.count()).select_from(RefreshToken)
+    ).scalar()
+
+    assert deleted == 2
+    assert remaining == 1
+
+
+def test_maintain_unpartitioned_tokens(
+    create_role, sign_up, test_client, test_db_session
+):
+    '''partition maintenance deletes spent tokens when the table was never
+    partitioned'''
+    test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+    test_client.get('/api/v1/auth/refresh/')
+    test_db_session.execute(
+        update(RefreshToken)
+        .where(RefreshToken.status == TokenStatus.USED)
+        .values(used_at=datetime.now(timezone.utc) - timedelta(days=1))
+    )
+
+    maintained = auth_service_v1.maintain_token_partitions(test_db_session)
+    statuses = test_db_session.execute(select(RefreshToken.status)).scalars().all()
+
+    assert maintained == (0, 0)
+    assert statuses == [TokenStatus.VALID]
+
+
+def test_cleanup_keeps_revoked_sessions(
+    create_role, sign_up, test_client, test_db_session
+):
+    '''a worker loading its revocation list after the cleanup still sees
+    sessions signed out within the access token lifetime'''
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+    access_token: str = sign_in_res.json()['access_token']
+    test_client.patch(
+        '/api/v1/auth/sign-out/',
+        headers={'Authorization': f'Bearer {access_token}'},
+    )
+
+    auth_service_v1.delete_refresh_tokens(test_db_session)
+    revocation_list = RevocationList(
+        ttl=60,
+        sync_interval=5,
+        session_factory=lambda: Session(bind=test_db_session.connection()),
+    )
+    since = datetime.now(timezone.utc) - timedelta(hours=1)
+    sids = [str(sid) for sid in revocation_list.load(since)]
+
+    assert access_token_codec.decode(access_token)['sid'] in sids
@@ -0,0 +1,42 @@
+from uuid import uuid4
+
+from app.core import comment_cache
+from app.core.comment_cache import CommentPageCache
+
+
+def test_comment_cache_only_keeps_first_pages_of_hot_posts():
+    cache = CommentPageCache(size=10, ttl=60, min_comments=100)
+
+    assert cache.cacheable(100)
+    assert not cache.cacheable(99)
+    assert not cache.cacheable(100, offset=10)
+    assert not cache.cacheable(100, after=uuid4())
+
+
+def test_comment_cache_invalidates_and_expires(monkeypatch):
+    cache = CommentPageCache(size=10, ttl=60, min_comments=100)
+    post_id = uuid4()
+    key: tuple = (None, None, 10)
+
+    cache.put(post_id, key, ['comment'])
+    assert cache.get(post_id, key) == ['comment']
+    assert cache.get(post_id, ('likes', 'desc', 10)) is None
+
+    cache.invalidate(post_id)
+    assert cache.get(post_id, key) is None
+
+    cache.put(post_id, key, ['comment'])
+    now: float = comment_cache.time()
+    monkeypatch.setattr(comment_cache, 'time', lambda: now + 61)
+    assert cache.get(post_id, key) is None
+
+
+def test_comment_cache_evicts_oldest_post():
+    cache = CommentPageCache(size=2, ttl=60, min_comments=100)
+    post_ids: list = [uuid4() for _ in range(3)]
+
+    for post_id in post_ids:
+        cache.put(post_id, (None, None, 10), [post_id])
+
+    assert cache.get(post_ids[0], (None, None, 10)) is None
+    assert cache.get(post_ids[2], (None, None, 10)) == [post_ids[2]]
@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.core.follow_graph import FollowGraph, ragged_ranges
+
+
+def make_graph(edges: list[tuple[int, int]], size: int) -> FollowGraph:
+    sources, targets = zip(*edges)
+    return FollowGraph.from_edges(
+        size, np.array(sources, np.int32), np.array(targets, np.int32)
+    )
+
+
+def suggestions(graph: FollowGraph, top_k: int = 10, max_following: int = 10):
+    owners, suggested, mutuals = graph.suggest(
+        np.arange(graph.size), top_k, max_following
+    )
+    return list(zip(owners.tolist(), suggested.tolist(), mutuals.tolist()))
+
+
+def test_ragged_ranges():
+    ranges = ragged_ranges(np.array([5, 0, 9]), np.array([2, 0, 3]))
+    assert ranges.tolist() == [5, 6, 9, 10, 11]
+
+
+def test_follow_graph_ranks_friends_of_friends():
+    # edges are not sorted by follower
+    graph = make_graph(
+        [(2, 3), (0, 1), (1, 3), (0, 2), (1, 4), (2, 0), (3, 4), (0, 3)], 5
+    )
+
+    assert graph.indptr.tolist() == [0, 3, 5, 7, 8, 8]
+    # 3 is followed by 0 already, 0 is not suggested to itself
+    assert suggestions(graph) == [(0, 4, 2), (2, 1, 1), (2, 4, 1)]
+
+
+def test_follow_graph_limits():
+    # user 0 follows 1, 2 and 3 who all follow 4 and 5, 5 is also followed by 6
+    edges = [(0, 1), (0, 2), (0, 3), (6, 5)]
+    edges += [(user, target) for user in (1, 2, 3) for target in (4, 5)]
+    graph = make_graph(edges, 7)
+
+    assert suggestions(graph, top_k=1)[0] == (0, 4, 3)
+    # only the first user followed by 0 and the first user it follows
+    assert suggestions(graph, max_following=1)[0] == (0, 4, 1)
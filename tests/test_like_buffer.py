@@ -0,0 +1,103 @@
+import pytest
+import asyncio
+from uuid import uuid4
+
+from app.core.like_buffer import LikeBuffer
+
+
+@pytest.fixture
+def buffer() -> LikeBuffer:
+    return LikeBuffer(max_size=3, flush_interval=1.0, flush_batch_size=2)
+
+
+def test_like_buffer_keeps_latest_intent(buffer):
+    user_id, post_id = uuid4(), uuid4()
+
+    buffer.record(user_id, post_id, True)
+    buffer.record(user_id, post_id, False)
+    buffer.record(user_id, post_id, True)
+
+    assert len(buffer.pending) == 1
+    assert buffer.state(user_id, post_id) is True
+    assert buffer.state(user_id, uuid4()) is None
+
+
+def test_like_buffer_full_falls_back(buffer):
+    post_id = uuid4()
+    user_ids = [uuid4() for _ in range(3)]
+    for user_id in user_ids:
+        assert buffer.record(user_id, post_id, True)
+
+    assert not buffer.record(uuid4(), post_id, True)
+    # a pending key can still change its intent
+    assert buffer.record(user_ids[0], post_id, False)
+
+
+def test_like_buffer_full_keeps_flushing_keys():
+    '''an unlike recorded while its like is flushed and the buffer is full
+    is written after the like instead of directly'''
+    buffer = LikeBuffer(max_size=1, flush_interval=1.0, flush_batch_size=2)
+    user_id, post_id = uuid4(), uuid4()
+    buffer.record(user_id, post_id, True)
+    batches: list[dict] = []
+
+    def write(batch: dict) -> tuple[int, int]:
+        if not batches:
+            assert buffer.record(uuid4(), post_id, True)
+            assert not buffer.record(uuid4(), post_id, True)
+            assert buffer.record(user_id, post_id, False)
+        batches.append(batch)
+        return 0, 0
+
+    buffer.write = write
+    asyncio.run(buffer.flush())
+
+    assert batches[0] == {(user_id, post_id): True}
+    assert batches[1][(user_id, post_id)] is False
+    assert buffer.pending == {} and buffer.flushing == {}
+
+
+def test_like_buffer_adjusts_own_likes(buffer):
+    user_id, post_id = uuid4(), uuid4()
+
+    assert buffer.adjust_likes(user_id, post_id, False, 4) == 4
+    buffer.record(user_id, post_id, True)
+    assert buffer.adjust_likes(user_id, post_id, False, 4) == 5
+    assert buffer.adjust_likes(user_id, post_id, True, 5) == 5
+    buffer.record(user_id, post_id, False)
+    assert buffer.adjust_likes(user_id, post_id, True, 5) == 4
+
+
+def test_like_buffer_drain_is_batched_and_readable(buffer):
+    post_id = uuid4()
+    user_ids = [uuid4() for _ in range(3)]
+    for user_id in user_ids:
+        buffer.record(user_id, post_id, True)
+
+    batch = buffer.drain()
+
+    assert len(batch) == 2
+    assert len(buffer.pending) == 1
+    # drained intents are served until they are committed
+    assert all(buffer.state(user_id, post_id) for user_id in user_ids)
+    buffer.done(batch)
+    assert buffer.flushing == {}
+
+
+def test_like_buffer_requeues_failed_flush():
+    def session_factory():
+        raise ConnectionError()
+
+    buffer = LikeBuffer(
+        max_size=3,
+        flush_interval=1.0,
+        flush_batch_size=2,
+        session_factory=session_factory,
+    )
+    user_id, post_id = uuid4(), uuid4()
+    buffer.record(user_id, post_id, True)
+
+    asyncio.run(buffer.flush())
+
+    assert buffer.pending == {(user_id, post_id): True}
+    assert buffer.flushing == {}
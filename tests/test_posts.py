@@ -1,8 +1,17 @@
+import asyncio
 from uuid import uuid4
 from pathlib import Path
+from contextlib import contextmanager
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
 
 
+from app.models.posts import Post, Comment
+from app.models.users import User
 from app.core.config import settings
+from app.core.trending import trending_counter
+from app.api.v1.repositories.sorting import sort_page
+from app.api.v1.repositories.post_repo import post_repo_v1
 from tests.fake_data import user_create_1, user_create_2, post_create_1
 
 
@@ -24,6 +33,56 @@ def test_get_feed_posts(create_role, create_post, test_client):
     assert len(res.json()['data']) >= 1
 
 
+def test_get_ranked_feed_posts(create_role, create_post, test_client):
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+
+    res = test_client.get(
+        '/api/v1/posts/feed/?mode=ranked',
+        headers={'Authorization': f'Bearer {sign_in_res.json()['access_token']}'},
+    )
+
+    assert res.status_code == 200
+    assert res.json()['data'][0]['title'] == post_create_1.get('title')
+
+
+def test_feed_posts_use_indexes(create_role, create_post, test_db_session):
+    '''every feed branch is read from an index in created_at order'''
+    user_id = test_db_session.execute(
+        select(User.id).where(User.username == user_create_1.get('username'))
+    ).scalar()
+    test_db_session.execute(
+        text(
+            "INSERT INTO posts (id, title, content, user_id, visibility, created_at) "
+            "SELECT uuid_generate_v4(), 'seeded post', 'seeded content', :user_id, "
+            "(ARRAY['PUBLIC', 'FOLLOWERS', 'PRIVATE'])[i % 3 + 1]::visibilityenum, "
+            "now() - i * interval '1 minute' FROM generate_series(1, 5000) AS i"
+        ),
+        {'user_id': user_id},
+    )
+    test_db_session.execute(text('ANALYZE posts'))
+    test_db_session.execute(text('ANALYZE follows'))
+
+    # a reader that follows nobody and the author reading their own feed
+    for reader_id in (uuid4(), user_id):
+        stmt = post_repo_v1.feed_stmt(reader_id, offset=0, limit=10)
+        sql = stmt.compile(
+            dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+        )
+        plan = '\n'.join(
+            test_db_session.execute(text(f'EXPLAIN {sql}')).scalars().all()
+        )
+
+        assert 'idx_post_user_created_at' in plan
+        assert 'idx_post_public_created_at' in plan
+        assert 'Seq Scan on posts' not in plan
+
+
 def test_get_following_posts(create_role, create_post, test_client):
     test_client.post('/api/v1/auth/sign-up/', json=user_create_2)
 
@@ -89,6 +148,56 @@ def test_get_post_by_id(create_role, create_post, test_client):
     assert res.status_code == 200
 
 
+def test_get_posts_by_ids(create_role, create_post, test_client):
+    post = create_post
+    test_client.post('/api/v1/auth/sign-up/', json=user_create_2)
+
+    tokens: list = []
+    for user_create in (user_create_1, user_create_2):
+        sign_in_res = test_client.post(
+            '/api/v1/auth/sign-in/',
+            data={
+                'username': user_create.get('email'),
+                'password': user_create.get('password'),
+            },
+        )
+        tokens.append(sign_in_res.json()['access_token'])
+
+    private_res = test_client.post(
+        '/api/v1/posts/',
+        json=dict(post_create_1, visibility='private'),
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+    post_id = post.json()['data']['id']
+    ids: list = [private_res.json()['data']['id'], str(uuid4()), post_id, post_id]
+
+    res = test_client.post(
+        '/api/v1/posts/batch/',
+        json={'ids': ids},
+        headers={'Authorization': f'Bearer {tokens[1]}'},
+    )
+
+    # the private post and the missing id are skipped, duplicates collapse
+    assert res.status_code == 200
+    assert [p['id'] for p in res.json()['data']] == [post_id]
+
+    res = test_client.post(
+        '/api/v1/posts/batch/',
+        json={'ids': ids},
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+
+    assert [p['id'] for p in res.json()['data']] == [ids[0], post_id]
+
+    res = test_client.post(
+        '/api/v1/posts/batch/',
+        json={'ids': [str(uuid4()) for _ in range(settings.POST_BATCH_MAX_SIZE + 1)]},
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+
+    assert res.status_code == 422
+
+
 def test_get_post_not_found(create_role, create_post, test_client):
     sign_in_res = test_client.post(
         '/api/v1/auth/sign-in/',
@@ -213,6 +322,90 @@ def test_create_comment(create_role, create_post, test_client):
     assert res.status_code == 201
 
 
+def test_get_comment_replies(create_role, create_post, test_client):
+    post = create_post
+    test_client.post('/api/v1/auth/sign-up/', json=user_create_2)
+
+    tokens: list = []
+    for user_create in (user_create_1, user_create_2):
+        sign_in_res = test_client.post(
+            '/api/v1/auth/sign-in/',
+            data={
+                'username': user_create.get('email'),
+                'password': user_create.get('password'),
+            },
+        )
+        tokens.append(sign_in_res.json()['access_token'])
+
+    post_id = post.json()['data']['id']
+
+    comment_res = test_client.post(
+        f'/api/v1/posts/{post_id}/comments/',
+        json={'content': 'fake_comment'},
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+    comment_id = comment_res.json()['data']['id']
+
+    reply_res = test_client.post(
+        f'/api/v1/posts/{post_id}/comments/',
+        json={'content': 'fake_reply', 'parent_id': comment_id},
+        headers={'Authorization': f'Bearer {tokens[1]}'},
+    )
+    assert reply_res.status_code == 201
+    reply_id = reply_res.json()['data']['id']
+
+    test_client.post(
+        f'/api/v1/posts/{post_id}/comments/',
+        json={'content': 'fake_nested_reply', 'parent_id': reply_id},
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+
+    res = test_client.get(
+        f'/api/v1/posts/{post_id}/comments/',
+        headers={'Authorization': f'Bearer {tokens[1]}'},
+    )
+
+    assert res.status_code == 200
+    # replies are nested under their parent, not listed at the top level
+    assert len(res.json()['data']) == 1
+    comment = res.json()['data'][0]
+    assert comment['username'] == user_create_1.get('username')
+    assert comment['reply_count'] == 1
+    reply = comment['replies'][0]
+    assert reply['username'] == user_create_2.get('username')
+    assert reply['replies'][0]['content'] == 'fake_nested_reply'
+
+    # deleting the comment deletes its replies and uncounts them
+    test_client.delete(
+        f'/api/v1/posts/{post_id}/comments/{comment_id}/',
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+    res = test_client.get(
+        f'/api/v1/posts/{post_id}/',
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+    assert res.json()['data']['comments'] == 0
+
+
+def test_reply_to_comment_of_other_post(create_role, create_post, test_client):
+    post = create_post
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+
+    res = test_client.post(
+        f'/api/v1/posts/{post.json()['data']['id']}/comments/',
+        json={'content': 'fake_reply', 'parent_id': str(uuid4())},
+        headers={'Authorization': f'Bearer {sign_in_res.json()['access_token']}'},
+    )
+
+    assert res.status_code == 404
+
+
 def test_update_post(create_role, create_post, test_client):
     post = create_post
 
@@ -257,6 +450,201 @@ def test_like_post(create_role, create_post, test_client):
     assert res.status_code == 200
 
 
+def test_sort_posts_by_likes(create_role, create_post, test_client):
+    post = create_post
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+
+    post_id = post.json()['data']['id']
+
+    test_client.patch(
+        f'/api/v1/posts/{post_id}/like/',
+        headers={'Authorization': f'Bearer {sign_in_res.json()['access_token']}'},
+    )
+    test_client.post(
+        f'/api/v1/posts/{post_id}/comments/',
+        json={'content': 'fake_comment'},
+        headers={'Authorization': f'Bearer {sign_in_res.json()['access_token']}'},
+    )
+
+    res = test_client.get(
+        f'/api/v1/users/{user_create_1.get('username')}/posts/?sort=likes&order=desc',
+        headers={'Authorization': f'Bearer {sign_in_res.json()['access_token']}'},
+    )
+
+    assert res.status_code == 200
+    assert res.json()['data'][0]['likes'] == 1
+    assert res.json()['data'][0]['comments'] == 1
+
+    # the cursor continues after the only post
+    res = test_client.get(
+        f'/api/v1/users/{user_create_1.get('username')}/posts/'
+        f'?sort=likes&order=desc&after={post_id}',
+        headers={'Authorization': f'Bearer {sign_in_res.json()['access_token']}'},
+    )
+
+    assert res.status_code == 404
+
+
+def test_listings_read_counters_with_page(
+    create_role, create_post, test_client, test_db_session
+):
+    '''listings take their counts from the page query, no post or comment
+    is loaded per row'''
+    post = create_post
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+    headers: dict = {'Authorization': f'Bearer {sign_in_res.json()['access_token']}'}
+    post_id = post.json()['data']['id']
+
+    test_client.patch(f'/api/v1/posts/{post_id}/like/', headers=headers)
+    test_client.post(
+        f'/api/v1/posts/{post_id}/comments/',
+        json={'content': 'fake_comment'},
+        headers=headers,
+    )
+    test_db_session.expunge_all()
+
+    username: str = user_create_1.get('username')
+    for url in (
+        '/api/v1/posts/feed/',
+        f'/api/v1/users/{username}/posts/',
+        f'/api/v1/users/{username}/posts/likes/',
+    ):
+        res = test_client.get(url, headers=headers)
+        row: dict = res.json()['data'][0]
+        assert res.status_code == 200
+        assert (row['likes'], row['comments']) == (1, 1)
+
+    res = test_client.get(
+        f'/api/v1/users/{username}/posts/comments/', headers=headers
+    )
+    assert res.status_code == 200
+    assert res.json()['data'][0]['likes'] == 0
+
+    loaded = test_db_session.identity_map.values()
+    assert not [obj for obj in loaded if isinstance(obj, (Post, Comment))]
+
+
+def test_liked_by_me(create_role, create_post, test_client):
+    post = create_post
+    test_client.post('/api/v1/auth/sign-up/', json=user_create_2)
+
+    tokens: list = []
+    for user_create in (user_create_1, user_create_2):
+        sign_in_res = test_client.post(
+            '/api/v1/auth/sign-in/',
+            data={
+                'username': user_create.get('email'),
+                'password': user_create.get('password'),
+            },
+        )
+        tokens.append(sign_in_res.json()['access_token'])
+
+    post_id = post.json()['data']['id']
+    comment_res = test_client.post(
+        f'/api/v1/posts/{post_id}/comments/',
+        json={'content': 'fake_comment'},
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+    comment_id = comment_res.json()['data']['id']
+
+    test_client.patch(
+        f'/api/v1/posts/{post_id}/like/',
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+    test_client.patch(
+        f'/api/v1/posts/{post_id}/comments/{comment_id}/like/',
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+
+    # the flags are the reader's, the like counts are shared
+    for token, liked in ((tokens[0], True), (tokens[1], False)):
+        res = test_client.get(
+            '/api/v1/posts/feed/',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        feed_post = next(p for p in res.json()['data'] if p['id'] == post_id)
+        assert feed_post['liked_by_me'] is liked
+        assert feed_post['likes'] == 1
+
+        res = test_client.get(
+            f'/api/v1/posts/{post_id}/comments/',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert res.json()['data'][0]['liked_by_me'] is liked
+        assert res.json()['data'][0]['likes'] == 1
+
+
+def test_sorted_posts_use_indexes(create_role, create_post, test_db_session):
+    '''engagement sorts are read from the counter indexes'''
+    user_id = test_db_session.execute(
+        select(User.id).where(User.username == user_create_1.get('username'))
+    ).scalar()
+    test_db_session.execute(
+        text(
+            "INSERT INTO posts (id, title, content, user_id, visibility, like_count) "
+            "SELECT uuid_generate_v4(), 'seeded post', 'seeded content', :user_id, "
+            "'PUBLIC', i % 100 FROM generate_series(1, 5000) AS i"
+        ),
+        {'user_id': user_id},
+    )
+    test_db_session.execute(text('ANALYZE posts'))
+
+    stmt = sort_page(
+        select(Post.id).where(Post.user_id == user_id),
+        Post.like_count,
+        Post.id,
+        descending=True,
+    )
+    sql = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+    )
+    plan = '\n'.join(test_db_session.execute(text(f'EXPLAIN {sql}')).scalars().all())
+
+    assert 'idx_post_user_likes' in plan
+    assert 'Sort' not in plan
+
+
+def test_get_trending_posts(
+    create_role, create_post, test_client, test_db_session, monkeypatch
+):
+    @contextmanager
+    def session_factory():
+        yield test_db_session
+
+    monkeypatch.setattr(trending_counter, 'session_factory', session_factory)
+    post_id = create_post.json()['data']['id']
+
+    sign_in_res = test_client.post(
+        '/api/v1/auth/sign-in/',
+        data={
+            'username': user_create_1.get('email'),
+            'password': user_create_1.get('password'),
+        },
+    )
+    headers: dict = {'Authorization': f'Bearer {sign_in_res.json()['access_token']}'}
+
+    test_client.patch(f'/api/v1/posts/{post_id}/like/', headers=headers)
+    asyncio.run(trending_counter.refresh())
+
+    res = test_client.get('/api/v1/posts/trending/', headers=headers)
+
+    assert res.status_code == 200
+    assert res.json()['data'][0]['id'] == post_id
+    assert res.json()['data'][0]['score'] >= 1
+
+
 def test_unlike_post(create_role, create_post, test_client):
     post = create_post
 
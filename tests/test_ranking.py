@@ -0,0 +1,60 @@
+from uuid import uuid4
+from datetime import datetime, timedelta, timezone
+
+from app.core.ranking import FeedRanker
+from app.api.v1.repositories.records import FeedCandidateRecord
+
+
+now = datetime.now(timezone.utc)
+
+
+def make_ranker() -> FeedRanker:
+    return FeedRanker(
+        half_life=6.0,
+        recency_weight=1.0,
+        engagement_weight=1.0,
+        affinity_weight=1.0,
+        comment_weight=2.0,
+    )
+
+
+def candidate(hours: float, likes: int = 0, comments: int = 0, user_id=None):
+    return FeedCandidateRecord(
+        id=uuid4(),
+        user_id=user_id or uuid4(),
+        created_at=now - timedelta(hours=hours),
+        likes=likes,
+        comments=comments,
+    )
+
+
+def test_ranker_prefers_recent_posts():
+    candidates = [candidate(hours) for hours in (30, 1, 12)]
+
+    ranked = make_ranker().rank(candidates, {}, now)
+
+    assert ranked == [candidates[1], candidates[2], candidates[0]]
+
+
+def test_ranker_engagement_and_affinity():
+    author_id = uuid4()
+    quiet = candidate(2)
+    engaged = candidate(3, likes=40, comments=10)
+    followed = candidate(3, user_id=author_id)
+
+    ranked = make_ranker().rank([quiet, engaged, followed], {author_id: 8}, now)
+
+    assert ranked.index(engaged) < ranked.index(quiet)
+    assert ranked.index(followed) < ranked.index(quiet)
+
+
+def test_ranker_pages():
+    candidates = [candidate(hours) for hours in range(25)]
+    ranker = make_ranker()
+
+    pages = [ranker.rank(candidates, {}, now, offset, 10) for offset in (0, 10, 20)]
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == candidates
+    assert ranker.rank(candidates, {}, now, 30, 10) == []
+    assert ranker.rank([], {}, now) == []
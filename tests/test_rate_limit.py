@@ -0,0 +1,84 @@
+import pytest
+import asyncio
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.middleware import Middleware
+
+from app.core.tokens import access_token_codec
+from app.core.middleware import RateLimitMiddleware
+from app.core.rate_limit import RateLimiter, RateLimitStore, LocalRateLimitStore
+
+
+@pytest.fixture
+def limiter() -> RateLimiter:
+    return RateLimiter(
+        limits={'PATCH /posts/{post_id}/like/': (2, 60.0)},
+        store=LocalRateLimitStore(max_keys=10),
+    )
+
+
+def test_gcra_allows_burst_then_one_per_interval():
+    store = LocalRateLimitStore(max_keys=10)
+
+    def acquire(now: float) -> float:
+        return asyncio.run(store.acquire('key', 10.0, 30.0, now))
+
+    # 3 requests every 30 seconds
+    assert [acquire(0.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert acquire(0.0) == 10.0
+    assert acquire(4.0) == 6.0
+    assert acquire(10.0) == 0.0
+    assert acquire(10.0) == 10.0
+
+
+def test_rate_limit_store_evicts_idle_keys():
+    store = LocalRateLimitStore(max_keys=2)
+    asyncio.run(store.acquire('idle', 1.0, 1.0, 0.0))
+    asyncio.run(store.acquire('active', 10.0, 10.0, 0.0))
+    asyncio.run(store.acquire('new', 10.0, 10.0, 5.0))
+
+    assert set(store.tats) == {'active', 'new'}
+
+
+def test_rate_limit_store_requires_acquire():
+    class IncompleteStore(RateLimitStore):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
+
+
+def test_rate_limit_keys_by_user_then_address(limiter):
+    token: str = access_token_codec.encode({'sub': 'user_id', 'exp': 2**32})
+
+    assert limiter.client_key(
+        [(b'authorization', f'Bearer {token}'.encode())], ('1.2.3.4', 80)
+    ) == 'user:user_id'
+    assert limiter.client_key(
+        [(b'authorization', b'Bearer forged')], ('1.2.3.4', 80)
+    ) == 'ip:1.2.3.4'
+    assert limiter.match('GET', '/posts/1/like/') is None
+
+
+def test_rate_limit_middleware_returns_429_with_retry_after(limiter):
+    app = FastAPI(middleware=[Middleware(RateLimitMiddleware, limiter=limiter)])
+
+    @app.patch('/posts/{post_id}/like/')
+    async def like_post(post_id: str):
+        return {'id': post_id}
+
+    @app.get('/posts/{post_id}/')
+    async def get_post(post_id: str):
+        return {'id': post_id}
+
+    with TestClient(app) as client:
+        statuses = [client.patch('/posts/1/like/').status_code for _ in range(2)]
+        res = client.patch('/posts/2/like/')
+        other = client.get('/posts/1/')
+
+    assert statuses == [200, 200]
+    assert res.status_code == 429
+    assert res.headers['retry-after'] == '30'
+    assert res.json()['error_code'] == 'Too Many Requests'
+    assert other.status_code == 200
+    assert limiter.limited == 1
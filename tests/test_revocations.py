@@ -0,0 +1,28 @@
+import pytest
+from uuid import uuid4
+
+from app.core.revocations import RevocationList
+
+
+@pytest.fixture
+def revocation_list() -> RevocationList:
+    return RevocationList(ttl=60, sync_interval=5)
+
+
+def test_revocation_list_checks_session(revocation_list):
+    sid = uuid4()
+
+    assert not revocation_list.is_revoked({'sub': 'fake_user_id', 'sid': str(sid)})
+    revocation_list.revoke(sid)
+    assert revocation_list.is_revoked({'sub': 'fake_user_id', 'sid': str(sid)})
+    # tokens without a session are never accepted
+    assert revocation_list.is_revoked({'sub': 'fake_user_id'})
+
+
+def test_revocation_list_prunes_expired():
+    revocation_list = RevocationList(ttl=0, sync_interval=5)
+    revocation_list.revoke(uuid4(), uuid4())
+
+    revocation_list.prune()
+
+    assert revocation_list.sessions == {}
@@ -0,0 +1,46 @@
+from time import time
+from jose import jwt
+
+from app.core.tokens import TokenCodec
+
+
+def make_claims(**kwargs) -> dict:
+    claims: dict = {'sub': 'fake_user_id', 'name': '@fake_user', 'exp': time() + 60}
+    claims.update(kwargs)
+    return claims
+
+
+def test_token_codec_round_trip():
+    codec = TokenCodec('secret', 'HS256')
+    token = codec.encode(make_claims())
+
+    assert codec.decode(token)['sub'] == 'fake_user_id'
+    # tokens stay readable by other jwt libraries
+    assert jwt.decode(token, 'secret', algorithms=['HS256'])['name'] == '@fake_user'
+
+
+def test_token_codec_counts_failures():
+    codec = TokenCodec('secret', 'HS256')
+    forged = TokenCodec('other_secret', 'HS256').encode(make_claims())
+    expired = codec.encode(make_claims(exp=time() - 1))
+    unsigned = jwt.encode(make_claims(), 'secret', algorithm='HS384')
+
+    for token in (forged, expired, unsigned, 'not.a.token', None):
+        assert codec.decode(token) is None
+
+    assert codec.failures == {'expired': 1, 'invalid': 2, 'malformed': 2}
+
+
+def test_token_codec_cache_hits_until_full():
+    codec = TokenCodec('secret', 'HS256', cache_size=2)
+    tokens = [codec.encode(make_claims(sub=str(i))) for i in range(3)]
+
+    for token in tokens:
+        codec.decode(token)
+    assert codec.decode(tokens[2])['sub'] == '2'
+
+    assert codec.hits == 1
+    # the oldest token was evicted
+    assert len(codec.cache) == 2
+    assert codec.decode(tokens[0])['sub'] == '0'
+    assert codec.hits == 1
@@ -0,0 +1,89 @@
+import pytest
+import asyncio
+from uuid import uuid4
+from datetime import datetime, timezone
+from contextlib import contextmanager
+
+from app.core import trending
+from app.core.trending import TrendingCounter, extract_hashtags
+from app.api.v1.repositories.records import PostRecord
+from app.api.v1.schemas.posts import VisibilityEnum
+
+
+@contextmanager
+def session_factory():
+    yield None
+
+
+@pytest.fixture
+def counter() -> TrendingCounter:
+    return TrendingCounter(
+        window=3,
+        top_k=2,
+        candidate_limit=10,
+        refresh_interval=1.0,
+        session_factory=session_factory,
+    )
+
+
+def make_record(post_id, content: str) -> PostRecord:
+    return PostRecord(
+        post_id,
+        'title',
+        content,
+        VisibilityEnum.PUBLIC,
+        datetime.now(timezone.utc),
+        'display name',
+        '@username',
+    )
+
+
+def test_extract_hashtags():
+    assert extract_hashtags('#Python and #python, #fast_api!') == {
+        'python',
+        'fast_api',
+    }
+
+
+def test_trending_window_expires_buckets(monkeypatch, counter):
+    post_id = uuid4()
+    clock: list = [600.0]
+    monkeypatch.setattr(trending, 'time', lambda: clock[0])
+
+    counter.record(post_id)
+    clock[0] += 60
+    counter.record(post_id, 2)
+    assert counter.totals() == {post_id: 3}
+
+    # the slot of the first minute is reused three minutes later
+    clock[0] += 120
+    counter.record(post_id, -1)
+    assert counter.totals() == {post_id: 1}
+
+    clock[0] += 600
+    assert counter.totals() == {}
+
+
+def test_trending_ranks_public_posts_and_hashtags(monkeypatch, counter):
+    first, second, third, private = uuid4(), uuid4(), uuid4(), uuid4()
+    records: dict = {
+        first: make_record(first, 'about #python'),
+        second: make_record(second, '#python and #sql'),
+        third: make_record(third, 'no tags'),
+    }
+
+    def get_post_records(post_ids, db, public=False):
+        assert public
+        return [records[post_id] for post_id in post_ids if post_id in records]
+
+    monkeypatch.setattr(trending.post_repo_v1, 'get_post_records', get_post_records)
+
+    for post_id, count in ((first, 5), (second, 3), (third, 1), (private, 9)):
+        counter.record(post_id, count)
+    asyncio.run(counter.refresh())
+
+    assert [(r.id, score) for r, score in counter.top_posts(10)] == [
+        (first, 5),
+        (second, 3),
+    ]
+    assert counter.top_hashtags(1) == [('python', 8)]
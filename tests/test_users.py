@@ -1,6 +1,14 @@
+from uuid import uuid4
 from pathlib import Path
+from sqlalchemy import select, func, insert, text
+from datetime import datetime, timezone, timedelta
 
 from app.core.config import settings
+from app.models.users import User
+from app.models.auth import RefreshToken
+from app.models.posts import Post
+from app.api.v1.services.user_service import user_service_v1
+from app.api.v1.repositories.user_repo import user_repo_v1
 from tests.fake_data import user_create_1, user_create_2, user_create_3
 
 '''tests are independent and can run alone and pass'''
@@ -242,6 +250,43 @@ def test_follow_user(create_role, sign_up, test_client):
     assert res.status_code == 200
 
 
+def test_get_follow_suggestions(
+    create_role, sign_up, test_client, test_db_session, monkeypatch
+):
+    '''user 1 follows user 2 who follows user 3, user 3 is suggested to user 1'''
+    test_client.post('/api/v1/auth/sign-up/', json=user_create_2)
+    test_client.post('/api/v1/auth/sign-up/', json=user_create_3)
+
+    tokens: list[str] = []
+    for user_create in (user_create_1, user_create_2):
+        sign_in_res = test_client.post(
+            '/api/v1/auth/sign-in/',
+            data={
+                'username': user_create.get('email'),
+                'password': user_create.get('password'),
+            },
+        )
+        tokens.append(sign_in_res.json()['access_token'])
+
+    for token, user_create in zip(tokens, (user_create_2, user_create_3)):
+        test_client.patch(
+            f'/api/v1/users/{user_create.get('username')}/follow/',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+
+    monkeypatch.setattr(settings, 'FOLLOW_SUGGESTION_THROTTLE', 0)
+    assert user_service_v1.compute_follow_suggestions(test_db_session) >= 1
+
+    res = test_client.get(
+        '/api/v1/users/suggestions/',
+        headers={'Authorization': f'Bearer {tokens[0]}'},
+    )
+
+    assert res.status_code == 200
+    assert res.json()['data'][0]['username'] == user_create_3.get('username')
+    assert res.json()['data'][0]['mutuals'] == 1
+
+
 def test_unfollow_user(create_role, sign_up, test_client):
     test_client.post('/api/v1/auth/sign-up/', json=user_create_2)
 
@@ -394,3 +439,67 @@ def test_get_liked_posts(create_role, sign_up, create_post, test_client):
 
     assert res.status_code == 200
     assert len(res.json()['data']) >= 1
+
+
+def test_delete_user_accounts(
+    create_role, create_post, test_db_session, monkeypatch
+):
+    '''a user past delete_at is purged with its posts in single row chunks'''
+    monkeypatch.setattr(settings, 'USER_PURGE_CHUNK_SIZE', 1)
+    monkeypatch.setattr(settings, 'USER_PURGE_THROTTLE', 0)
+
+    db = test_db_session
+    user: User = user_repo_v1.get_user_by_email(user_create_1.get('email'), db)
+    user_id = user.id
+    user.delete_at = datetime.now(timezone.utc) - timedelta(days=1)
+    db.commit()
+
+    deleted = user_service_v1.delete_user_accounts(db)
+    db.expire_all()
+
+    assert deleted == 1
+    assert db.get(User, user_id) is None
+    assert db.execute(select(func.count()).select_from(Post)).scalar() == 0
+
+
+def test_purge_partitioned_refresh_tokens(test_db_session):
+    '''purging a user keeps other users' tokens whose rows sit at the same
+    ctid in another partition'''
+    db = test_db_session
+    # partitioned like the partition_refresh_tokens migration, rolled back
+    # with the test transaction
+    db.execute(text('ALTER TABLE refresh_tokens RENAME TO refresh_tokens_plain'))
+    db.execute(text(
+        'CREATE TABLE refresh_tokens (LIKE refresh_tokens_plain INCLUDING DEFAULTS) '
+        'PARTITION BY RANGE (expires_at)'
+    ))
+    today = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    for offset in range(2):
+        start = today + timedelta(days=offset)
+        db.execute(text(
+            f'CREATE TABLE refresh_tokens_test_p{offset} PARTITION OF refresh_tokens '
+            f"FOR VALUES FROM ('{start.isoformat()}') "
+            f"TO ('{(start + timedelta(days=1)).isoformat()}')"
+        ))
+
+    purged_id, kept_id = uuid4(), uuid4()
+    for offset, user_id in enumerate((purged_id, kept_id)):
+        # the first row of each partition, both at ctid (0,1)
+        db.execute(
+            insert(RefreshToken.__table__).values(
+                id=uuid4(),
+                token=f'token_{offset}',
+                user_id=user_id,
+                expires_at=today + timedelta(days=offset, hours=12),
+            )
+        )
+
+    deleted = user_repo_v1.delete_rows(
+        RefreshToken.__table__, RefreshToken.user_id.in_([purged_id]), db, 1
+    )
+    user_ids = db.execute(select(RefreshToken.user_id)).scalars().all()
+
+    assert deleted == 1
+    assert user_ids == [kept_id]